@@ -15,9 +15,14 @@ Versión: 2.0
 
 import os
 from flask import Flask, render_template
+from blueprints.storage import init_storage
+from blueprints.state import enable_shared_state
 from blueprints.rooms import rooms_bp
 from blueprints.careers import careers_bp
 from blueprints.groups import groups_bp
+from blueprints.jobs import jobs_bp
+from blueprints.module_grid import module_grid_bp
+from blueprints.conflicts import conflicts_bp
 
 # Inicializar la aplicación Flask
 app = Flask(__name__)
@@ -28,6 +33,15 @@ app = Flask(__name__)
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+# Base SQLite con el estado persistente (UPLOAD_FOLDER/yonapp.sqlite3 salvo
+# que se defina DATABASE_PATH, ver blueprints/storage.py)
+init_storage(app)
+# Modo multiproceso: varios procesos del servidor comparten el estado a
+# través de la base (ej: YONAPP_SHARED_STATE=1 gunicorn -w 4 app:app).
+# Ver blueprints/state.py
+app.config["SHARED_STATE"] = os.environ.get("YONAPP_SHARED_STATE") == "1"
+if app.config["SHARED_STATE"]:
+    enable_shared_state()
 
 # ===================================
 # REGISTRO DE BLUEPRINTS (MÓDULOS)
@@ -36,6 +50,9 @@ app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.register_blueprint(rooms_bp)  # Módulo de Salas - Rutas: /upload, /add_room, etc.
 app.register_blueprint(careers_bp)  # Módulo de Carreras - Rutas: /get_careers, /save_career, etc.
 app.register_blueprint(groups_bp, url_prefix="/groups")  # Módulo de Bloques - Rutas: /groups/upload
+app.register_blueprint(jobs_bp)  # Cargas en segundo plano - Rutas: /jobs/<id>
+app.register_blueprint(module_grid_bp)  # Grilla de módulos - Rutas: /module_grid
+app.register_blueprint(conflicts_bp)  # Motor de conflictos - Rutas: /conflicts
 
 
 # ===================================
@@ -58,4 +75,5 @@ def index():
 if __name__ == "__main__":
     # Ejecutar en modo desarrollo con recarga automática
     # Para producción, usar run_yonapp.py
-    app.run(debug=True, port=5000)
+    # threaded=True: solicitudes en paralelo (ver blueprints/state.py)
+    app.run(debug=True, port=5000, threaded=True)
@@ -13,21 +13,29 @@ Estado: EN DESARROLLO ⚠️
 
 ADVERTENCIA: Este módulo requiere mejoras significativas:
 - Sistema de autenticación con roles de usuario
-- Base de datos persistente (actualmente en memoria)
 - Arquitectura cliente-servidor para múltiples usuarios
 Ver README.md sección "Limitaciones Actuales" para más detalles.
 
 Endpoints principales:
-- GET /get_careers: Obtiene todas las carreras
+- GET /get_careers: Obtiene todas las carreras (?since=<versión> solo los
+  cambios posteriores, con ETag/304)
 - POST /set_planning_period: Configura período académico
 - POST /save_career: Crea o actualiza carrera
 - POST /delete_career: Elimina carrera
 - POST /add_block: Añade bloque de horario
-- POST /edit_block: Edita bloque existente
-- POST /delete_planning_block: Elimina bloque
+- POST /move_block: Mueve o cambia el tipo de un bloque (por id)
+- POST /delete_block: Elimina un bloque (por id)
+- POST /edit_block, /delete_planning_block: Versiones anteriores de los dos
+  anteriores (bloque por sus datos o por índice)
 """
 
-from flask import Blueprint, request, jsonify
+import copy
+from collections import deque
+
+from flask import Blueprint, current_app, request, jsonify
+
+from blueprints import conflicts, storage
+from blueprints.state import load_view, read_view, register_view, writer
 
 # ===================================
 # INICIALIZACIÓN DEL BLUEPRINT
@@ -43,138 +51,141 @@ careers_bp = Blueprint("careers", __name__)
 #     "nombre": str,
 #     "semestres": int,
 #     "mallas": list,  # Años de las mallas curriculares activas
-#     "planificacion": list  # Bloques de horario planificados
+#     "planificacion": dict  # Bloques de horario planificados {id: bloque}
 #   }
 # }
 #
-# NOTA: Estos datos están en memoria y se pierden al cerrar la aplicación.
-# Para persistencia, migrar a base de datos SQL (ver Roadmap en README)
+# Cada bloque lleva un "id" entero estable (ver ÍNDICE DE LA PLANIFICACIÓN);
+# los endpoints y el registro de cambios identifican los bloques por id.
+#
+# NOTA: Estos son los valores iniciales. Los cambios se guardan en la base
+# SQLite (ver storage) y se restauran al iniciar la aplicación.
 CAREER_DATABASE = {
     "ENFE": {
         "nombre": "Enfermería",
         "semestres": 10,
         "mallas": ["2019", "2024"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "KINE": {
         "nombre": "Kinesiología",
         "semestres": 10,
         "mallas": ["2020"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "ADPU": {
         "nombre": "Administración Pública",
         "semestres": 10,
         "mallas": ["2021"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "ARQT": {
         "nombre": "Arquitectura",
         "semestres": 10,
         "mallas": ["2018"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "BCSA": {
         "nombre": "Bachillerato en Ciencias de la Salud",
         "semestres": 6,
         "mallas": ["2022"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "ICOM": {
         "nombre": "Ingeniería Comercial",
         "semestres": 10,
         "mallas": ["2019"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "AECO": {
         "nombre": "Administración en Expedición y Ecoturismo",
         "semestres": 10,
         "mallas": ["2023"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "DERE": {
         "nombre": "Derecho",
         "semestres": 10,
         "mallas": ["2020"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "FONO": {
         "nombre": "Fonoaudiología",
         "semestres": 10,
         "mallas": ["2021"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "ICID": {
         "nombre": "Ingeniería Civil Industrial",
         "semestres": 10,
         "mallas": ["2018"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "ICIF": {
         "nombre": "Ingeniería Civil Informática",
         "semestres": 10,
         "mallas": ["2019", "2024"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "MEVE": {
         "nombre": "Medicina Veterinaria",
         "semestres": 10,
         "mallas": ["2022"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "NYGA": {
         "nombre": "Nutrición y Gastronomía",
         "semestres": 10,
         "mallas": ["2020"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "ODON": {
         "nombre": "Odontología",
         "semestres": 10,
         "mallas": ["2021"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "OBMA": {
         "nombre": "Obstetricia",
         "semestres": 10,
         "mallas": ["2019"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "PEDI": {
         "nombre": "Pedagogía en Educación Diferencial",
         "semestres": 10,
         "mallas": ["2023"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "PEEI": {
         "nombre": "Pedagogía en Educación en Inglés",
         "semestres": 10,
         "mallas": ["2022"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "PSICO": {
         "nombre": "Psicología",
         "semestres": 10,
         "mallas": ["2021"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "QYFA": {
         "nombre": "Química y Farmacia",
         "semestres": 10,
         "mallas": ["2020"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "TEOC": {
         "nombre": "Terapia Ocupacional",
         "semestres": 10,
         "mallas": ["2018"],
-        "planificacion": [],
+        "planificacion": {},
     },
     "TMED": {
         "nombre": "Tecnología Médica",
         "semestres": 10,
         "mallas": ["2019"],
-        "planificacion": [],
+        "planificacion": {},
     },
 }
 
@@ -190,6 +201,197 @@ CAREER_DATABASE = {
 PLANNING_PERIOD = 1
 
 
+# ===================================
+# VERSIONES Y REGISTRO DE CAMBIOS
+# ===================================
+# Cada modificación incrementa CAREERS_VERSION y queda en CHANGE_LOG (y en la
+# base, ver storage.save_career_change). Las modificaciones responden solo
+# su cambio y /get_careers?since=<versión> los cambios posteriores, en vez
+# de enviar CAREER_DATABASE completo.
+#
+# Formato de cada cambio ("op"):
+#   {"version", "op": "save_career", "code", "career": {nombre, semestres, mallas}}
+#   {"version", "op": "delete_career", "code"}
+#   {"version", "op": "add_block", "code", "block"}
+#   {"version", "op": "edit_block", "code", "block"}
+#   {"version", "op": "delete_block", "code", "id"}
+#   {"version", "op": "period", "period"}
+# Los bloques se identifican por su "id". Los agregados van al final de la
+# planificación; los editados conservan su lugar.
+CHANGE_LOG_SIZE = 1000  # Cambios que se pueden pedir con ?since (los anteriores reciben todo)
+CAREERS_VERSION = 0
+CHANGE_LOG = deque(maxlen=CHANGE_LOG_SIZE)
+
+# Copia de cada carrera para las vistas publicadas: una modificación solo
+# vuelve a copiar la carrera que cambió
+_career_snapshots = {}
+
+
+def record_change(change):
+    """
+    Registra un cambio con la versión siguiente (llamar dentro de
+    writer("careers"), después de modificar CAREER_DATABASE).
+
+    Args:
+        change (dict): Cambio sin versión (ver formato arriba)
+
+    Returns:
+        dict: El cambio con su "version"
+    """
+    global CAREERS_VERSION
+    CAREERS_VERSION += 1
+    change = dict(change, version=CAREERS_VERSION)
+    CHANGE_LOG.append(change)
+    _career_snapshots.pop(change.get("code"), None)
+    storage.save_career_change(change, CHANGE_LOG_SIZE)
+    return change
+
+
+def changes_response(*changes):
+    """Respuesta de una modificación: solo sus cambios y la versión nueva."""
+    return jsonify({"success": True, "version": CAREERS_VERSION, "changes": list(changes)})
+
+
+# ===================================
+# ÍNDICE DE LA PLANIFICACIÓN
+# ===================================
+# La planificación de cada carrera es un dict {id: bloque} en orden de
+# creación, así que buscar, mover o eliminar un bloque por id no recorre la
+# lista. Los ids salen de NEXT_BLOCK_ID (compartido por todas las carreras y
+# guardado en la base) y no se reutilizan: un id que tenga un cliente nunca
+# apunta a otro bloque, aunque otro usuario haya eliminado bloques entre medio.
+#
+# PLANNING_SLOTS indexa los bloques por celda de la grilla y tipo:
+#   {código: {(malla, semestre, dia, modulo): {tipo: {ids}}}}
+# de modo que revisar un tope (mismo tipo en la misma celda) es una consulta.
+# index_block y unindex_block también avisan al motor de conflictos
+# (conflicts.py), que cruza la planificación de todas las carreras con el
+# horario de salas.
+NEXT_BLOCK_ID = 0
+PLANNING_SLOTS = {}
+ALL_TYPES = object()  # Valor por defecto de slot_blocks: bloques de todos los tipos
+
+
+def block_cell(malla, semestre, dia, modulo):
+    """Llave de una celda de la grilla (malla y semestre como texto, módulo entero)."""
+    return (str(malla), str(semestre), dia, int(modulo))
+
+
+def _block_cell(block):
+    return block_cell(block.get("malla"), block.get("semestre"), block.get("dia"), block.get("modulo"))
+
+
+def index_block(code, block):
+    """Agrega un bloque a PLANNING_SLOTS y al motor de conflictos."""
+    cell = PLANNING_SLOTS.setdefault(code, {}).setdefault(_block_cell(block), {})
+    cell.setdefault(block.get("tipo"), set()).add(block["id"])
+    conflicts.plan_block_added(code, block)
+
+
+def unindex_block(code, block):
+    """Quita un bloque de PLANNING_SLOTS y del motor de conflictos (antes de moverlo o eliminarlo)."""
+    cells = PLANNING_SLOTS.get(code, {})
+    key = _block_cell(block)
+    cell = cells.get(key, {})
+    ids = cell.get(block.get("tipo"), set())
+    ids.discard(block["id"])
+    if not ids:
+        cell.pop(block.get("tipo"), None)
+    if not cell:
+        cells.pop(key, None)
+    conflicts.plan_block_removed(code, block["id"])
+
+
+def slot_blocks(code, malla, semestre, dia, modulo, tipo=ALL_TYPES):
+    """
+    Ids de los bloques de una carrera en una celda de la grilla.
+
+    Args:
+        tipo (str | None): Solo los bloques de ese tipo (None: los bloques
+            sin tipo). Si no se entrega, los de todos los tipos.
+
+    Returns:
+        set: Ids de los bloques (no modificar)
+    """
+    cell = PLANNING_SLOTS.get(code, {}).get(block_cell(malla, semestre, dia, modulo), {})
+    if tipo is ALL_TYPES:
+        return set().union(*cell.values())
+    return cell.get(tipo, set())
+
+
+def rebuild_planning_index():
+    """Vuelve a armar PLANNING_SLOTS y NEXT_BLOCK_ID desde CAREER_DATABASE."""
+    global NEXT_BLOCK_ID
+    PLANNING_SLOTS.clear()
+    conflicts.reset_plan()
+    next_id = storage.load_state("planning_next_id", 0)
+    for code, career in CAREER_DATABASE.items():
+        for block in career["planificacion"].values():
+            index_block(code, block)
+            next_id = max(next_id, block["id"] + 1)
+    NEXT_BLOCK_ID = next_id
+
+
+def _career_view(career):
+    """Copia de una carrera para la vista publicada, con la planificación como lista."""
+    view = copy.deepcopy(career)
+    view["planificacion"] = list(view["planificacion"].values())
+    return view
+
+
+def build_careers_view():
+    """Vista inmutable de las carreras, el período y los cambios para los lectores (ver state.read_view)."""
+    careers = {}
+    for code, career in CAREER_DATABASE.items():
+        if code not in _career_snapshots:
+            _career_snapshots[code] = _career_view(career)
+        careers[code] = _career_snapshots[code]
+    return {
+        "careers": careers,
+        "period": PLANNING_PERIOD,
+        "version": CAREERS_VERSION,
+        "changes": tuple(CHANGE_LOG),
+    }
+
+
+def restore_careers_state():
+    """Carga las carreras, el período y los cambios guardados (la primera vez guarda las iniciales)."""
+    global PLANNING_PERIOD, CAREERS_VERSION
+    try:
+        careers = storage.load_careers()
+        if careers is None:
+            storage.save_careers(CAREER_DATABASE)
+        else:
+            CAREER_DATABASE.clear()
+            CAREER_DATABASE.update(careers)
+        _career_snapshots.clear()
+        rebuild_planning_index()
+        PLANNING_PERIOD = storage.load_state("planning_period", PLANNING_PERIOD)
+        changes = storage.load_career_changes(CHANGE_LOG_SIZE)
+        CAREERS_VERSION = changes[-1]["version"] if changes else 0
+        # Los cambios de bloques anteriores a los ids usaban índices: los
+        # clientes con una versión anterior a ellos reciben todo de nuevo
+        legacy = [i for i, change in enumerate(changes) if "index" in change]
+        if legacy:
+            changes = changes[legacy[-1] + 1:]
+        CHANGE_LOG.clear()
+        CHANGE_LOG.extend(changes)
+    except Exception as e:
+        current_app.logger.error("No se pudo restaurar el estado de carreras: %s", e)
+
+
+# En modo multiproceso los cambios de otro proceso se recargan completos
+# (las carreras son pocas)
+register_view("careers", build_careers_view, reload=restore_careers_state)
+
+
+@careers_bp.record_once
+def _restore_on_startup(setup_state):
+    """Carga las carreras y el período guardados al registrar el blueprint."""
+    with setup_state.app.app_context():
+        load_view("careers", restore_careers_state)
+
+
 # ===================================
 # ENDPOINTS DE CARRERAS
 # ===================================
@@ -198,17 +400,46 @@ PLANNING_PERIOD = 1
 def get_careers():
     """
     Obtiene todas las carreras disponibles y el período de planificación actual.
-    
+
+    Query params:
+        since: Versión que ya tiene el cliente; se responden solo los
+            cambios posteriores (ver el formato en CHANGE_LOG). Si la versión
+            ya no está en el registro se responde todo ("full": true).
+
+    La respuesta lleva ETag con la versión: con If-None-Match igual a la
+    versión actual se responde 304 sin contenido.
+
     Returns:
         JSON: {
             "success": true,
+            "full": true,
             "data": CAREER_DATABASE,
-            "period": PLANNING_PERIOD
+            "period": PLANNING_PERIOD,
+            "version": CAREERS_VERSION
         }
+        o, con since, {"success": true, "full": false, "changes": [...],
+        "period", "version"}
     """
-    return jsonify(
-        {"success": True, "data": CAREER_DATABASE, "period": PLANNING_PERIOD}
-    )
+    view = read_view("careers")
+    etag = f"careers-{view['version']}"
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        try:
+            since = int(request.args["since"]) if request.args.get("since") else None
+        except ValueError:
+            return jsonify({"success": False, "error": "Versión inválida"}), 400
+        changes = view["changes"]
+        oldest = changes[0]["version"] if changes else view["version"] + 1
+        body = {"success": True, "period": view["period"], "version": view["version"]}
+        if since is not None and oldest - 1 <= since <= view["version"]:
+            body.update(full=False, changes=[c for c in changes if c["version"] > since])
+        else:
+            body.update(full=True, data=view["careers"])
+        response = jsonify(body)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
 @careers_bp.route("/set_planning_period", methods=["POST"])
@@ -231,8 +462,11 @@ def set_planning_period():
     data = request.json
     period = int(data.get("period", 1))
     if period in [1, 2]:
-        PLANNING_PERIOD = period
-        return jsonify({"success": True, "period": PLANNING_PERIOD})
+        with writer("careers"):
+            PLANNING_PERIOD = period
+            storage.save_state("planning_period", period)
+            change = record_change({"op": "period", "period": period})
+        return jsonify({"success": True, "period": period, "version": change["version"], "changes": [change]})
     return jsonify({"error": "Periodo inválido"}), 400
 
 
@@ -250,137 +484,214 @@ def save_career():
     if not code or not name:
         return jsonify({"error": "Faltan datos"}), 400
 
-    existing_plan = []
-    if code in CAREER_DATABASE:
-        existing_plan = CAREER_DATABASE[code].get("planificacion", [])
+    with writer("careers"):
+        existing_plan = {}
+        if code in CAREER_DATABASE:
+            existing_plan = CAREER_DATABASE[code].get("planificacion", {})
 
-    CAREER_DATABASE[code] = {
-        "nombre": name,
-        "semestres": semesters,
-        "mallas": meshes,
-        "planificacion": existing_plan,
-    }
-    return jsonify({"success": True, "data": CAREER_DATABASE})
+        CAREER_DATABASE[code] = {
+            "nombre": name,
+            "semestres": semesters,
+            "mallas": meshes,
+            "planificacion": existing_plan,
+        }
+        storage.save_career(code, CAREER_DATABASE[code])
+        return changes_response(record_change({
+            "op": "save_career",
+            "code": code,
+            "career": {"nombre": name, "semestres": semesters, "mallas": meshes},
+        }))
 
 
-@careers_bp.route("/edit_block", methods=["POST"])
-def edit_block():
+@careers_bp.route("/delete_career", methods=["POST"])
+def delete_career():
     data = request.json
-    code = data.get("career_code")
-    malla = data.get("malla")
-    semestre = data.get("semestre")
-    old_dia = data.get("old_dia")
-    old_mod = int(data.get("old_modulo"))
-    nrc = data.get("nrc")
-    seccion = data.get("seccion")
-    new_dia = data.get("new_dia") or old_dia
-    new_mod = int(data.get("new_modulo")) if data.get("new_modulo") is not None else old_mod
-    new_tipo = data.get("new_tipo")  # opcional, por si cambiamos de TEO a LAB, etc.
+    code = data.get("code")
+    with writer("careers"):
+        if code in CAREER_DATABASE:
+            for block in CAREER_DATABASE.pop(code)["planificacion"].values():
+                unindex_block(code, block)
+            PLANNING_SLOTS.pop(code, None)
+            storage.delete_career(code)
+            return changes_response(record_change({"op": "delete_career", "code": code}))
+        return jsonify({"error": "No encontrada"}), 404
+
+
+# ===================================
+# ENDPOINTS DE BLOQUES
+# ===================================
+
+def _move_block(code, block_id, dia=None, modulo=None, tipo=None):
+    """
+    Mueve un bloque a otro día/módulo o cambia su tipo (llamar dentro de
+    writer("careers")).
 
+    Returns:
+        tuple: (respuesta, código HTTP)
+    """
     career = CAREER_DATABASE.get(code)
     if not career:
         return jsonify({"success": False, "error": "Carrera no encontrada"}), 400
-
-    plan = career.get("planificacion", [])
-
-    # 1) Encontrar el bloque a editar
-    target_block = None
-    for block in plan:
-        if (
-            block.get("malla") == malla
-            and str(block.get("semestre")) == str(semestre)
-            and block.get("dia") == old_dia
-            and int(block.get("modulo")) == old_mod
-            and str(block.get("nrc")) == str(nrc)
-            and block.get("seccion") == seccion
-        ):
-            target_block = block
-            break
-
-    if not target_block:
+    block = career["planificacion"].get(block_id)
+    if not block:
         return jsonify({"success": False, "error": "Bloque no encontrado"}), 404
 
-    # 2) Determinar tipo resultante (si se cambia)
-    resulting_tipo = new_tipo or target_block.get("tipo")
-
-    # 3) Verificar tope: ¿ya existe un bloque del mismo tipo en ese dia/módulo/malla/semestre?
-    for block in plan:
-        if block is target_block:
-            continue
-        if (
-            block.get("malla") == malla
-            and str(block.get("semestre")) == str(semestre)
-            and block.get("dia") == new_dia
-            and int(block.get("modulo")) == new_mod
-            and block.get("tipo") == resulting_tipo
-        ):
-            return jsonify({
-                "success": False,
-                "error": "Tope de horario: ya existe un bloque del mismo tipo en ese módulo"
-            }), 400
-
-    # 4) Aplicar cambios
-    target_block["dia"] = new_dia
-    target_block["modulo"] = new_mod
-    if new_tipo:
-        target_block["tipo"] = new_tipo
-
-    return jsonify({"success": True, "data": CAREER_DATABASE})
+    new_dia = dia or block["dia"]
+    new_mod = int(modulo) if modulo is not None else int(block["modulo"])
+    new_tipo = tipo or block.get("tipo")
+
+    # Tope: ¿ya existe otro bloque del mismo tipo en ese dia/módulo/malla/semestre?
+    if slot_blocks(code, block.get("malla"), block.get("semestre"), new_dia, new_mod, new_tipo) - {block_id}:
+        return jsonify({
+            "success": False,
+            "error": "Tope de horario: ya existe un bloque del mismo tipo en ese módulo"
+        }), 400
+
+    unindex_block(code, block)
+    block["dia"] = new_dia
+    block["modulo"] = new_mod
+    if tipo:
+        block["tipo"] = tipo
+    index_block(code, block)
+    storage.save_planning_block(code, block)
+    return changes_response(record_change({"op": "edit_block", "code": code, "block": dict(block)})), 200
+
+
+def _remove_block(code, block_id):
+    """Elimina un bloque por id (llamar dentro de writer("careers"))."""
+    if code not in CAREER_DATABASE:
+        return jsonify({"error": "Carrera no encontrada"}), 404
+    block = CAREER_DATABASE[code]["planificacion"].pop(block_id, None)
+    if not block:
+        return jsonify({"error": "Bloque no encontrado"}), 404
+    unindex_block(code, block)
+    storage.delete_planning_block(code, block_id)
+    return changes_response(record_change({"op": "delete_block", "code": code, "id": block_id})), 200
 
 
-@careers_bp.route("/delete_career", methods=["POST"])
-def delete_career():
-    data = request.json
-    code = data.get("code")
-    if code in CAREER_DATABASE:
-        del CAREER_DATABASE[code]
-        return jsonify({"success": True})
-    return jsonify({"error": "No encontrada"}), 404
+def _block_id(data):
+    """Id de bloque del request (None si falta o no es un entero)."""
+    try:
+        return int(data["block_id"])
+    except (KeyError, TypeError, ValueError):
+        return None
 
 
 # --- RUTA MODIFICADA: SIN NOMBRE DE ASIGNATURA ---
 @careers_bp.route("/add_block", methods=["POST"])
 def add_block():
+    global NEXT_BLOCK_ID
     data = request.json
     code = data.get("career_code")
 
-    if code not in CAREER_DATABASE:
-        return jsonify({"error": "Carrera no encontrada"}), 404
+    with writer("careers"):
+        if code not in CAREER_DATABASE:
+            return jsonify({"error": "Carrera no encontrada"}), 404
+
+        new_block = {
+            "id": NEXT_BLOCK_ID,
+            "malla": data.get("malla"),
+            "semestre": data.get("semestre"),
+            "dia": data.get("dia"),
+            "modulo": int(data.get("modulo")),
+            # Nuevos campos para identificación completa
+            "codigo_materia": data.get("codigo_materia", ""),
+            "n_curso": data.get("n_curso", ""),
+            "nrc": data.get("nrc"),
+            "seccion": data.get("seccion"),
+            "tipo": data.get("tipo"),
+        }
+        NEXT_BLOCK_ID += 1
+
+        CAREER_DATABASE[code]["planificacion"][new_block["id"]] = new_block
+        index_block(code, new_block)
+        storage.save_planning_block(code, new_block, NEXT_BLOCK_ID)
+
+        return changes_response(record_change({"op": "add_block", "code": code, "block": dict(new_block)}))
+
+
+@careers_bp.route("/move_block", methods=["POST"])
+def move_block():
+    """
+    Mueve un bloque a otro día/módulo y/o cambia su tipo.
+
+    Request JSON:
+        {
+            "career_code": str,
+            "block_id": int,
+            "dia": str (opcional),
+            "modulo": int (opcional),
+            "tipo": str (opcional)
+        }
+
+    Returns:
+        JSON: {"success": true, "version", "changes": [edit_block]}, 400 si
+        el destino choca con otro bloque del mismo tipo, 404 si el bloque
+        no existe
+    """
+    data = request.json
+    block_id = _block_id(data)
+    if block_id is None:
+        return jsonify({"success": False, "error": "Falta block_id"}), 400
+    with writer("careers"):
+        return _move_block(data.get("career_code"), block_id, data.get("dia"), data.get("modulo"), data.get("tipo"))
+
+
+@careers_bp.route("/delete_block", methods=["POST"])
+def delete_block():
+    """
+    Elimina un bloque por su id.
+
+    Request JSON:
+        {"career_code": str, "block_id": int}
+    """
+    data = request.json
+    block_id = _block_id(data)
+    if block_id is None:
+        return jsonify({"error": "Falta block_id"}), 400
+    with writer("careers"):
+        return _remove_block(data.get("career_code"), block_id)
 
-    new_block = {
-        "malla": data.get("malla"),
-        "semestre": data.get("semestre"),
-        "dia": data.get("dia"),
-        "modulo": int(data.get("modulo")),
-        # Nuevos campos para identificación completa
-        "codigo_materia": data.get("codigo_materia", ""),
-        "n_curso": data.get("n_curso", ""),
-        "nrc": data.get("nrc"),
-        "seccion": data.get("seccion"),
-        "tipo": data.get("tipo"),
-    }
 
-    CAREER_DATABASE[code]["planificacion"].append(new_block)
+@careers_bp.route("/edit_block", methods=["POST"])
+def edit_block():
+    """
+    Versión anterior de /move_block: identifica el bloque por malla,
+    semestre, día, módulo, NRC y sección (o por block_id, si viene).
+    """
+    data = request.json
+    code = data.get("career_code")
 
-    return jsonify({"success": True, "data": CAREER_DATABASE})
+    with writer("careers"):
+        block_id = _block_id(data)
+        if block_id is None:
+            # Candidatos: los bloques de la celda original (índice), sin recorrer la planificación
+            plan = CAREER_DATABASE.get(code, {}).get("planificacion", {})
+            nrc, seccion = str(data.get("nrc")), data.get("seccion")
+            cell = slot_blocks(code, data.get("malla"), data.get("semestre"),
+                               data.get("old_dia"), data.get("old_modulo"))
+            block_id = next(
+                (i for i in sorted(cell) if str(plan[i].get("nrc")) == nrc and plan[i].get("seccion") == seccion),
+                None,
+            )
+        return _move_block(code, block_id, data.get("new_dia"), data.get("new_modulo"), data.get("new_tipo"))
 
 
 @careers_bp.route("/delete_planning_block", methods=["POST"])
 def delete_planning_block():
+    """
+    Versión anterior de /delete_block: acepta block_id o block_index (la
+    posición del bloque en la planificación).
+    """
     data = request.json
     code = data.get("career_code")
-    block_idx = data.get("block_index")  # El índice del bloque en la lista (0, 1, 2...)
-
-    if code not in CAREER_DATABASE:
-        return jsonify({"error": "Carrera no encontrada"}), 404
 
-    try:
-        # Eliminamos el bloque usando su índice en la lista
-        career_plan = CAREER_DATABASE[code]["planificacion"]
-        if 0 <= block_idx < len(career_plan):
-            del career_plan[block_idx]
-            return jsonify({"success": True, "data": CAREER_DATABASE})
-        else:
-            return jsonify({"error": "Índice de bloque inválido"}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    with writer("careers"):
+        block_id = _block_id(data)
+        if block_id is None:
+            plan = CAREER_DATABASE.get(code, {}).get("planificacion", {})
+            block_idx = data.get("block_index")
+            if not isinstance(block_idx, int) or not 0 <= block_idx < len(plan):
+                return jsonify({"error": "Índice de bloque inválido"}), 400
+            block_id = list(plan)[block_idx]
+        return _remove_block(code, block_id)
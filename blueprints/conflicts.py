@@ -0,0 +1,370 @@
+"""
+Motor de Conflictos de Horario
+==============================
+
+Detecta, a medida que cambian los bloques, los conflictos entre la
+planificación de las carreras (CAREER_DATABASE) y el horario de salas:
+
+- "tope": dos o más bloques de una carrera con el mismo tipo en la misma
+  celda (malla, semestre, día, módulo). /add_block no lo impide.
+- "nrc": un NRC planificado en varias carreras que no está en los mismos
+  bloques (día, módulo) en todas.
+- "sala": un bloque planificado cae en un día/módulo en que una sala que
+  su NRC usa en el horario cargado está ocupada por otro NRC.
+
+En vez de recorrer toda la planificación en cada consulta, el motor
+mantiene índices invertidos y recalcula solo lo que toca cada cambio:
+
+- PLAN_BLOCKS: (carrera, id) -> datos del bloque que usa el motor
+- NRC_BLOCKS: NRC -> bloques planificados {(carrera, id)}
+- SLOT_BLOCKS: (día, módulo) -> {NRC: bloques planificados}
+- CELL_BLOCKS: (carrera, malla, semestre, día, módulo, tipo) -> ids
+- ROOM_SLOTS: sala -> {(día, módulo): NRC} (vista combinada del horario)
+- NRC_ROOMS: NRC -> {sala: bloques del horario}
+
+CONFLICTS tiene los conflictos vigentes: /conflicts los responde sin
+recorrer la planificación, así que su costo depende de la cantidad de
+conflictos y no del tamaño del plan. Cada cambio queda en CONFLICT_LOG y
+/conflicts?since=<versión> responde solo los cambios posteriores.
+
+Los módulos de carreras y salas avisan al motor:
+- careers.py: index_block / unindex_block -> plan_block_added /
+  plan_block_removed; al restaurar, reset_plan
+- rooms.py: cada bloque que cambia en la vista combinada ->
+  schedule_slot_changed; al reconstruir la ocupación, reset_schedule
+
+Todas las funciones que modifican el motor se llaman dentro de un
+writer(...) (ver state.py).
+
+Endpoint:
+- GET /conflicts: Conflictos vigentes (?career=, ?type=, ?since=)
+"""
+
+from collections import deque
+
+from flask import Blueprint, jsonify, request
+
+from blueprints import state
+from blueprints.state import publish, read_view, register_view
+
+# ===================================
+# INICIALIZACIÓN DEL BLUEPRINT
+# ===================================
+conflicts_bp = Blueprint("conflicts", __name__)
+
+# ===================================
+# ÍNDICES INVERTIDOS
+# ===================================
+PLAN_BLOCKS = {}
+NRC_BLOCKS = {}
+SLOT_BLOCKS = {}
+CELL_BLOCKS = {}
+ROOM_SLOTS = {}
+NRC_ROOMS = {}
+
+# ===================================
+# CONFLICTOS VIGENTES Y REGISTRO DE CAMBIOS
+# ===================================
+# CONFLICTS: id del conflicto (texto, ej: "tope:ENFE:2019:1:lunes:1:TEO") ->
+# conflicto. Los conflictos se reemplazan completos, nunca se modifican en
+# el lugar (la vista publicada los comparte).
+#
+# Formato de cada cambio en CONFLICT_LOG:
+#   {"version", "id", "conflict": conflicto o None si se resolvió}
+CONFLICT_LOG_SIZE = 1000  # Cambios que se pueden pedir con ?since (los anteriores reciben todo)
+CONFLICT_TYPES = ("tope", "nrc", "sala")
+CONFLICTS = {}
+CONFLICTS_VERSION = 0
+CONFLICT_LOG = deque(maxlen=CONFLICT_LOG_SIZE)
+
+
+def _set_conflict(conflict_id, conflict):
+    """Registra (o resuelve, con None) un conflicto si cambió."""
+    global CONFLICTS_VERSION
+    if conflict is not None:
+        conflict = dict(conflict, id=conflict_id)
+    if CONFLICTS.get(conflict_id) == conflict:
+        return
+    if conflict is None:
+        del CONFLICTS[conflict_id]
+    else:
+        CONFLICTS[conflict_id] = conflict
+    CONFLICTS_VERSION += 1
+    CONFLICT_LOG.append({"version": CONFLICTS_VERSION, "id": conflict_id, "conflict": conflict})
+    publish("conflicts")
+
+
+def _conflict_id(*parts):
+    return ":".join(str(part) for part in parts)
+
+
+def _clean_nrc(nrc):
+    """NRC como texto (vacío si el bloque no tiene)."""
+    return "" if nrc is None else str(nrc).strip()
+
+
+# ===================================
+# VERIFICACIONES (solo lo que toca un cambio)
+# ===================================
+
+def _check_cell(cell):
+    """Tope: más de un bloque del mismo tipo en una celda de una carrera."""
+    ids = CELL_BLOCKS.get(cell, ())
+    code, malla, semestre, dia, modulo, tipo = cell
+    conflict = None
+    if len(ids) > 1:
+        conflict = {
+            "type": "tope", "careers": [code], "malla": malla, "semestre": semestre,
+            "dia": dia, "modulo": modulo, "tipo": tipo, "blocks": sorted(ids),
+        }
+    _set_conflict(_conflict_id("tope", *cell), conflict)
+
+
+def _check_nrc(nrc):
+    """NRC: las carreras que lo planifican deben tenerlo en los mismos bloques."""
+    slots = {}
+    for code, block_id in NRC_BLOCKS.get(nrc, ()):
+        block = PLAN_BLOCKS[(code, block_id)]
+        slots.setdefault(code, set()).add((block["dia"], block["modulo"]))
+    conflict = None
+    if len(slots) > 1 and len({frozenset(career_slots) for career_slots in slots.values()}) > 1:
+        conflict = {
+            "type": "nrc", "careers": sorted(slots), "nrc": nrc,
+            "slots": {code: sorted([dia, modulo] for dia, modulo in career_slots)
+                      for code, career_slots in sorted(slots.items())},
+        }
+    _set_conflict(_conflict_id("nrc", nrc), conflict)
+
+
+def _check_block_rooms(block_key):
+    """Sala: las salas del NRC del bloque ocupadas por otro NRC en su día/módulo."""
+    block = PLAN_BLOCKS.get(block_key)
+    conflict = None
+    if block is not None:
+        slot = (block["dia"], block["modulo"])
+        rooms = [
+            {"sala": sala, "nrc": ROOM_SLOTS[sala][slot]}
+            for sala in sorted(NRC_ROOMS.get(block["nrc"], ()))
+            if ROOM_SLOTS[sala].get(slot, block["nrc"]) != block["nrc"]
+        ]
+        if rooms:
+            conflict = {
+                "type": "sala", "careers": [block_key[0]], "block_id": block_key[1],
+                "nrc": block["nrc"], "dia": block["dia"], "modulo": block["modulo"], "rooms": rooms,
+            }
+    _set_conflict(_conflict_id("sala", *block_key), conflict)
+
+
+# ===================================
+# CAMBIOS DE LA PLANIFICACIÓN
+# ===================================
+
+def _block_cell(code, block):
+    return (code, block["malla"], block["semestre"], block["dia"], block["modulo"], block["tipo"])
+
+
+def plan_block_added(code, block):
+    """Agrega un bloque de la planificación (con su "id") a los índices."""
+    key = (code, block["id"])
+    entry = {
+        "nrc": _clean_nrc(block.get("nrc")),
+        "malla": str(block.get("malla")),
+        "semestre": str(block.get("semestre")),
+        "dia": block.get("dia"),
+        "modulo": int(block.get("modulo")),
+        "tipo": block.get("tipo"),
+    }
+    PLAN_BLOCKS[key] = entry
+    cell = _block_cell(code, entry)
+    CELL_BLOCKS.setdefault(cell, set()).add(block["id"])
+    _check_cell(cell)
+    if entry["nrc"]:
+        NRC_BLOCKS.setdefault(entry["nrc"], set()).add(key)
+        SLOT_BLOCKS.setdefault((entry["dia"], entry["modulo"]), {}).setdefault(entry["nrc"], set()).add(key)
+        _check_nrc(entry["nrc"])
+        _check_block_rooms(key)
+
+
+def plan_block_removed(code, block_id):
+    """Quita un bloque de la planificación de los índices (y sus conflictos)."""
+    key = (code, block_id)
+    entry = PLAN_BLOCKS.pop(key, None)
+    if entry is None:
+        return
+    cell = _block_cell(code, entry)
+    CELL_BLOCKS[cell].discard(block_id)
+    if not CELL_BLOCKS[cell]:
+        del CELL_BLOCKS[cell]
+    _check_cell(cell)
+    if entry["nrc"]:
+        NRC_BLOCKS[entry["nrc"]].discard(key)
+        if not NRC_BLOCKS[entry["nrc"]]:
+            del NRC_BLOCKS[entry["nrc"]]
+        slot = (entry["dia"], entry["modulo"])
+        slot_nrcs = SLOT_BLOCKS[slot]
+        slot_nrcs[entry["nrc"]].discard(key)
+        if not slot_nrcs[entry["nrc"]]:
+            del slot_nrcs[entry["nrc"]]
+        if not slot_nrcs:
+            del SLOT_BLOCKS[slot]
+        _check_nrc(entry["nrc"])
+        _check_block_rooms(key)
+
+
+def reset_plan():
+    """Olvida toda la planificación (antes de volver a agregar sus bloques)."""
+    for key in list(PLAN_BLOCKS):
+        plan_block_removed(*key)
+
+
+# ===================================
+# CAMBIOS DEL HORARIO DE SALAS
+# ===================================
+
+def _count_room(nrc, sala, delta):
+    """
+    Suma delta a los bloques de un NRC en una sala.
+
+    Returns:
+        set: Bloques planificados del NRC que hay que volver a verificar (si
+        el NRC empezó o dejó de usar la sala)
+    """
+    rooms = NRC_ROOMS.setdefault(nrc, {})
+    count = rooms.get(sala, 0) + delta
+    if count > 0:
+        rooms[sala] = count
+    else:
+        rooms.pop(sala, None)
+        if not rooms:
+            del NRC_ROOMS[nrc]
+    if (count > 0) != (count - delta > 0):
+        return set(NRC_BLOCKS.get(nrc, ()))
+    return set()
+
+
+def schedule_slot_changed(slot, entry):
+    """
+    Actualiza un bloque del horario de salas.
+
+    Args:
+        slot (tuple): (sala, dia_norm, modulo)
+        entry (dict | None): Entrada que ocupa el bloque en la vista
+            combinada, o None si quedó libre
+    """
+    sala, dia, modulo = slot
+    nrc = _clean_nrc(entry["nrc"]) if entry is not None else None
+    previous = ROOM_SLOTS.get(sala, {}).get((dia, modulo))
+    if previous == nrc:
+        return
+    room_slots = ROOM_SLOTS.setdefault(sala, {})
+    affected = set()
+    if previous is not None:
+        del room_slots[(dia, modulo)]
+        affected |= _count_room(previous, sala, -1)
+    if nrc is not None:
+        room_slots[(dia, modulo)] = nrc
+        affected |= _count_room(nrc, sala, 1)
+    if not room_slots:
+        del ROOM_SLOTS[sala]
+    # Bloques planificados en ese día/módulo de los NRC que usan la sala
+    planned = SLOT_BLOCKS.get((dia, modulo), {})
+    for room_nrc in set(room_slots.values()) | {previous}:
+        affected |= planned.get(room_nrc, set())
+    for key in affected:
+        _check_block_rooms(key)
+
+
+def reset_schedule(occupancy):
+    """
+    Reemplaza el horario de salas completo (al cargar un Excel o restaurar).
+
+    Args:
+        occupancy (dict): (sala, dia_norm, modulo) -> entrada (OCCUPANCY_INDEX)
+    """
+    ROOM_SLOTS.clear()
+    NRC_ROOMS.clear()
+    for (sala, dia, modulo), entry in occupancy.items():
+        nrc = _clean_nrc(entry["nrc"])
+        ROOM_SLOTS.setdefault(sala, {})[(dia, modulo)] = nrc
+        rooms = NRC_ROOMS.setdefault(nrc, {})
+        rooms[sala] = rooms.get(sala, 0) + 1
+    for key in list(PLAN_BLOCKS):
+        _check_block_rooms(key)
+
+
+def build_conflicts_view():
+    """Vista inmutable de los conflictos vigentes (ver state.read_view)."""
+    return {
+        "conflicts": tuple(CONFLICTS.values()),
+        "version": CONFLICTS_VERSION,
+        "changes": tuple(CONFLICT_LOG),
+    }
+
+
+# Estado derivado: en modo multiproceso se recalcula en cada proceso cuando
+# careers.py y rooms.py recargan el suyo
+register_view("conflicts", build_conflicts_view)
+
+
+# ===================================
+# ENDPOINTS
+# ===================================
+
+@conflicts_bp.route("/conflicts", methods=["GET"])
+def get_conflicts():
+    """
+    Conflictos vigentes entre la planificación y el horario de salas.
+
+    Query params:
+        career: Solo los conflictos que involucran esa carrera
+        type: Solo los conflictos de ese tipo ("tope", "nrc" o "sala")
+        since: Versión que ya tiene el cliente; se responden solo los
+            cambios posteriores ({"version", "id", "conflict"}, con
+            conflict None si se resolvió). Las versiones son de cada
+            proceso: en modo multiproceso siempre se responde todo.
+
+    Returns:
+        JSON: {
+            "success": true,
+            "full": true,
+            "conflicts": [...],
+            "count": int,
+            "version": int
+        }
+        o, con since, {"success": true, "full": false, "changes": [...],
+        "version"}
+    """
+    conflict_type = request.args.get("type")
+    if conflict_type and conflict_type not in CONFLICT_TYPES:
+        return jsonify({"success": False, "error": "Tipo de conflicto inválido"}), 400
+    career = request.args.get("career")
+    try:
+        since = int(request.args["since"]) if request.args.get("since") else None
+    except ValueError:
+        return jsonify({"success": False, "error": "Versión inválida"}), 400
+
+    def wanted(conflict):
+        return (
+            conflict is None
+            or (not career or career in conflict["careers"])
+            and (not conflict_type or conflict["type"] == conflict_type)
+        )
+
+    view = read_view("conflicts")
+    changes = view["changes"]
+    oldest = changes[0]["version"] if changes else view["version"] + 1
+    if since is not None and not state.SHARED_STATE and oldest - 1 <= since <= view["version"]:
+        return jsonify({
+            "success": True,
+            "full": False,
+            "changes": [c for c in changes if c["version"] > since and wanted(c["conflict"])],
+            "version": view["version"],
+        })
+    conflicts = [conflict for conflict in view["conflicts"] if wanted(conflict)]
+    return jsonify({
+        "success": True,
+        "full": True,
+        "conflicts": conflicts,
+        "count": len(conflicts),
+        "version": view["version"],
+    })
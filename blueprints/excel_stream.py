@@ -0,0 +1,303 @@
+"""
+Lectura por Bloques de Archivos Excel de Gran Tamaño
+=====================================================
+
+pd.read_excel carga el libro completo en memoria antes de procesarlo. Para
+exportaciones multi-campus eso dispara el uso de RAM del servidor.
+
+Este módulo lee la primera hoja con el iterador de solo lectura de openpyxl,
+normaliza los encabezados una única vez y entrega las filas en DataFrames de
+tamaño fijo, que pasan por la misma lógica de procesamiento que un
+DataFrame completo. Cada bloque tiene los mismos tipos y valores que esas
+filas en pd.read_excel (ver column_dtypes), a costa de leer el archivo dos
+veces. La memoria usada por la lectura no depende del tamaño del archivo
+(salvo al descartar filas repetidas, ver row_digest).
+
+Lo usan:
+- rooms.process_schedule
+- groups.process_groups_file
+"""
+
+import hashlib
+import math
+import os
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# ===================================
+# CONFIGURACIÓN
+# ===================================
+STREAM_CHUNK_ROWS = 5000  # Filas por bloque entregado
+STREAMING_MIN_BYTES = 20 * 1024 * 1024  # Sobre este tamaño se lee por bloques
+STREAMABLE_EXTENSIONS = (".xlsx", ".xlsm")  # openpyxl no lee .xls
+
+
+def should_stream(file_path):
+    """
+    Indica si conviene leer el archivo por bloques en vez de completo.
+
+    Args:
+        file_path (str): Ruta del archivo Excel
+
+    Returns:
+        bool: True si es un .xlsx grande que openpyxl puede leer en streaming
+    """
+    if not file_path.lower().endswith(STREAMABLE_EXTENSIONS):
+        return False
+    return os.path.getsize(file_path) >= STREAMING_MIN_BYTES
+
+
+def _header_names(header):
+    """
+    Nombra los encabezados igual que pd.read_excel.
+
+    Las celdas vacías se llaman "Unnamed: N" y los nombres repetidos reciben
+    el sufijo ".1", ".2", etc.
+    """
+    names = []
+    seen = {}
+    for pos, value in enumerate(header):
+        name = f"Unnamed: {pos}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _convert_cell(value):
+    """
+    Convierte una celda como lo hace pandas al leer con openpyxl.
+
+    Los números enteros guardados como float pasan a int y las celdas vacías
+    a NaN. El tipo final de cada columna lo decide después TextParser, igual
+    que en pd.read_excel (ver column_dtypes).
+    """
+    if value is None:
+        return math.nan
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _sheet_rows(file_path):
+    """
+    Encabezado y filas de la primera hoja, con las celdas ya convertidas.
+
+    Yields:
+        tuple: Primero el encabezado (valores crudos); después cada fila,
+            recortada o rellenada con NaN al ancho del encabezado
+    """
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        yield header
+        width = len(header)
+        blank = (math.nan,) * width
+        pending_blank = 0
+        for raw in rows:
+            # pd.read_excel conserva las filas vacías intermedias (como NaN)
+            # y omite las del final: se entregan solo si viene otra fila
+            if all(value is None for value in raw):
+                pending_blank += 1
+                continue
+            for _ in range(pending_blank):
+                yield blank
+            pending_blank = 0
+            values = tuple(_convert_cell(value) for value in raw[:width])
+            yield values + (math.nan,) * (width - len(values))
+    finally:
+        wb.close()
+
+
+def _row_batches(rows, chunk_size):
+    """Agrupa las filas en listas de chunk_size filas."""
+    batch = []
+    for values in rows:
+        batch.append(values)
+        if len(batch) >= chunk_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _parse_rows(rows, object_columns=()):
+    """
+    Tipa un bloque de filas con TextParser, el mismo parser de pd.read_excel.
+
+    Args:
+        rows (list): Filas de _sheet_rows
+        object_columns (iterable): Posiciones que se leen sin inferir tipo
+
+    Returns:
+        DataFrame: Columnas numeradas desde 0
+    """
+    return TextParser(rows, header=None, dtype={pos: object for pos in object_columns}).read()
+
+
+def _merge_dtypes(kinds, has_null, all_str):
+    """
+    Tipo de una columna completa a partir de los tipos de sus bloques.
+
+    Replica la inferencia de pd.read_excel: la columna es numérica solo si
+    todos sus bloques lo son (float si hay vacíos o decimales; bool solo si
+    todo es bool y no hay vacíos), fecha si todos son fechas, texto si todas
+    sus celdas son texto y object en cualquier otro caso.
+
+    Args:
+        kinds (set): Tipos de los bloques con algún valor (sin los vacíos)
+        has_null (bool): La columna tiene alguna celda vacía
+        all_str (bool): Todas las celdas con valor son texto
+    """
+    if not kinds:
+        return np.dtype(float)
+    if all(kind.kind in "biuf" for kind in kinds):
+        if kinds == {np.dtype(bool)}:
+            return np.dtype(float) if has_null else np.dtype(bool)
+        if has_null or any(kind.kind == "f" for kind in kinds):
+            return np.dtype(float)
+        return np.dtype(np.int64)
+    if all(kind.kind == "M" for kind in kinds):
+        return next(iter(kinds))
+    if all_str:
+        return pd.StringDtype(na_value=np.nan)
+    return np.dtype(object)
+
+
+def column_dtypes(file_path, chunk_size=STREAM_CHUNK_ROWS):
+    """
+    Primera pasada: el tipo que pd.read_excel le daría a cada columna.
+
+    pd.read_excel infiere el tipo mirando la columna completa (una celda de
+    texto convierte toda la columna en texto; un vacío convierte los enteros
+    en float). Los bloques se tipan por separado con TextParser y sus tipos
+    se combinan con _merge_dtypes, sin guardar las filas.
+
+    Args:
+        file_path (str): Ruta del archivo .xlsx
+        chunk_size (int): Filas por bloque
+
+    Returns:
+        list: Un dtype por columna del encabezado
+    """
+    rows = _sheet_rows(file_path)
+    width = len(next(rows))
+    kinds = [set() for _ in range(width)]
+    has_null = [False] * width
+    all_str = [True] * width
+    for batch in _row_batches(rows, chunk_size):
+        parsed = _parse_rows(batch)
+        for pos in range(width):
+            column = parsed[pos]
+            nulls = column.isna()
+            if nulls.any():
+                has_null[pos] = True
+            if not nulls.all():
+                kinds[pos].add(column.dtype)
+                if all_str[pos]:
+                    all_str[pos] = all(
+                        isinstance(values[pos], str) for values, null in zip(batch, nulls) if not null
+                    )
+    return [_merge_dtypes(*info) for info in zip(kinds, has_null, all_str)]
+
+
+def row_digest(values):
+    """
+    Huella de una fila para descartar filas repetidas entre bloques.
+
+    Es un blake2b de 16 bytes sobre el repr de los valores: dos filas
+    distintas no comparten huella en la práctica (a diferencia de hash(),
+    de 64 bits), así que no se pierde ninguna fila del horario. Quien
+    recuerda las huellas ya vistas usa 16 bytes por fila distinta, por lo
+    que esa memoria sí crece con el archivo.
+
+    Args:
+        values (tuple): Valores de la fila (de un bloque de iter_workbook_chunks)
+
+    Returns:
+        bytes: Huella de la fila
+    """
+    return hashlib.blake2b(repr(values).encode("utf-8"), digest_size=16).digest()
+
+
+def drop_seen_rows(df, seen):
+    """
+    Descarta las filas de un bloque idénticas a una ya vista (en este u
+    otro bloque anterior). Aplicado bloque a bloque equivale a
+    drop_duplicates sobre el archivo completo.
+
+    Args:
+        df (DataFrame): Bloque de iter_workbook_chunks
+        seen (set): Huellas ya vistas (row_digest); se modifica
+
+    Returns:
+        DataFrame: Filas del bloque que no se habían visto
+    """
+    keep = []
+    for values in df.itertuples(index=False, name=None):
+        digest = row_digest(values)
+        keep.append(digest not in seen)
+        seen.add(digest)
+    return df[keep]
+
+
+def iter_workbook_chunks(file_path, normalize, chunk_size=STREAM_CHUNK_ROWS, unique_rows=False):
+    """
+    Recorre la primera hoja de un Excel en bloques de filas.
+
+    El archivo se lee dos veces: la primera pasada decide el tipo de cada
+    columna (ver column_dtypes) y la segunda entrega los bloques con esos
+    tipos. Así cada bloque tiene los mismos tipos y valores que las mismas
+    filas de pd.read_excel sobre el archivo completo (102.0 en una columna
+    numérica con vacíos, NaT en una fecha vacía), y el resultado no depende
+    de si el archivo se leyó por bloques o completo.
+
+    Args:
+        file_path (str): Ruta del archivo .xlsx
+        normalize (callable): Función que normaliza las columnas de un DataFrame
+            (normalize_columns o normalize_groups_columns). Se aplica una sola vez
+            sobre los encabezados.
+        chunk_size (int): Filas por bloque
+        unique_rows (bool): Si es True, descarta filas idénticas a una ya leída
+            (equivalente a drop_duplicates sobre el archivo completo). Guarda
+            la huella de cada fila distinta (ver row_digest), así que la
+            memoria crece con la cantidad de filas distintas.
+
+    Yields:
+        DataFrame: Bloque de filas con columnas normalizadas. Siempre se entrega
+            al menos un bloque (vacío si la hoja no tiene datos).
+    """
+    dtypes = column_dtypes(file_path, chunk_size)
+    # Las columnas que no son numéricas se leen sin inferir (un "101" de una
+    # columna de texto sigue siendo texto) y se convierten a su tipo final
+    raw_columns = [pos for pos, dtype in enumerate(dtypes) if dtype.kind not in "biuf"]
+
+    rows = _sheet_rows(file_path)
+    names = _header_names(next(rows))
+    columns = normalize(pd.DataFrame(columns=names)).columns
+
+    seen_rows = set()
+    start = 0
+    emitted = False
+    for batch in _row_batches(rows, chunk_size):
+        chunk = _parse_rows(batch, raw_columns)
+        chunk.index = pd.RangeIndex(start, start + len(batch))
+        start += len(batch)
+        for pos, dtype in enumerate(dtypes):
+            if chunk[pos].dtype != dtype:
+                chunk[pos] = chunk[pos].astype(dtype)
+        chunk.columns = columns
+        if unique_rows:
+            chunk = drop_seen_rows(chunk, seen_rows)
+        yield chunk
+        emitted = True
+
+    if not emitted:
+        yield pd.DataFrame(columns=columns, dtype=object)
@@ -0,0 +1,139 @@
+"""
+Exportación en Streaming (CSV y XLSX)
+=====================================
+
+Convierte filas (dicts) en un archivo CSV o XLSX que se envía por partes
+(respuesta HTTP chunked), sin armar antes un DataFrame ni el archivo
+completo en memoria:
+
+- CSV: se escribe de a EXPORT_BATCH_ROWS filas y cada bloque se envía
+  apenas está listo, así que los primeros bytes salen de inmediato.
+- XLSX: openpyxl en modo write-only escribe cada fila en un archivo
+  temporal en disco; al terminar, el libro (un ZIP) se arma en otro
+  archivo temporal que se envía de a EXPORT_CHUNK_BYTES. El formato ZIP
+  necesita el contenido completo antes de su índice final, por lo que el
+  envío empieza cuando la hoja está escrita, pero la memoria se mantiene
+  constante.
+
+Las celdas con listas (carreras, NRCs, bloques...) se unen con ", ".
+
+Las rutas de exportación están en rooms.py (/export/...).
+"""
+
+import csv
+import io
+import json
+import tempfile
+
+from flask import Response, stream_with_context
+from openpyxl import Workbook
+
+EXPORT_FORMATS = ("csv", "xlsx")
+EXPORT_BATCH_ROWS = 1000  # Filas por bloque enviado (CSV)
+EXPORT_CHUNK_BYTES = 64 * 1024  # Tamaño de cada bloque enviado (XLSX)
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def cell_value(value):
+    """
+    Valor de una celda: los escalares van tal cual (None como vacío), las
+    listas se unen con ", " (una lista dentro de otra, con espacios) y los
+    dicts se envían como JSON.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(
+            " ".join(str(v) for v in item) if isinstance(item, (list, tuple)) else str(cell_value(item))
+            for item in value
+        )
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def row_columns(rows):
+    """Columnas de una lista de dicts, en el orden en que aparecen."""
+    columns = {}
+    for row in rows:
+        for field in row:
+            columns.setdefault(field, None)
+    return list(columns)
+
+
+def iter_csv(columns, rows):
+    """
+    Genera un CSV (UTF-8 con BOM, para que Excel reconozca los acentos).
+
+    Args:
+        columns (list): Encabezados (llaves de cada fila)
+        rows (iterable): Filas (dicts); las llaves que falten quedan vacías
+
+    Yields:
+        bytes: Bloques del archivo
+    """
+    buffer = io.StringIO()
+    out = csv.writer(buffer)
+    out.writerow(columns)
+    pending = 0
+    yield "\ufeff".encode("utf-8")
+    for row in rows:
+        out.writerow([cell_value(row.get(column)) for column in columns])
+        pending += 1
+        if pending == EXPORT_BATCH_ROWS:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_xlsx(columns, rows, sheet="Datos"):
+    """
+    Genera un libro XLSX con openpyxl en modo write-only.
+
+    Args:
+        columns (list): Encabezados (llaves de cada fila)
+        rows (iterable): Filas (dicts)
+        sheet (str): Nombre de la hoja
+
+    Yields:
+        bytes: Bloques del archivo
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet[:31])
+    worksheet.append(columns)
+    for row in rows:
+        worksheet.append([cell_value(row.get(column)) for column in columns])
+    with tempfile.TemporaryFile() as archive:
+        workbook.save(archive)
+        archive.seek(0)
+        while True:
+            chunk = archive.read(EXPORT_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_response(columns, rows, filename, fmt="csv"):
+    """
+    Respuesta HTTP que envía las filas por partes como archivo adjunto.
+
+    Args:
+        columns (list): Encabezados
+        rows (iterable): Filas (dicts); se recorren mientras se envía
+        filename (str): Nombre del archivo, sin extensión
+        fmt (str): "csv" o "xlsx"
+
+    Returns:
+        Response: Respuesta en streaming (Transfer-Encoding: chunked)
+    """
+    if fmt == "xlsx":
+        body, media_type = iter_xlsx(columns, rows, filename), XLSX_MEDIA_TYPE
+    else:
+        body, media_type = iter_csv(columns, rows), "text/csv; charset=utf-8"
+    return Response(
+        stream_with_context(body),
+        content_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
@@ -34,6 +34,8 @@ Ver README.md sección "Limitaciones Actuales" para detalles completos.
 
 Endpoint:
 - POST /groups/upload: Procesa archivo Excel de nuevo ingreso
+  (?format=columnar para la respuesta compacta, ver wire_format;
+  ?async=1 para procesarlo en segundo plano, ver /jobs/<id>)
 """
 
 import os
@@ -41,11 +43,19 @@ from flask import Blueprint, request, jsonify, current_app
 import pandas as pd
 import math
 
+from blueprints.excel_stream import iter_workbook_chunks, should_stream
+from blueprints.jobs import discard_uploads, ignore_progress, run_now, save_uploads, submit_job
+from blueprints.module_grid import module_for_start, normalize_time_format
+from blueprints.wire_format import encode_columnar, wants_columnar
+
 # ===================================
 # INICIALIZACIÓN DEL BLUEPRINT
 # ===================================
 groups_bp = Blueprint("groups", __name__)
 
+# Etapas que reporta process_groups_file en las cargas en segundo plano (/jobs)
+GROUPS_UPLOAD_STAGES = ("read", "normalize", "expand")
+
 
 # ===================================
 # FUNCIONES DE NORMALIZACIÓN DE DATOS
@@ -138,74 +148,6 @@ def normalize_groups_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def normalize_time_format(time_str: str) -> str:
-    """
-    Normaliza el formato de hora a HH:MM.
-    
-    Maneja diferentes formatos comunes del Excel:
-    - "800" o "8:00" -> "08:00"
-    - "1430" -> "14:30"
-    - "9:30" -> "09:30"
-    
-    Args:
-        time_str (str): Cadena con la hora en cualquier formato
-        
-    Returns:
-        str: Hora en formato HH:MM o cadena vacía si inválido
-    """
-    time_str = str(time_str).strip().replace(".0", "")
-    if not time_str or time_str.lower() == "nan":
-        return ""
-    if ":" in time_str:
-        return time_str
-    if len(time_str) == 3:
-        return f"0{time_str[0]}:{time_str[1:3]}"
-    elif len(time_str) == 4:
-        return f"{time_str[0:2]}:{time_str[2:4]}"
-    return time_str
-
-
-def get_module_from_time(time_str: str) -> int:
-    """
-    Determina el número de módulo académico según la hora de inicio.
-    
-    Módulos académicos:
-    - M1: 08:00
-    - M2: 09:30
-    - M3: 11:00
-    - M4: 12:30
-    - M5: 14:00
-    - M6: 15:30
-    - M7: 17:00
-    - M8: 18:30
-    
-    Args:
-        time_str (str): Hora de inicio (ej: "08:00")
-        
-    Returns:
-        int: Número de módulo (1-8) o 0 si no coincide con ningún módulo
-    """
-    time_str = normalize_time_format(time_str)
-    if time_str.startswith("08:00") or time_str.startswith("8:00"):
-        return 1
-    elif time_str.startswith("09:30") or time_str.startswith("9:30"):
-        return 2
-    elif time_str.startswith("11:00"):
-        return 3
-    elif time_str.startswith("12:30"):
-        return 4
-    elif time_str.startswith("14:00"):
-        return 5
-    elif time_str.startswith("15:30"):
-        return 6
-    elif time_str.startswith("17:00"):
-        return 7
-    elif time_str.startswith("18:30"):
-        return 8
-    else:
-        return 0
-
-
 def parse_groups_row(row: pd.Series):
     entries = []
     days = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado"]
@@ -225,7 +167,7 @@ def parse_groups_row(row: pd.Series):
     inicio = normalize_time_format(inicio_raw)
     fin = normalize_time_format(fin_raw)
     horario_texto = f"{inicio} - {fin}" if inicio or fin else ""
-    modulo = get_module_from_time(inicio)
+    modulo = module_for_start(inicio)
 
     # Datos Generales
     nombre_asignatura = str(row.get("nombre_asignatura", "Sin Nombre")).strip()
@@ -300,17 +242,41 @@ def parse_groups_row(row: pd.Series):
     return entries
 
 
-def process_groups_file(file_path: str):
+def process_groups_file(file_path: str, streaming=None, progress=ignore_progress):
+    """
+    Procesa el Excel de nuevo ingreso y expande cada fila a sus días de clase.
+
+    Args:
+        file_path (str): Ruta del archivo Excel
+        streaming (bool | None): Leer el archivo por bloques con memoria acotada.
+            None decide según el tamaño del archivo (ver excel_stream.should_stream).
+        progress (callable): Recibe el nombre de cada etapa de
+            GROUPS_UPLOAD_STAGES al comenzarla (ver jobs.submit_job)
+
+    Returns:
+        tuple: ({"schedule_ni": [...]}, None) o (None, mensaje_error)
+    """
     try:
-        df = pd.read_excel(file_path)
-        df = normalize_groups_columns(df)
+        if streaming is None:
+            streaming = should_stream(file_path)
 
-        if "nrc" in df.columns:
-            df = df.dropna(subset=["nrc"])
+        progress("read")
+        if streaming:
+            chunks = iter_workbook_chunks(file_path, normalize_groups_columns)
+        else:
+            raw = pd.read_excel(file_path)
+            progress("normalize")
+            chunks = [normalize_groups_columns(raw)]
 
         schedule_entries = []
-        for _, row in df.iterrows():
-            schedule_entries.extend(parse_groups_row(row))
+        for df in chunks:
+            progress("normalize")
+            if "nrc" in df.columns:
+                df = df.dropna(subset=["nrc"])
+
+            progress("expand")
+            for _, row in df.iterrows():
+                schedule_entries.extend(parse_groups_row(row))
 
         return {"schedule_ni": schedule_entries}, None
     except Exception as e:
@@ -329,12 +295,33 @@ def groups_upload():
     try:
         upload_folder = current_app.config.get("UPLOAD_FOLDER", "uploads")
         os.makedirs(upload_folder, exist_ok=True)
-        filepath = os.path.join(upload_folder, file.filename)
-        file.save(filepath)
+        # Carpeta propia de la carga (ver jobs.save_uploads)
+        upload_dir, (filepath,) = save_uploads([file], upload_folder)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        data, error = process_groups_file(filepath)
+    columnar = wants_columnar(request)
+
+    def compute(progress):
+        data, error = process_groups_file(filepath, progress=progress)
         if error:
-            return jsonify({"error": error}), 500
-        return jsonify({"success": True, "data": data})
+            raise ValueError(error)
+        return data
+
+    def commit(data):
+        if columnar:
+            data["schedule_ni"] = encode_columnar(data["schedule_ni"])
+        return data
+
+    def cleanup():
+        discard_uploads(upload_dir)
+
+    # Modo asíncrono: responder de inmediato con el ID del trabajo (ver /jobs/<id>)
+    if request.args.get("async") == "1":
+        job_id = submit_job("groups", GROUPS_UPLOAD_STAGES, compute, commit, cleanup)
+        return jsonify({"success": True, "job_id": job_id}), 202
+
+    try:
+        return jsonify({"success": True, "data": run_now("groups", compute, commit, cleanup)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,301 @@
+"""
+Trabajos en Segundo Plano para la Carga de Archivos
+====================================================
+
+Procesar un Excel grande toma varios segundos. En vez de bloquear la
+solicitud, /upload?async=1 y /groups/upload?async=1 guardan el archivo,
+crean un trabajo y responden de inmediato con su ID; un grupo de hilos
+ejecuta el procesamiento y el navegador consulta el avance en /jobs/<id>.
+
+Cada trabajo tiene dos partes:
+- compute(progress): el trabajo pesado (leer, normalizar, expandir...).
+  Llama a progress(etapa) al comenzar cada etapa.
+- commit(valor): aplica el resultado al estado de la aplicación y retorna
+  los datos que recibe el cliente. Se ejecuta con _commit_lock (el
+  WRITE_LOCK de state.py) tomado.
+
+En modo multiproceso (ver state.py) el estado de cada trabajo se copia en
+la base para que /jobs/<id> responda desde cualquier proceso, y una carga
+nueva cancela también los trabajos del mismo tipo de los demás procesos.
+
+Cuando llega una carga nueva del mismo tipo, los trabajos anteriores que
+no han terminado se cancelan: su siguiente llamada a progress lanza
+JobCancelled y, si ya terminaron de calcular, no llegan a ejecutar commit.
+Así un archivo viejo nunca reemplaza a uno más nuevo.
+
+Cada carga guarda sus archivos en una carpeta propia (save_uploads), así
+que dos cargas con el mismo nombre de archivo no se pisan mientras un
+trabajo todavía lee el suyo; la carpeta se borra al terminar (cleanup).
+
+Endpoint:
+- GET /jobs/<job_id>: Estado, etapa actual y resultado del trabajo
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, current_app, jsonify
+
+from blueprints import state, storage
+
+# ===================================
+# INICIALIZACIÓN DEL BLUEPRINT
+# ===================================
+jobs_bp = Blueprint("jobs", __name__)
+
+# ===================================
+# CONFIGURACIÓN Y ESTADO
+# ===================================
+JOB_WORKERS = 2  # Hilos que procesan cargas en paralelo
+FINISHED_JOBS_KEPT = 20  # Trabajos terminados que se pueden seguir consultando
+
+JOBS = {}  # id -> trabajo (dict, ver submit_job)
+_jobs_lock = threading.Lock()  # Protege JOBS y el estado de cada trabajo
+_commit_lock = state.WRITE_LOCK  # Serializa los commit y las cancelaciones con el resto de los escritores
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="yonapp-job")
+
+FINISHED_STATUSES = ("done", "error", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Se lanza dentro de un trabajo cancelado por una carga más reciente."""
+
+
+def ignore_progress(stage):
+    """Callback de progreso para los procesamientos que no corren como trabajo."""
+
+
+def save_uploads(files, upload_folder):
+    """
+    Guarda los archivos de una carga en una carpeta nueva dentro de upload_folder.
+
+    Args:
+        files (list): Archivos de request.files
+        upload_folder (str): Carpeta de cargas de la app
+
+    Returns:
+        tuple: (carpeta, rutas de los archivos en el orden de files). La
+        carpeta se borra con discard_uploads.
+    """
+    folder = tempfile.mkdtemp(prefix="upload_", dir=upload_folder)
+    paths = []
+    for position, file in enumerate(files):
+        path = os.path.join(folder, f"{position}_{os.path.basename(file.filename)}")
+        file.save(path)
+        paths.append(path)
+    return folder, paths
+
+
+def discard_uploads(folder):
+    """Borra la carpeta de una carga (ver save_uploads)."""
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+def submit_job(kind, stages, compute, commit, cleanup=None):
+    """
+    Crea un trabajo y lo encola en el grupo de hilos.
+
+    Cancela los trabajos pendientes del mismo tipo.
+
+    Args:
+        kind (str): Tipo de carga ("rooms", "groups"...)
+        stages (tuple): Etapas que reporta compute, en orden
+        compute (callable): compute(progress) -> valor
+        commit (callable): commit(valor) -> datos para el cliente (dict)
+        cleanup (callable | None): cleanup() se llama al terminar el
+            trabajo, con o sin error (ej: borrar los archivos de la carga)
+
+    Returns:
+        str: ID del trabajo
+    """
+    app = current_app._get_current_object()
+    job = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": "queued",
+        "stages": list(stages),
+        "stage": None,
+        "result": None,
+        "error": None,
+        "created": time.time(),
+        "finished": None,
+        "_cancel": threading.Event(),
+    }
+    with _commit_lock, _jobs_lock:
+        _cancel_pending(kind, job["id"])
+        JOBS[job["id"]] = job
+        _prune_finished_jobs()
+    _share(job)
+
+    _executor.submit(_run_job, app, job, compute, commit, cleanup)
+    return job["id"]
+
+
+def run_now(kind, compute, commit, cleanup=None):
+    """
+    Procesa una carga dentro de la solicitud actual (sin trabajo).
+
+    También cancela los trabajos pendientes del mismo tipo, para que no
+    reemplacen después a esta carga.
+
+    Returns:
+        dict: Resultado de commit
+    """
+    try:
+        with _commit_lock, _jobs_lock:
+            _cancel_pending(kind, uuid.uuid4().hex)
+        value = compute(ignore_progress)
+        with _commit_lock, state.writer():
+            return commit(value)
+    finally:
+        if cleanup is not None:
+            cleanup()
+
+
+def _cancel_pending(kind, latest_id):
+    """
+    Cancela los trabajos sin terminar de un tipo (llamar con ambos locks tomados).
+
+    En modo multiproceso registra además en la base la carga más reciente
+    del tipo: los trabajos de otros procesos se cancelan al notarlo (ver
+    _is_cancelled).
+    """
+    for other in JOBS.values():
+        if other["kind"] == kind and other["status"] not in FINISHED_STATUSES:
+            other["_cancel"].set()
+    if state.SHARED_STATE:
+        storage.save_state(f"latest_job:{kind}", latest_id)
+
+
+def _is_cancelled(job):
+    """True si una carga más reciente (de este u otro proceso) reemplazó al trabajo."""
+    cancel = job["_cancel"]
+    if not cancel.is_set() and state.SHARED_STATE:
+        if storage.load_state(f"latest_job:{job['kind']}") != job["id"]:
+            cancel.set()
+    return cancel.is_set()
+
+
+def _prune_finished_jobs():
+    """Descarta los trabajos terminados más antiguos (llamar con _jobs_lock tomado)."""
+    finished = [j for j in JOBS.values() if j["status"] in FINISHED_STATUSES]
+    finished.sort(key=lambda j: j["finished"])
+    old_jobs = finished[: max(len(finished) - FINISHED_JOBS_KEPT, 0)]
+    for old in old_jobs:
+        del JOBS[old["id"]]
+    if state.SHARED_STATE and old_jobs:
+        storage.delete_state([f"job:{old['id']}" for old in old_jobs])
+
+
+def _share(job):
+    """
+    Copia la representación pública del trabajo en la base (modo multiproceso),
+    para que /jobs/<id> responda desde cualquier proceso.
+    """
+    if state.SHARED_STATE:
+        storage.save_state(f"job:{job['id']}", job_view(job))
+
+
+def _set_status(job, status, **fields):
+    """Actualiza el estado de un trabajo."""
+    with _jobs_lock:
+        job["status"] = status
+        job.update(fields)
+        if status in FINISHED_STATUSES:
+            job["finished"] = time.time()
+    _share(job)
+
+
+def _run_job(app, job, compute, commit, cleanup=None):
+    """Ejecuta un trabajo dentro del contexto de la aplicación."""
+    cancel = job["_cancel"]
+
+    def progress(stage):
+        if _is_cancelled(job):
+            raise JobCancelled(job["id"])
+        with _jobs_lock:
+            # Con lectura por bloques las etapas se repiten: solo se avanza
+            current = job["stages"].index(job["stage"]) if job["stage"] else -1
+            advanced = job["stages"].index(stage) > current
+            if advanced:
+                job["stage"] = stage
+        if advanced:
+            _share(job)
+
+    with app.app_context():
+        try:
+            if _is_cancelled(job):
+                raise JobCancelled(job["id"])
+            _set_status(job, "running")
+            value = compute(progress)
+            # writer(): en modo multiproceso la verificación y el commit van
+            # dentro del lock entre procesos
+            with _commit_lock, state.writer():
+                if _is_cancelled(job):
+                    raise JobCancelled(job["id"])
+                result = commit(value)
+            _set_status(job, "done", result=result)
+        except Exception as e:
+            # compute puede convertir JobCancelled en un error propio
+            if cancel.is_set():
+                _set_status(job, "cancelled", error="Reemplazado por una carga más reciente")
+            else:
+                app.logger.error("Error en el trabajo %s: %s", job["id"], e)
+                _set_status(job, "error", error=str(e))
+        finally:
+            if cleanup is not None:
+                cleanup()
+
+
+def job_view(job):
+    """
+    Representación pública de un trabajo.
+
+    Returns:
+        dict: Estado, etapa actual, avance (0-100), resultado y error
+    """
+    with _jobs_lock:
+        stages = job["stages"]
+        if job["status"] == "done":
+            percent = 100
+        elif job["stage"]:
+            percent = round(100 * stages.index(job["stage"]) / len(stages))
+        else:
+            percent = 0
+        return {
+            "id": job["id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "stage": job["stage"],
+            "stages": stages,
+            "progress": percent,
+            "result": job["result"],
+            "error": job["error"],
+        }
+
+
+# ===================================
+# RUTAS
+# ===================================
+
+@jobs_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """
+    Consulta el avance de un trabajo de carga.
+
+    Returns:
+        JSON: {"success": true, "job": {...}} o error 404 si no existe
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        # En modo multiproceso el trabajo pudo quedar en otro proceso
+        shared = storage.load_state(f"job:{job_id}") if state.SHARED_STATE else None
+        if shared is None:
+            return jsonify({"success": False, "error": "Trabajo no encontrado"}), 404
+        return jsonify({"success": True, "job": shared})
+    return jsonify({"success": True, "job": job_view(job)})
@@ -0,0 +1,243 @@
+"""
+Grilla de Módulos Académicos
+============================
+
+Define en un solo lugar los 8 módulos de 80 minutos de la institución y
+resuelve a qué módulo(s) corresponde un horario del Excel. La usan
+rooms.py (expansión del horario), groups.py (bloques de primer año) y el
+frontend (GET /module_grid).
+
+La resolución es por tablas: al importar el módulo se precalcula, para cada
+minuto del día, el módulo en que cae una clase que comienza a esa hora.
+Los valores crudos del Excel ("800", "08:00", "8:00:00", 800.0...) se
+convierten a minutos una sola vez por valor distinto gracias a lru_cache.
+
+Reglas:
+- Módulo simple: una clase pertenece al módulo cuyo inicio es el último
+  anterior a su hora de inicio, y hasta START_WINDOW_MARGIN minutos antes
+  del inicio del siguiente módulo (el último módulo acepta inicios hasta
+  LAST_START_LIMIT).
+- Módulo doble: si la clase comienza exactamente al inicio de uno de los
+  pares de DOUBLE_MODULES y termina al cabo de la duración de ambos módulos
+  (± DOUBLE_END_TOLERANCE minutos), ocupa los dos.
+
+Endpoint:
+- GET /module_grid: Módulos, ventanas de inicio y módulos dobles
+"""
+
+from functools import lru_cache
+
+from flask import Blueprint, jsonify
+
+# ===================================
+# INICIALIZACIÓN DEL BLUEPRINT
+# ===================================
+module_grid_bp = Blueprint("module_grid", __name__)
+
+# ===================================
+# CONFIGURACIÓN DE LA GRILLA
+# ===================================
+MODULE_GRID = [
+    {"modulo": 1, "inicio": "08:00", "fin": "09:20"},
+    {"modulo": 2, "inicio": "09:30", "fin": "10:50"},
+    {"modulo": 3, "inicio": "11:00", "fin": "12:20"},
+    {"modulo": 4, "inicio": "12:30", "fin": "13:50"},
+    {"modulo": 5, "inicio": "14:00", "fin": "15:20"},
+    {"modulo": 6, "inicio": "15:30", "fin": "16:50"},
+    {"modulo": 7, "inicio": "17:00", "fin": "18:20"},
+    {"modulo": 8, "inicio": "18:30", "fin": "19:50"},
+]
+START_WINDOW_MARGIN = 5  # Minutos antes del siguiente módulo en que se cierra la ventana
+LAST_START_LIMIT = "20:00"  # Último inicio aceptado para el último módulo
+DOUBLE_MODULES = ((1, 2), (2, 3), (3, 4), (5, 6), (7, 8))  # Pares que se dictan seguidos
+DOUBLE_END_TOLERANCE = 5  # Minutos de tolerancia en el término de un módulo doble
+
+MINUTES_PER_DAY = 24 * 60
+MEMO_SIZE = 4096  # Valores crudos distintos que se recuerdan
+
+
+def _minutes(hhmm):
+    """Convierte "HH:MM" en minutos desde la medianoche."""
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _build_start_lookup():
+    """
+    Arreglo de MINUTES_PER_DAY posiciones: módulo de una clase que comienza
+    en ese minuto (0 si no pertenece a ninguno).
+    """
+    lookup = [0] * MINUTES_PER_DAY
+    for pos, module in enumerate(MODULE_GRID):
+        first = _minutes(module["inicio"])
+        if pos + 1 < len(MODULE_GRID):
+            last = _minutes(MODULE_GRID[pos + 1]["inicio"]) - START_WINDOW_MARGIN
+        else:
+            last = _minutes(LAST_START_LIMIT)
+        for minute in range(first, min(last, MINUTES_PER_DAY - 1) + 1):
+            lookup[minute] = module["modulo"]
+    return lookup
+
+
+def _build_double_lookup():
+    """
+    Arreglo de MINUTES_PER_DAY posiciones: para los minutos en que comienza
+    un módulo doble, (término esperado, módulos); None en el resto.
+    """
+    by_number = {module["modulo"]: module for module in MODULE_GRID}
+    lookup = [None] * MINUTES_PER_DAY
+    for first, second in DOUBLE_MODULES:
+        start = _minutes(by_number[first]["inicio"])
+        duration = sum(
+            _minutes(by_number[m]["fin"]) - _minutes(by_number[m]["inicio"]) for m in (first, second)
+        )
+        lookup[start] = (start + duration, (first, second))
+    return lookup
+
+
+START_LOOKUP = _build_start_lookup()
+DOUBLE_LOOKUP = _build_double_lookup()
+
+
+# ===================================
+# RESOLUCIÓN DE HORARIOS
+# ===================================
+
+@lru_cache(maxsize=MEMO_SIZE)
+def parse_minutes(raw):
+    """
+    Convierte una hora del Excel en minutos desde la medianoche.
+
+    Acepta "800", "0800", "08:00", "8:00:00", "800.0", etc. (se toman los
+    primeros 4 dígitos como HHMM).
+
+    Args:
+        raw (str): Valor crudo de la celda
+
+    Returns:
+        int | None: Minutos, o None si el valor no es una hora válida
+    """
+    digits = str(raw).strip().replace(".0", "").replace(":", "")[:4]
+    try:
+        value = int(digits)
+    except ValueError:
+        return None
+    hours, minutes = divmod(value, 100)
+    if value < 0 or hours >= 24 or minutes >= 60:
+        return None
+    return hours * 60 + minutes
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def resolve_modules(start_raw, end_raw):
+    """
+    Módulos que ocupa una clase según sus horas de inicio y término.
+
+    Args:
+        start_raw (str): Hora de inicio tal como viene del Excel
+        end_raw (str): Hora de término tal como viene del Excel
+
+    Returns:
+        tuple: Números de módulo (ej: (1, 2)), vacío si no se puede determinar
+    """
+    start = parse_minutes(start_raw)
+    end = parse_minutes(end_raw)
+    if start is None or end is None:
+        return ()
+    double = DOUBLE_LOOKUP[start]
+    if double is not None and abs(end - double[0]) <= DOUBLE_END_TOLERANCE:
+        return double[1]
+    module = START_LOOKUP[start]
+    return (module,) if module else ()
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def module_for_start(start_raw):
+    """
+    Módulo en que comienza una clase (sin mirar la hora de término).
+
+    Returns:
+        int: Número de módulo (1-8) o 0 si no coincide con ningún módulo
+    """
+    start = parse_minutes(start_raw)
+    return START_LOOKUP[start] if start is not None else 0
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def normalize_time_format(time_str):
+    """
+    Normaliza el formato de hora a HH:MM.
+
+    Maneja diferentes formatos comunes del Excel:
+    - "800" o "8:00" -> "08:00"
+    - "1430" -> "14:30"
+    - "9:30" -> "09:30"
+
+    Args:
+        time_str (str): Cadena con la hora en cualquier formato
+
+    Returns:
+        str: Hora en formato HH:MM o cadena vacía si inválido
+    """
+    time_str = str(time_str).strip().replace(".0", "")
+    if not time_str or time_str.lower() == "nan":
+        return ""
+    if ":" in time_str:
+        return time_str
+    if len(time_str) == 3:
+        return f"0{time_str[0]}:{time_str[1:3]}"
+    elif len(time_str) == 4:
+        return f"{time_str[0:2]}:{time_str[2:4]}"
+    return time_str
+
+
+def module_minutes():
+    """Duración en minutos de cada módulo, en orden."""
+    return [_minutes(module["fin"]) - _minutes(module["inicio"]) for module in MODULE_GRID]
+
+
+def module_labels():
+    """Rótulos "HH:MM - HH:MM" de cada módulo, en orden."""
+    return [f"{module['inicio']} - {module['fin']}" for module in MODULE_GRID]
+
+
+# ===================================
+# RUTAS
+# ===================================
+
+@module_grid_bp.route("/module_grid", methods=["GET"])
+def get_module_grid():
+    """
+    Expone la grilla de módulos al frontend.
+
+    Returns:
+        JSON: {
+            "success": true,
+            "modules": [{"modulo", "inicio", "fin", "label"}],
+            "start_windows": [{"modulo", "desde", "hasta"}] (minutos del día),
+            "double_modules": [{"modulos": [a, b], "inicio", "fin"}] (minutos del día),
+            "double_end_tolerance": minutos
+        }
+    """
+    windows = []
+    for minute, module in enumerate(START_LOOKUP):
+        if not module:
+            continue
+        if windows and windows[-1]["modulo"] == module and windows[-1]["hasta"] == minute - 1:
+            windows[-1]["hasta"] = minute
+        else:
+            windows.append({"modulo": module, "desde": minute, "hasta": minute})
+
+    doubles = [
+        {"modulos": list(double[1]), "inicio": minute, "fin": double[0]}
+        for minute, double in enumerate(DOUBLE_LOOKUP)
+        if double is not None
+    ]
+    modules = [dict(module, label=label) for module, label in zip(MODULE_GRID, module_labels())]
+    return jsonify({
+        "success": True,
+        "modules": modules,
+        "start_windows": windows,
+        "double_modules": doubles,
+        "double_end_tolerance": DOUBLE_END_TOLERANCE,
+    })
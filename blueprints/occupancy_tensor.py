@@ -0,0 +1,155 @@
+"""
+Tensor de Ocupación para Estadísticas Agregadas
+===============================================
+
+Representa la ocupación semanal de todas las salas como un arreglo NumPy
+de forma (salas, días, módulos) con 1 en los bloques ocupados. Se arma a
+partir de los mapas de bits de ROOM_BITMAPS (ver rooms.py) y permite
+responder las estadísticas del monitor de ocupación con reducciones
+vectorizadas en vez de recorrer el horario:
+
+- Mapa de calor del campus por día y módulo
+- Uso por categoría o por edificio (prefijo del código de sala: A, P, PS, I...)
+- Horas-asiento ponderadas por la capacidad de cada sala
+- Percentiles de ocupación y ranking de salas
+
+Las funciones de este módulo son puras: reciben el tensor y los arreglos
+por sala (capacidad, etiquetas) y retornan estructuras listas para JSON.
+"""
+
+import re
+
+import numpy as np
+
+from blueprints.module_grid import module_minutes
+
+# Horas de clase de cada módulo (según la grilla de module_grid)
+MODULE_HOURS = np.array(module_minutes()) / 60
+
+_BUILDING_PATTERN = re.compile(r"[A-Za-z]+")
+
+
+def bitmaps_to_tensor(bitmaps, days, modules):
+    """
+    Convierte los mapas de bits semanales de varias salas en un tensor.
+
+    Args:
+        bitmaps (list): Un entero por sala (bit = día * modules + módulo - 1)
+        days (int): Días de la semana
+        modules (int): Módulos por día
+
+    Returns:
+        ndarray: Arreglo bool de forma (salas, days, modules)
+    """
+    bits = np.fromiter(bitmaps, dtype=np.uint64, count=len(bitmaps))
+    shifts = np.arange(days * modules, dtype=np.uint64)
+    flat = (bits[:, None] >> shifts) & np.uint64(1)
+    return flat.astype(bool).reshape(len(bitmaps), days, modules)
+
+
+def building_of(sala):
+    """
+    Edificio de una sala según el prefijo alfabético de su código.
+
+    Ejemplos: "A302B" -> "A", "PS101" -> "PS", "I105-B" -> "I"
+    """
+    match = _BUILDING_PATTERN.match(sala)
+    return match.group().upper() if match else "Otro"
+
+
+def seat_hours(tensor, capacities):
+    """
+    Horas-asiento ocupadas por sala, día y módulo.
+
+    Returns:
+        ndarray: Arreglo float de forma (salas, días, módulos)
+    """
+    return tensor * capacities[:, None, None] * MODULE_HOURS[None, None, : tensor.shape[2]]
+
+
+def heatmap(tensor, capacities):
+    """
+    Mapa de calor del campus por día y módulo.
+
+    Args:
+        tensor (ndarray): Ocupación (salas, días, módulos)
+        capacities (ndarray): Capacidad de cada sala
+
+    Returns:
+        dict: Salas ocupadas, porcentaje del total de salas y horas-asiento
+        ocupadas en cada bloque (listas [día][módulo])
+    """
+    rooms = tensor.shape[0]
+    occupied = tensor.sum(axis=0)
+    ratio = occupied * 100 / rooms if rooms else np.zeros(occupied.shape)
+    return {
+        "salas": rooms,
+        "ocupadas": occupied.tolist(),
+        "porcentaje": np.round(ratio, 1).tolist(),
+        "horas_asiento": np.round(seat_hours(tensor, capacities).sum(axis=0), 1).tolist(),
+    }
+
+
+def utilization_by(tensor, capacities, labels):
+    """
+    Uso agregado por grupo de salas (categoría, edificio...).
+
+    Args:
+        tensor (ndarray): Ocupación (salas, días, módulos)
+        capacities (ndarray): Capacidad de cada sala
+        labels (list): Grupo de cada sala
+
+    Returns:
+        list: Un dict por grupo con salas, bloques ocupados, porcentaje de
+        uso y horas-asiento ocupadas/disponibles, de mayor a menor uso
+    """
+    groups, codes = np.unique(np.asarray(labels, dtype=object).astype(str), return_inverse=True)
+    blocks_per_room = tensor.shape[1] * tensor.shape[2]
+    room_blocks = tensor.reshape(tensor.shape[0], -1).sum(axis=1)
+    room_seat_hours = seat_hours(tensor, capacities).reshape(tensor.shape[0], -1).sum(axis=1)
+    room_capacity_hours = capacities * MODULE_HOURS[: tensor.shape[2]].sum() * tensor.shape[1]
+
+    rooms = np.bincount(codes, minlength=len(groups))
+    used = np.bincount(codes, weights=room_blocks, minlength=len(groups))
+    used_seat_hours = np.bincount(codes, weights=room_seat_hours, minlength=len(groups))
+    available_seat_hours = np.bincount(codes, weights=room_capacity_hours, minlength=len(groups))
+
+    result = []
+    for pos, group in enumerate(groups):
+        total = rooms[pos] * blocks_per_room
+        result.append({
+            "grupo": group,
+            "salas": int(rooms[pos]),
+            "ocupados": int(used[pos]),
+            "porcentaje": round(float(used[pos] * 100 / total), 1) if total else 0.0,
+            "horas_asiento": round(float(used_seat_hours[pos]), 1),
+            "horas_asiento_disponibles": round(float(available_seat_hours[pos]), 1),
+            "porcentaje_asientos": (
+                round(float(used_seat_hours[pos] * 100 / available_seat_hours[pos]), 1)
+                if available_seat_hours[pos] else 0.0
+            ),
+        })
+    result.sort(key=lambda r: (-r["porcentaje"], r["grupo"]))
+    return result
+
+
+def percentile_ranking(tensor, quantiles):
+    """
+    Percentiles de bloques ocupados por sala.
+
+    Args:
+        tensor (ndarray): Ocupación (salas, días, módulos)
+        quantiles (list): Percentiles a calcular (0-100)
+
+    Returns:
+        tuple: ({"p50": valor, ...}, percentil de cada sala, bloques por sala).
+        El percentil de una sala es el porcentaje de salas con igual o menor
+        ocupación.
+    """
+    counts = tensor.reshape(tensor.shape[0], -1).sum(axis=1)
+    if not len(counts):
+        return {f"p{q:g}": 0.0 for q in quantiles}, np.zeros(0), counts
+    values = np.percentile(counts, quantiles) if quantiles else []
+    ranks = np.searchsorted(np.sort(counts), counts, side="right") * 100 / len(counts)
+    summary = {f"p{q:g}": round(float(v), 1) for q, v in zip(quantiles, values)}
+    return summary, ranks, counts
@@ -0,0 +1,138 @@
+"""
+Motor de Reportes del Horario
+=============================
+
+Los reportes del módulo de salas (NRC sin sala, asignaturas sin docente,
+salas sobrepasadas, salas desconocidas...) se calculan una sola vez,
+mientras se ingiere el Excel, en vez de volver a leer el libro en cada
+consulta.
+
+Cada reporte se registra con register_report y define tres pasos:
+
+- collect(df, columns): recibe cada DataFrame normalizado que pasa por la
+  ingesta (el archivo completo, cada bloque del modo streaming o cada hoja
+  de la ingesta paralela) y retorna un resultado parcial. `columns` es una
+  caché de columnas ya limpiadas que comparten todos los reportes, de modo
+  que cada columna se limpia una sola vez por DataFrame.
+- merge(parciales): combina los parciales en orden y retorna los "hechos"
+  del reporte (listas y dicts serializables a JSON, que se guardan en la
+  base junto con el horario).
+- finish(hechos, salas): arma las filas que recibe el frontend. Los
+  reportes que dependen de ROOM_DATABASE (uses_rooms=True) se terminan con
+  las salas actuales, así que reflejan los cambios de capacidad sin volver
+  a leer el Excel.
+
+Un reporte puede reutilizar los hechos de otro (facts_from) y definir solo
+finish: por ejemplo, las salas desconocidas y las salas sobrepasadas salen
+de la misma lista de clases por sala.
+
+Agregar un reporte nuevo es registrar sus funciones: la ingesta no cambia y
+no se agrega otro recorrido del libro.
+"""
+
+# nombre -> {"collect", "merge", "finish", "uses_rooms", "facts_from", "description"}
+REPORTS = {}
+
+
+def _concat(partials):
+    """merge por defecto: concatena las listas parciales en orden."""
+    return [row for partial in partials for row in partial]
+
+
+def _identity(facts, rooms):
+    """finish por defecto: los hechos ya son las filas del reporte."""
+    return facts
+
+
+def register_report(name, collect=None, merge=_concat, finish=_identity, uses_rooms=False,
+                    facts_from=None, description=""):
+    """
+    Registra un reporte.
+
+    Args:
+        name (str): Nombre del reporte (se usa en /reports/<name>)
+        collect (callable): collect(df, columns) -> parcial
+        merge (callable): merge([parciales]) -> hechos (JSON)
+        finish (callable): finish(hechos, salas) -> filas
+        uses_rooms (bool): finish depende de ROOM_DATABASE
+        facts_from (str | None): Usar los hechos de otro reporte en vez de
+            collect/merge propios
+        description (str): Descripción para GET /reports
+    """
+    REPORTS[name] = {
+        "collect": collect,
+        "merge": merge,
+        "finish": finish,
+        "uses_rooms": uses_rooms,
+        "facts_from": facts_from,
+        "description": description,
+    }
+
+
+def collect_reports(df, column_cache):
+    """
+    Ejecuta collect de todos los reportes sobre un mismo DataFrame.
+
+    Args:
+        df (DataFrame): Filas normalizadas
+        column_cache (callable): column_cache(df) -> caché de columnas
+            limpias compartida por los reportes
+
+    Returns:
+        dict: {nombre: parcial}
+    """
+    columns = column_cache(df)
+    return {
+        name: report["collect"](df, columns)
+        for name, report in REPORTS.items()
+        if report["collect"] is not None
+    }
+
+
+def merge_reports(partials):
+    """
+    Combina, en orden, los parciales de varios DataFrames.
+
+    Args:
+        partials (list): Resultados de collect_reports
+
+    Returns:
+        dict: {nombre: hechos}
+    """
+    return {
+        name: report["merge"]([partial[name] for partial in partials if name in partial])
+        for name, report in REPORTS.items()
+        if report["collect"] is not None
+    }
+
+
+def facts_complete(facts):
+    """
+    True si hay hechos de todos los reportes registrados.
+
+    Los hechos guardados antes de registrar un reporte nuevo no lo incluyen
+    y hay que volver a calcularlos.
+    """
+    if facts is None:
+        return False
+    return all(name in facts for name, report in REPORTS.items() if report["collect"] is not None)
+
+
+def finish_report(name, facts, rooms):
+    """
+    Filas de un reporte a partir de sus hechos materializados.
+
+    Args:
+        name (str): Nombre del reporte
+        facts (dict): Hechos de todos los reportes (merge_reports)
+        rooms (dict): Salas (ROOM_DATABASE o la vista publicada)
+
+    Returns:
+        list: Filas del reporte
+    """
+    report = REPORTS[name]
+    source = report["facts_from"] or name
+    report_facts = facts.get(source)
+    if report_facts is None:
+        report_facts = REPORTS[source]["merge"]([])
+    return report["finish"](report_facts, rooms)
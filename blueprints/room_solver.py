@@ -0,0 +1,167 @@
+"""
+Asignación Automática de Salas
+==============================
+
+Resuelve en bloque qué sala recibe cada clase sin sala (ver /auto_assign
+en rooms.py). Cada solicitud es una clase con:
+
+- mask: sus bloques semanales como mapa de bits (el mismo formato de
+  ROOM_BITMAPS: bit = día * módulos + módulo - 1)
+- candidates: las salas que le sirven (categoría y capacidad), ordenadas
+  de la que menos asientos desperdicia a la que más
+
+Una clase va completa a una sola sala y una sala no puede recibir dos
+clases que compartan un bloque ni una clase en un bloque que ya está
+ocupado en el horario.
+
+Las listas de candidatas salen de un índice por categoría ordenado por
+capacidad (build_candidate_index): las salas que caben son un sufijo de la
+lista y se encuentran con búsqueda binaria.
+
+assign_rooms trata el problema como un emparejamiento clases -> salas:
+
+1. Asignación voraz, de la clase más restringida (menos candidatas, más
+   bloques) a la menos, en la candidata libre de menor capacidad. Entre
+   clases con el mismo horario y la misma categoría, donde las salas que
+   sirven a una clase grande también sirven a una chica, este orden da un
+   emparejamiento de tamaño máximo con el menor desperdicio.
+2. Caminos de aumento (como en el algoritmo de Kuhn) para las clases que
+   quedaron sin sala: se intenta liberar una candidata moviendo a otra
+   sala la única clase asignada que choca con ella, con profundidad
+   limitada. Esta etapa respeta el tiempo máximo.
+
+Las funciones de este módulo son puras: no leen ni modifican el estado
+de la aplicación.
+"""
+
+import time
+from bisect import bisect_left
+
+AUGMENT_DEPTH = 3  # Clases que un camino de aumento puede mover en cadena
+
+
+def build_candidate_index(rooms):
+    """
+    Índice de salas por categoría, ordenadas por capacidad.
+
+    Args:
+        rooms (dict): Salas {código: {"cap", "cat"}} (ROOM_DATABASE)
+
+    Returns:
+        dict: {categoría: (capacidades, códigos)}, dos listas paralelas
+        ordenadas por capacidad y código
+    """
+    index = {}
+    for sala, details in sorted(rooms.items(), key=lambda item: (item[1]["cap"], item[0])):
+        caps, salas = index.setdefault(details["cat"], ([], []))
+        caps.append(details["cap"])
+        salas.append(sala)
+    return index
+
+
+def candidate_rooms(index, categories, vacantes):
+    """
+    Salas de las categorías indicadas con capacidad para las vacantes.
+
+    Args:
+        index (dict): Resultado de build_candidate_index
+        categories (iterable): Categorías aceptadas
+        vacantes (int): Vacantes de la clase
+
+    Returns:
+        list: Códigos de sala de menor a mayor capacidad
+    """
+    merged = []
+    for category in set(categories):
+        caps, salas = index.get(category, ((), ()))
+        start = bisect_left(caps, vacantes)
+        merged.extend(zip(caps[start:], salas[start:]))
+    merged.sort()
+    return [sala for _, sala in merged]
+
+
+def assign_rooms(masks, candidates, busy, time_budget=2.0):
+    """
+    Asigna una sala a cada clase (ver la descripción del módulo).
+
+    Args:
+        masks (list): Mapa de bits de los bloques de cada clase
+        candidates (list): Candidatas de cada clase (ver candidate_rooms)
+        busy (dict): Bloques ocupados de cada sala {código: mapa de bits}
+        time_budget (float): Segundos máximos para los caminos de aumento
+
+    Returns:
+        tuple: (salas, estadísticas). salas tiene el código asignado a cada
+        clase (None si no se pudo); estadísticas es un dict con "placed",
+        "augmented" (clases ubicadas por caminos de aumento) y "complete"
+        (False si se agotó el tiempo)
+    """
+    deadline = time.monotonic() + time_budget
+    room_of = [None] * len(masks)
+    used = {}  # sala -> bloques tomados por esta asignación
+    placed_in = {}  # sala -> clases asignadas a la sala
+
+    def is_free(sala, mask):
+        return not (busy.get(sala, 0) | used.get(sala, 0)) & mask
+
+    def place(i, sala):
+        room_of[i] = sala
+        used[sala] = used.get(sala, 0) | masks[i]
+        placed_in.setdefault(sala, []).append(i)
+
+    def unplace(i):
+        sala = room_of[i]
+        room_of[i] = None
+        used[sala] &= ~masks[i]
+        placed_in[sala].remove(i)
+
+    # 1. Voraz: la clase más restringida primero, en la sala más ajustada
+    order = sorted(range(len(masks)), key=lambda i: (len(candidates[i]), -bin(masks[i]).count("1"), i))
+    for i in order:
+        for sala in candidates[i]:
+            if is_free(sala, masks[i]):
+                place(i, sala)
+                break
+
+    # 2. Caminos de aumento para las que quedaron sin sala
+    complete = True
+
+    def augment(i, depth, visiting):
+        nonlocal complete
+        visiting.add(i)
+        for sala in candidates[i]:
+            if time.monotonic() > deadline:
+                complete = False
+                return False
+            if busy.get(sala, 0) & masks[i]:
+                continue
+            blockers = [j for j in placed_in.get(sala, ()) if masks[j] & masks[i]]
+            if not blockers:
+                place(i, sala)
+                return True
+            if depth == 0 or len(blockers) > 1 or blockers[0] in visiting:
+                continue
+            # Mover la clase que estorba a otra de sus candidatas
+            j = blockers[0]
+            unplace(j)
+            place(i, sala)
+            if augment(j, depth - 1, visiting):
+                return True
+            unplace(i)
+            place(j, sala)
+        return False
+
+    augmented = 0
+    for i in order:
+        if room_of[i] is None and candidates[i]:
+            if augment(i, AUGMENT_DEPTH, set()):
+                augmented += 1
+            elif not complete:
+                break
+
+    stats = {
+        "placed": sum(sala is not None for sala in room_of),
+        "augmented": augmented,
+        "complete": complete,
+    }
+    return room_of, stats
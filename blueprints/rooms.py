@@ -12,20 +12,71 @@ Este módulo maneja toda la lógica relacionada con:
 Estado: COMPLETAMENTE FUNCIONAL ✅
 
 Endpoints principales:
-- POST /upload: Carga y procesa archivo Excel
+- POST /upload: Carga y procesa archivo Excel (?mode=delta aplica solo los cambios,
+  ?async=1 lo procesa en segundo plano, ver /jobs/<id>). Acepta varios archivos
+  y, con ?sheets=all, todas las hojas de cada uno (procesadas en paralelo)
+- GET /current_data: Último horario procesado (restaurado al reiniciar)
 - POST /add_room: Añade nueva sala
 - POST /delete_room: Elimina sala
 - POST /assign_subject: Asignación manual
 - POST /delete_assignment: Elimina asignación
+- POST /schedule/batch: Asignaciones, eliminaciones y traslados en lote
+  (todos o ninguno)
+- GET /schedule: Consulta paginada del horario (filtros, campos, cursor)
+- GET /find_rooms: Buscador de salas libres (mapas de bits)
+- GET /occupancy/heatmap, /occupancy/utilization, /occupancy/percentiles:
+  Estadísticas agregadas sobre el tensor de ocupación (ver occupancy_tensor)
 - GET /unassigned_nrcs: Lista NRCs sin sala
 - GET /rooms_without_teacher: Lista asignaturas sin docente
+- GET /reports, /reports/<name>: Reportes calculados durante la carga (NRC
+  sin sala, sin docente, salas sobrepasadas, salas desconocidas)
+- GET /export/schedule, /export/stats, /export/reports/<name>: Exportación
+  en CSV o XLSX enviada por partes (ver exports)
+- POST /auto_assign, /auto_assign/commit: Propuesta automática de salas para
+  las clases sin sala (ver room_solver) y su aplicación
 """
 
 # blueprints/rooms.py
+import base64
+import bisect
+import hashlib
+import itertools
+import json
+import multiprocessing
 import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from flask import Blueprint, request, jsonify, current_app
+import numpy as np
 import pandas as pd
 
+from blueprints.excel_stream import drop_seen_rows, iter_workbook_chunks, should_stream
+from blueprints.exports import EXPORT_FORMATS, export_response, row_columns
+from blueprints.jobs import discard_uploads, ignore_progress, run_now, save_uploads, submit_job
+from blueprints.module_grid import resolve_modules
+from blueprints.occupancy_tensor import (
+    bitmaps_to_tensor,
+    building_of,
+    heatmap,
+    percentile_ranking,
+    utilization_by,
+)
+from blueprints.reports import (
+    REPORTS,
+    collect_reports,
+    facts_complete,
+    finish_report,
+    merge_reports,
+    register_report,
+)
+from blueprints.room_solver import assign_rooms, build_candidate_index, candidate_rooms
+from blueprints import conflicts, storage
+from blueprints.state import load_view, read_view, register_view, shared_copy, writer
+from blueprints.wire_format import encode_columnar, wants_columnar
+
 # ===================================
 # INICIALIZACIÓN DEL BLUEPRINT
 # ===================================
@@ -37,8 +88,8 @@ rooms_bp = Blueprint("rooms", __name__)
 # Diccionario con todas las salas disponibles en la institución
 # Estructura: "CODIGO_SALA": {"cap": capacidad, "cat": categoría}
 # 
-# NOTA: Esta base de datos está en memoria y se reinicia al cerrar la app.
-# Para persistencia, migrar a base de datos SQL (ver Roadmap en README)
+# NOTA: Estos son los valores iniciales. Los cambios se guardan en la base
+# SQLite (ver storage) y se restauran al iniciar la aplicación.
 ROOM_DATABASE = {
     "A102": {"cap": 48, "cat": "Laboratorio"},
     "A210": {"cap": 30, "cat": "Sala"},
@@ -157,11 +208,105 @@ ROOM_DATABASE = {
 }
 
 # ===================================
-# ALMACENAMIENTO TEMPORAL EN MEMORIA
+# ALMACENAMIENTO EN MEMORIA
+# ===================================
+# Se guardan en la base SQLite (ver storage) con cada cambio y se restauran
+# al iniciar la aplicación
+# Ambos se indexan por overlay_key: (nrc, seccion, dia_norm, modulo, ubicacion)
+EXTRA_SCHEDULE = {}  # Almacena asignaciones manuales realizadas por el usuario
+DELETED_ENTRIES = {}  # Registra entradas eliminadas para no mostrarlas nuevamente
+# Salas que registró un Excel y que aún no están en la base: se guardan junto
+# con el horario (ver save_schedule_state), que no reescribe las demás
+UNSAVED_ROOMS = set()
+
+# Días de la semana tal como aparecen (normalizados) en las columnas del Excel
+SCHEDULE_DAYS = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado"]
+
+# Orden de las llaves de cada entrada del horario expandido (igual a parse_schedule_row)
+SCHEDULE_FIELDS = [
+    "materia", "codigo_materia", "ubicacion", "carrera", "nrc", "seccion",
+    "n_curso", "componente", "fecha_ini", "fecha_term", "profesor", "tiempo",
+    "horario_texto", "tipo", "modulo", "dia_norm", "cupo_disp",
+]
+
+MODULES_PER_DAY = 8  # Módulos académicos por día (M1-M8)
+DAY_POSITION = {day: pos for pos, day in enumerate(SCHEDULE_DAYS)}
+
+# Índice de ocupación: (sala, dia_norm, modulo) -> entrada del horario
+# Permite verificar en O(1) si un bloque de una sala ya está ocupado
+OCCUPANCY_INDEX = {}
+
+# Mapa de bits semanal por sala (bit = día * 8 + módulo - 1, 1 = ocupado).
+# Se mantiene junto a OCCUPANCY_INDEX y responde al buscador de salas.
+ROOM_BITMAPS = {}
+
+# Tensor de ocupación (salas, días, módulos) armado desde ROOM_BITMAPS para
+# las estadísticas agregadas (ver occupancy_tensor). Se arma al reconstruir
+# la ocupación; cada cambio de una sala lo marca como desactualizado y se
+# vuelve a armar en la siguiente consulta. Los cambios de bloques anotan su
+# sala en "changed" y solo se rehacen esas filas.
+OCCUPANCY_TENSOR = {"stale": True, "changed": set(), "rooms": [], "tensor": None, "cap": None, "cat": []}
+
+# Índices secundarios sobre las entradas de OCCUPANCY_INDEX:
+# campo -> {valor: conjunto de llaves (sala, dia_norm, modulo)}
+INDEXED_FIELDS = ("ubicacion", "dia_norm", "modulo", "carrera", "nrc", "profesor")
+SCHEDULE_INDEXES = {field: {} for field in INDEXED_FIELDS}
+
+# Cambios desde la última vista publicada (ver build_rooms_view), para copiar
+# solo lo que tocaron los escritores:
+# - "all": se reconstruyó la ocupación; la próxima vista se copia completa
+# - "slots": llave -> True si el bloque se (re)insertó en OCCUPANCY_INDEX
+#   (pasa al final del orden), False si solo cambió su entrada
+# - "rooms": cambió ROOM_DATABASE; "summary": cambió el resumen de CURRENT_DATA
+VIEW_CHANGES = {"all": True, "slots": {}, "rooms": True, "summary": True}
+ROOMS_VIEW = None  # Última vista armada por build_rooms_view (base de la siguiente)
+
+# Capas de la vista combinada por bloque (sala, dia_norm, modulo):
+# - FILE_SLOTS: entradas del Excel que piden el bloque, en orden de aparición
+#   (la primera gana; el resto son choques que solo se usan en el modo delta)
+# - EXTRA_SLOTS: llaves de asignaciones manuales del bloque (la última gana)
+# Permiten recalcular un solo bloque al asignar o eliminar (ver resolve_slot)
+FILE_SLOTS = {}
+EXTRA_SLOTS = {}
+
+# Bloques del Excel por grupo (nrc, seccion), huella de las filas de cada
+# grupo y hash de cada fila en orden, en el último Excel cargado (ver
+# apply_schedule_delta)
+FILE_GROUPS = {}
+ROW_FINGERPRINTS = {}
+ROW_ORDER = []
+
+# Resultado de process_schedule para el último Excel cargado (sin combinar
+# con asignaciones manuales ni eliminaciones). None si no se ha cargado nada.
+CURRENT_DATA = None
+SCHEDULE_GENERATION = None  # Identificador del horario guardado (ver storage.save_schedule)
+# El último horario vino de varios archivos o de todas las hojas: latest.xlsx
+# no lo representa y el modo delta no se aplica sobre él (ver upload_file)
+MULTI_SOURCE = False
+# Hechos de los reportes del último Excel (ver compute_reports). Se
+# reemplazan completos en cada carga, nunca se modifican en el lugar.
+REPORT_FACTS = None
+# Memo de report_rows (fuera de las vistas publicadas, que no se modifican):
+# filas de cada reporte para los hechos y la base de salas de una vista. Se
+# descarta cuando la vista trae otros (build_rooms_view los reemplaza solo
+# si cambiaron).
+REPORT_ROWS_MEMO = {"reports": None, "room_database": None, "rows": {}}
+_report_rows_lock = threading.Lock()
+
+# Etapas que reporta process_schedule en las cargas en segundo plano (/jobs)
+UPLOAD_STAGES = ("read", "normalize", "expand", "dedupe", "stats")
+
+# ===================================
+# CACHÉ DE LIBROS EXCEL NORMALIZADOS
 # ===================================
-# ADVERTENCIA: Estos datos se pierden al cerrar la aplicación
-EXTRA_SCHEDULE = []  # Almacena asignaciones manuales realizadas por el usuario
-DELETED_ENTRIES = []  # Registra entradas eliminadas para no mostrarlas nuevamente
+# Evita volver a leer (openpyxl) y normalizar el mismo Excel en cada consulta
+# de reportes. Las entradas se indexan por el hash SHA-1 del contenido; cada
+# ruta recuerda su (mtime, tamaño) para saber cuándo el archivo fue reemplazado
+# y hay que volver a calcular el hash.
+WORKBOOK_CACHE_SIZE = 4  # Libros distintos que se mantienen en memoria (LRU)
+WORKBOOK_CACHE = OrderedDict()  # sha1 -> DataFrame normalizado
+WORKBOOK_FINGERPRINTS = {}  # ruta -> (mtime, tamaño, sha1)
+_workbook_cache_lock = threading.Lock()
 
 
 # ===================================
@@ -213,19 +358,88 @@ def normalize_columns(df):
     return df
 
 
+def workbook_fingerprint(filepath):
+    """
+    Obtiene el hash SHA-1 del contenido de un archivo.
+
+    El hash solo se recalcula si cambió el mtime o el tamaño del archivo
+    desde la última consulta de esa ruta.
+
+    Args:
+        filepath (str): Ruta del archivo Excel
+
+    Returns:
+        str: Hash hexadecimal del contenido
+    """
+    stat = os.stat(filepath)
+    known = WORKBOOK_FINGERPRINTS.get(filepath)
+    if known and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+        return known[2]
+
+    digest = hashlib.sha1()
+    with open(filepath, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    sha1 = digest.hexdigest()
+    WORKBOOK_FINGERPRINTS[filepath] = (stat.st_mtime_ns, stat.st_size, sha1)
+    return sha1
+
+
+def load_normalized_workbook(filepath):
+    """
+    Lee un Excel y normaliza sus columnas, usando la caché LRU si es posible.
+
+    El DataFrame retornado se comparte entre solicitudes: quien lo use debe
+    filtrarlo o copiarlo, nunca modificarlo en el lugar.
+
+    Args:
+        filepath (str): Ruta del archivo Excel
+
+    Returns:
+        DataFrame: DataFrame con columnas normalizadas
+    """
+    key = workbook_fingerprint(filepath)
+    with _workbook_cache_lock:
+        if key in WORKBOOK_CACHE:
+            WORKBOOK_CACHE.move_to_end(key)
+            return WORKBOOK_CACHE[key]
+
+    df = normalize_columns(pd.read_excel(filepath))
+
+    with _workbook_cache_lock:
+        WORKBOOK_CACHE[key] = df
+        WORKBOOK_CACHE.move_to_end(key)
+        while len(WORKBOOK_CACHE) > WORKBOOK_CACHE_SIZE:
+            WORKBOOK_CACHE.popitem(last=False)
+    return df
+
+
+def find_latest_workbook():
+    """
+    Ubica el último Excel cargado (latest.xlsx o, en su defecto, cualquier Excel).
+
+    Returns:
+        str | None: Ruta del archivo, o None si no hay ninguno cargado o si
+        el último horario vino de varios archivos u hojas (MULTI_SOURCE)
+    """
+    if MULTI_SOURCE:
+        return None
+    upload_folder = current_app.config["UPLOAD_FOLDER"]
+    filepath = os.path.join(upload_folder, "latest.xlsx")
+    if os.path.exists(filepath):
+        return filepath
+    files = [f for f in os.listdir(upload_folder) if f.endswith(('.xlsx', '.xls'))]
+    if not files:
+        return None
+    return os.path.join(upload_folder, files[0])
+
+
 def get_affected_modules(start_str, end_str):
     """
     Determina qué módulos académicos ocupa una clase según su horario.
     
-    La institución trabaja con 8 módulos de 80 minutos cada uno:
-    - M1: 08:00 - 09:20
-    - M2: 09:30 - 10:50
-    - M3: 11:00 - 12:20
-    - M4: 12:30 - 13:50
-    - M5: 14:00 - 15:20
-    - M6: 15:30 - 16:50
-    - M7: 17:00 - 18:20
-    - M8: 18:30 - 19:50
+    Usa la grilla compartida de module_grid (8 módulos de 80 minutos,
+    M1 08:00 - 09:20 ... M8 18:30 - 19:50, y módulos dobles).
     
     Args:
         start_str (str): Hora de inicio (ej: "08:00" o "800")
@@ -235,50 +449,353 @@ def get_affected_modules(start_str, end_str):
         list: Lista de números de módulo que la clase ocupa (ej: [1, 2])
         
     Ejemplos:
-        - Clase de 08:00 a 10:50 -> [1, 2] (ocupa 2 módulos)
+        - Clase de 08:00 a 10:40 -> [1, 2] (ocupa 2 módulos)
         - Clase de 14:00 a 15:20 -> [5] (ocupa 1 módulo)
     """
+    return list(resolve_modules(str(start_str), str(end_str)))
+
+
+def occupancy_key(entry):
+    """
+    Construye la llave del índice de ocupación para una entrada del horario.
+
+    Args:
+        entry (dict): Entrada con "ubicacion", "dia_norm" y "modulo"
+
+    Returns:
+        tuple: (sala, dia_norm, modulo)
+    """
+    return (entry["ubicacion"], entry["dia_norm"], int(entry["modulo"]))
+
+
+def slot_bit(dia, modulo):
+    """
+    Bit que representa un bloque día/módulo en los mapas de ROOM_BITMAPS.
+
+    Raises:
+        ValueError: Si el día o el módulo no son válidos
+    """
+    modulo = int(modulo)
+    if dia not in DAY_POSITION or not 1 <= modulo <= MODULES_PER_DAY:
+        raise ValueError(f"Bloque inválido: {dia} M{modulo}")
+    return 1 << (DAY_POSITION[dia] * MODULES_PER_DAY + modulo - 1)
+
+
+def _unindex_entry(key, entry):
+    """Quita una entrada de los índices secundarios."""
+    for field, index in SCHEDULE_INDEXES.items():
+        keys = index.get(entry.get(field))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[entry.get(field)]
+
+
+def _slot_changed(key, moved):
+    """Anota un bloque modificado en VIEW_CHANGES (moved: se (re)insertó o se quitó)."""
+    if VIEW_CHANGES["all"]:
+        return
+    slots = VIEW_CHANGES["slots"]
+    if moved:
+        slots.pop(key, None)
+        slots[key] = True
+    else:
+        slots.setdefault(key, False)
+
+
+def room_database_changed():
+    """Avisa que cambió ROOM_DATABASE (llamar después de cada modificación)."""
+    OCCUPANCY_TENSOR["stale"] = True
+    VIEW_CHANGES["rooms"] = True
+
+
+def occupy_slot(entry):
+    """
+    Registra una entrada en OCCUPANCY_INDEX, en el mapa de bits de su sala
+    y en los índices secundarios. Si el bloque ya tenía una entrada, la
+    reemplaza.
+    """
+    key = occupancy_key(entry)
+    previous = OCCUPANCY_INDEX.get(key)
+    if previous is not None:
+        _unindex_entry(key, previous)
+    OCCUPANCY_INDEX[key] = entry
+    _slot_changed(key, previous is None)
+    for field, index in SCHEDULE_INDEXES.items():
+        index.setdefault(entry.get(field), set()).add(key)
+    if key[1] in DAY_POSITION and 1 <= key[2] <= MODULES_PER_DAY:
+        ROOM_BITMAPS[key[0]] = ROOM_BITMAPS.get(key[0], 0) | slot_bit(key[1], key[2])
+        OCCUPANCY_TENSOR["changed"].add(key[0])
+
+
+def release_slot(key):
+    """Libera un bloque (sala, dia_norm, modulo) de todos los índices."""
+    entry = OCCUPANCY_INDEX.pop(key, None)
+    if entry is None:
+        return
+    _slot_changed(key, True)
+    _unindex_entry(key, entry)
+    if key[0] in ROOM_BITMAPS and key[1] in DAY_POSITION and 1 <= key[2] <= MODULES_PER_DAY:
+        ROOM_BITMAPS[key[0]] &= ~slot_bit(key[1], key[2])
+        OCCUPANCY_TENSOR["changed"].add(key[0])
+
+
+def overlay_key(entry):
+    """
+    Llave de una entrada en EXTRA_SCHEDULE y DELETED_ENTRIES.
+
+    Args:
+        entry (dict): Entrada con "nrc", "seccion", "dia_norm", "modulo" y "ubicacion"
+
+    Returns:
+        tuple: (nrc, seccion, dia_norm, modulo, ubicacion)
+    """
+    return (
+        str(entry["nrc"]),
+        str(entry["seccion"]),
+        entry["dia_norm"],
+        int(entry["modulo"]),
+        entry["ubicacion"],
+    )
+
+
+def add_extra_entry(entry):
+    """Registra una asignación manual en EXTRA_SCHEDULE y EXTRA_SLOTS."""
+    key = overlay_key(entry)
+    EXTRA_SCHEDULE[key] = entry
+    slot_keys = EXTRA_SLOTS.setdefault(occupancy_key(entry), {})
+    slot_keys.pop(key, None)
+    slot_keys[key] = None
+
+
+def remove_extra_entry(key):
+    """Quita una asignación manual de EXTRA_SCHEDULE y EXTRA_SLOTS, si existe."""
+    entry = EXTRA_SCHEDULE.pop(key, None)
+    if entry is None:
+        return
+    slot = occupancy_key(entry)
+    slot_keys = EXTRA_SLOTS.get(slot)
+    if slot_keys is not None:
+        slot_keys.pop(key, None)
+        if not slot_keys:
+            del EXTRA_SLOTS[slot]
+
+
+def resolve_slot(slot):
+    """
+    Recalcula qué entrada ocupa un bloque en la vista combinada.
+
+    Tiene prioridad la última asignación manual del bloque; si no hay, la
+    entrada del Excel que ganó el bloque, salvo que haya sido eliminada. Si no queda ninguna,
+    el bloque se libera. El resultado se avisa al motor de conflictos.
+
+    Args:
+        slot (tuple): (sala, dia_norm, modulo)
+    """
+    slot_keys = EXTRA_SLOTS.get(slot)
+    if slot_keys:
+        occupy_slot(EXTRA_SCHEDULE[next(reversed(slot_keys))])
+    else:
+        entries = FILE_SLOTS.get(slot)
+        if entries and overlay_key(entries[0]) not in DELETED_ENTRIES:
+            occupy_slot(entries[0])
+        else:
+            release_slot(slot)
+    conflicts.schedule_slot_changed(slot, OCCUPANCY_INDEX.get(slot))
+
+
+def rebuild_occupancy(schedule):
+    """Reconstruye OCCUPANCY_INDEX, ROOM_BITMAPS y los índices secundarios."""
+    VIEW_CHANGES["all"] = True
+    OCCUPANCY_TENSOR["stale"] = True
+    OCCUPANCY_INDEX.clear()
+    ROOM_BITMAPS.clear()
+    for index in SCHEDULE_INDEXES.values():
+        index.clear()
+    for entry in schedule:
+        occupy_slot(entry)
+    occupancy_tensor()
+    conflicts.reset_schedule(OCCUPANCY_INDEX)
+
+
+def occupancy_tensor():
+    """
+    Tensor de ocupación actualizado (lo vuelve a armar si está desactualizado).
+
+    Incluye todas las salas de ROOM_DATABASE y las que tienen bloques
+    ocupados aunque ya no estén en la base, ordenadas por código. Si solo
+    cambiaron bloques, copia el tensor y rehace las filas de sus salas (los
+    tensores ya publicados no se modifican).
+
+    Returns:
+        dict: OCCUPANCY_TENSOR con "rooms" (códigos), "tensor" (bool,
+        salas × días × módulos), "cap" (capacidades) y "cat" (categorías)
+    """
+    changed = OCCUPANCY_TENSOR["changed"]
+    if changed and not OCCUPANCY_TENSOR["stale"]:
+        position = {sala: pos for pos, sala in enumerate(OCCUPANCY_TENSOR["rooms"])}
+        if changed.issubset(position):
+            rows = sorted(position[sala] for sala in changed)
+            tensor = OCCUPANCY_TENSOR["tensor"].copy()
+            tensor[rows] = bitmaps_to_tensor(
+                [ROOM_BITMAPS.get(OCCUPANCY_TENSOR["rooms"][row], 0) for row in rows],
+                len(SCHEDULE_DAYS), MODULES_PER_DAY,
+            )
+            OCCUPANCY_TENSOR["tensor"] = tensor
+        else:
+            OCCUPANCY_TENSOR["stale"] = True  # Sala nueva con bloques ocupados
+    OCCUPANCY_TENSOR["changed"] = set()
+    if OCCUPANCY_TENSOR["stale"]:
+        rooms = sorted(set(ROOM_DATABASE) | set(ROOM_BITMAPS))
+        details = [ROOM_DATABASE.get(sala, {"cap": 0, "cat": "Desconocida"}) for sala in rooms]
+        OCCUPANCY_TENSOR.update(
+            stale=False,
+            rooms=rooms,
+            tensor=bitmaps_to_tensor(
+                [ROOM_BITMAPS.get(sala, 0) for sala in rooms], len(SCHEDULE_DAYS), MODULES_PER_DAY
+            ),
+            cap=np.array([d["cap"] for d in details], dtype=float),
+            cat=[d["cat"] for d in details],
+        )
+    return OCCUPANCY_TENSOR
+
+
+def schedule_sort_key(key):
+    """Orden estable de los bloques: sala, día de la semana y módulo."""
+    return (key[0], DAY_POSITION.get(key[1], len(SCHEDULE_DAYS)), key[2])
+
+
+def schedule_order(previous=None, live=None, slots=()):
+    """
+    Llaves del horario ordenadas por schedule_sort_key, para paginar /schedule
+    sin volver a ordenar en cada consulta.
+
+    Sin orden anterior ordena todas las llaves de live; si no, copia el
+    anterior y solo saca o inserta (con bisect) los bloques de slots que
+    entraron o salieron de la ocupación.
+
+    Args:
+        previous (dict | None): Vista anterior ("occupancy" y "order")
+        live (Mapping): Ocupación actual (OCCUPANCY_INDEX)
+        slots (iterable): Llaves de los bloques modificados desde previous
+
+    Returns:
+        list: Pares (schedule_sort_key(llave), llave) en orden
+    """
+    if previous is None:
+        return sorted((schedule_sort_key(key), key) for key in live)
+    order = list(previous["order"])
+    for key in slots:
+        was, now = key in previous["occupancy"], key in live
+        if was == now:
+            continue
+        item = (schedule_sort_key(key), key)
+        if now:
+            bisect.insort(order, item)
+        else:
+            del order[bisect.bisect_left(order, item)]
+    return order
+
+
+def schedule_page(order, candidates, after, limit):
+    """
+    Primeras llaves de una página de /schedule según el orden de la vista.
+
+    Args:
+        order (list): Orden de la vista (ver schedule_order)
+        candidates (set | None): Llaves que cumplen los filtros (None: todas)
+        after (tuple | None): Cursor decodificado; solo llaves posteriores
+        limit (int): Máximo de llaves
+
+    Returns:
+        list: Llaves en orden
+    """
+    start = 0
+    if after is not None:
+        start = bisect.bisect_right(order, after, key=lambda item: item[0])
+    if candidates is None:
+        return [key for _, key in order[start:start + limit]]
+    if len(candidates) * 16 < len(order):
+        # Pocos candidatos: ordenarlos sale más barato que recorrer la vista
+        ordered = sorted((schedule_sort_key(key), key) for key in candidates)
+        if after is not None:
+            ordered = ordered[bisect.bisect_right(ordered, after, key=lambda item: item[0]):]
+        return [key for _, key in ordered[:limit]]
+    page = []
+    for _, key in itertools.islice(order, start, None):
+        if key in candidates:
+            page.append(key)
+            if len(page) == limit:
+                break
+    return page
+
+
+def encode_cursor(key):
+    """Convierte la llave del último bloque entregado en un cursor opaco."""
+    raw = json.dumps(list(schedule_sort_key(key))).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Inverso de encode_cursor.
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
     try:
-        s_raw = str(start_str).strip().replace(".0", "")
-        e_raw = str(end_str).strip().replace(".0", "")
-        s_clean = s_raw.replace(":", "")[:4]
-        e_clean = e_raw.replace(":", "")[:4]
-        start_val = int(s_clean)
-        end_val = int(e_clean)
-
-        # Detectar clases de 2 módulos seguidos (casos especiales)
-        if start_val == 800 and (1035 <= end_val <= 1045):
-            return [1, 2]
-        if start_val == 930 and (1205 <= end_val <= 1215):
-            return [2, 3]
-        if start_val == 1100 and (1335 <= end_val <= 1345):
-            return [3, 4]
-        if start_val == 1400 and (1635 <= end_val <= 1645):
-            return [5, 6]
-        if start_val == 1700 and (1935 <= end_val <= 1945):
-            return [7, 8]
-
-        # Asignar módulo individual según hora de inicio
-        affected = []
-        if 800 <= start_val <= 925:
-            affected.append(1)
-        elif 930 <= start_val <= 1055:
-            affected.append(2)
-        elif 1100 <= start_val <= 1225:
-            affected.append(3)
-        elif 1230 <= start_val <= 1355:
-            affected.append(4)
-        elif 1400 <= start_val <= 1525:
-            affected.append(5)
-        elif 1530 <= start_val <= 1655:
-            affected.append(6)
-        elif 1700 <= start_val <= 1825:
-            affected.append(7)
-        elif 1830 <= start_val <= 2000:
-            affected.append(8)
-        return affected
+        sala, day_pos, modulo = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (str(sala), int(day_pos), int(modulo))
     except Exception:
-        return []
+        raise ValueError("Cursor inválido")
+
+
+def count_room_usage(occupancy, new_rooms=()):
+    """
+    Cuenta los bloques ocupados por sala a partir del índice de ocupación.
+
+    Todas las salas de ROOM_DATABASE (según la última vista publicada) y de
+    new_rooms aparecen en el resultado, aunque no tengan bloques ocupados.
+
+    Args:
+        occupancy (dict): Índice (sala, dia_norm, modulo) -> entrada
+        new_rooms (dict): Salas del Excel aún no registradas (ver register_unknown_rooms)
+
+    Returns:
+        dict: {sala: bloques_ocupados}
+    """
+    room_usage_counter = {room: 0 for room in read_view("rooms")["room_database"]}
+    room_usage_counter.update((room, 0) for room in new_rooms if room not in room_usage_counter)
+    for sala, _, _ in occupancy:
+        room_usage_counter[sala] = room_usage_counter.get(sala, 0) + 1
+    return room_usage_counter
+
+
+def room_stat(sala, count):
+    """
+    Fila de estadísticas de una sala para el monitor de ocupación.
+
+    Args:
+        sala (str): Código de la sala
+        count (int): Bloques semanales ocupados
+
+    Returns:
+        dict: Ocupación, capacidad, categoría y estado visual de la sala
+    """
+    TOTAL_WEEKLY_BLOCKS = MODULES_PER_DAY * len(SCHEDULE_DAYS)
+    percentage = (count / TOTAL_WEEKLY_BLOCKS) * 100
+    css_class, status_text, dot_color = calculate_occupancy_color(count)
+    details = ROOM_DATABASE.get(sala, {"cap": 0, "cat": "Desconocida"})
+    return {
+        "sala": sala,
+        "ocupados": count,
+        "capacidad_max": details["cap"],
+        "categoria": details["cat"],
+        "porcentaje": round(percentage, 1),
+        "status_class": css_class,
+        "status_text": status_text,
+        "dot_color": dot_color,
+    }
 
 
 def calculate_occupancy_color(blocks_used):
@@ -310,8 +827,14 @@ def calculate_occupancy_color(blocks_used):
 
 
 def parse_schedule_row(row):
+    """
+    Expande una fila del Excel a una entrada por día y módulo ocupado.
+
+    Es la referencia fila a fila de expand_schedule_frame(), que
+    process_schedule usa para procesar el archivo completo.
+    """
     entries = []
-    days = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado"]
+    days = SCHEDULE_DAYS
     inicio = str(row.get("inicio", "")).strip().replace(".0", "")
     fin = str(row.get("fin", "")).strip().replace(".0", "")
 
@@ -374,356 +897,2415 @@ def parse_schedule_row(row):
     return entries
 
 
-def process_schedule(file_path):
-    try:
-        df = pd.read_excel(file_path)
-        df = normalize_columns(df)
-        if "nombre_asignatura" not in df.columns or "ubicacion" not in df.columns:
-            return None, "Faltan columnas NOMBRE o SALA."
+# ===================================
+# INGESTA COLUMNAR (VECTORIZADA)
+# ===================================
+# Equivalente a aplicar parse_schedule_row fila por fila, pero trabajando
+# sobre columnas completas del DataFrame. Ver expand_schedule_frame().
 
-        df = df.dropna(subset=["ubicacion"])
-        df = df.drop_duplicates()
-
-        expanded_schedule = []
-        room_usage_counter = {room: 0 for room in ROOM_DATABASE.keys()}
-        for _, row in df.iterrows():
-            class_instances = parse_schedule_row(row)
-            sala_excel = str(row["ubicacion"]).strip()
-
-            if sala_excel not in ROOM_DATABASE:
-                ROOM_DATABASE[sala_excel] = {"cap": 0, "cat": "Desconocida"}
-                room_usage_counter[sala_excel] = 0
-
-            for instance in class_instances:
-                is_duplicate = False
-                for existing in expanded_schedule:
-                    if (
-                        existing["ubicacion"] == sala_excel
-                        and existing["dia_norm"] == instance["dia_norm"]
-                        and existing["modulo"] == instance["modulo"]
-                    ):
-                        is_duplicate = True
-                        break
-                if not is_duplicate:
-                    instance["ubicacion"] = sala_excel
-                    expanded_schedule.append(instance)
-                    room_usage_counter[sala_excel] += 1
-
-        TOTAL_WEEKLY_BLOCKS = 48
-        room_stats = []
-
-        for sala, count in room_usage_counter.items():
-            percentage = (count / TOTAL_WEEKLY_BLOCKS) * 100
-            css_class, status_text, dot_color = calculate_occupancy_color(count)
-            details = ROOM_DATABASE.get(sala, {"cap": 0, "cat": "Desconocida"})
-
-            room_stats.append(
-                {
-                    "sala": sala,
-                    "ocupados": count,
-                    "capacidad_max": details["cap"],
-                    "categoria": details["cat"],
-                    "porcentaje": round(percentage, 1),
-                    "status_class": css_class,
-                    "status_text": status_text,
-                    "dot_color": dot_color,
-                }
-            )
+def _clean_values(series, clean):
+    """
+    Aplica clean(str(valor)) a una Serie completa.
 
-        room_stats.sort(key=lambda x: x["sala"])
+    Las columnas con un tipo homogéneo se factorizan, de modo que la limpieza
+    se ejecuta una sola vez por valor distinto (NRC, sala, docente... se
+    repiten mucho). Las columnas object pueden mezclar tipos (1, "1", 1.0) que
+    la factorización confundiría, así que se recorren valor a valor.
+    """
+    if series.dtype == object:
+        return pd.Series([clean(str(v)) for v in series], index=series.index, dtype=object)
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    cleaned = np.array([clean(str(u)) for u in uniques], dtype=object)
+    return pd.Series(cleaned[codes], index=series.index, dtype=object)
 
-        return {
-            "stats": room_stats,
-            "schedule": expanded_schedule,
-            "total_rooms": len(room_stats),
-            "total_courses": len(expanded_schedule),
-        }, None
-    except Exception as e:
-        return None, str(e)
 
+def _text_column(df, column, default="", clean=str.strip):
+    """Replica clean(str(row.get(column, default))) sobre toda la columna."""
+    if column not in df.columns:
+        return pd.Series(clean(str(default)), index=df.index, dtype=object)
+    return _clean_values(df[column], clean)
 
-@rooms_bp.route("/upload", methods=["POST"])
-def upload_file():
-    if "file" not in request.files:
-        return jsonify({"error": "No file"}), 400
-    file = request.files["file"]
-    if file.filename == "":
-        return jsonify({"error": "No file"}), 400
-    try:
-        # FIX: Usar current_app para obtener la config de la app principal
-        filepath = os.path.join(current_app.config["UPLOAD_FOLDER"], file.filename)
-        file.save(filepath)
 
-        # Also save a copy as "latest.xlsx" for report queries
-        latest_path = os.path.join(current_app.config["UPLOAD_FOLDER"], "latest.xlsx")
-        file.seek(0)  # Reset file pointer
-        file.save(latest_path)
+def _strip_decimal(text):
+    """Equivalente a str(...).strip().replace(".0", "") de parse_schedule_row."""
+    return text.strip().replace(".0", "")
 
-        data, error = process_schedule(filepath)
-        if error:
-            return jsonify({"error": error}), 500
-
-        # Merge extra schedule
-        if data and "schedule" in data:
-            # Filter out deleted entries from file data
-            data["schedule"] = [
-                s
-                for s in data["schedule"]
-                if not any(
-                    d["nrc"] == s["nrc"]
-                    and d["seccion"] == s["seccion"]
-                    and d["dia_norm"] == s["dia_norm"]
-                    and d["modulo"] == s["modulo"]
-                    and d["ubicacion"] == s["ubicacion"]
-                    for d in DELETED_ENTRIES
-                )
-            ]
-            # Add extra schedule (filtering deleted ones too just in case)
-            active_extras = [
-                s
-                for s in EXTRA_SCHEDULE
-                if not any(
-                    d["nrc"] == s["nrc"]
-                    and d["seccion"] == s["seccion"]
-                    and d["dia_norm"] == s["dia_norm"]
-                    and d["modulo"] == s["modulo"]
-                    and d["ubicacion"] == s["ubicacion"]
-                    for d in DELETED_ENTRIES
-                )
-            ]
-            data["schedule"].extend(active_extras)
 
-        return jsonify({"success": True, "data": data})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+def _or_placeholder(text):
+    """Reemplaza valores vacíos o "nan" por "?" (NRC y sección)."""
+    return "?" if text.lower() == "nan" or text == "" else text
 
 
-@rooms_bp.route("/add_room", methods=["POST"])
-def add_room():
-    data = request.json
-    new_room = data.get("room_name")
-    capacity = data.get("capacity", 30)
-    category = data.get("category", "Sala")
-    if new_room:
-        clean_name = new_room.strip().upper()
-        ROOM_DATABASE[clean_name] = {"cap": int(capacity), "cat": category}
-        return jsonify({"success": True})
-    return jsonify({"error": "Nombre inválido"}), 400
+def _clean_nrc(text):
+    """NRC limpiado como en parse_schedule_row ("?" si está vacío)."""
+    return _or_placeholder(_strip_decimal(text))
 
 
-@rooms_bp.route("/delete_room", methods=["POST"])
-def delete_room():
-    data = request.json
-    room_to_delete = data.get("room_name")
-    if room_to_delete and room_to_delete in ROOM_DATABASE:
-        del ROOM_DATABASE[room_to_delete]
-        return jsonify({"success": True})
-    return jsonify({"error": "Sala no encontrada"}), 404
+def _clean_seccion(text):
+    """Sección limpiada como en parse_schedule_row ("?" si está vacía)."""
+    return _or_placeholder(text.strip())
 
 
-@rooms_bp.route("/assign_subject", methods=["POST"])
-def assign_subject():
-    data = request.json
-    # Validate required fields
-    required = ["nrc", "seccion", "dia", "modulo", "sala"]
-    if not all(k in data for k in required):
-        return jsonify({"error": "Faltan datos requeridos"}), 400
+def _date_part(text):
+    """Fecha sin la hora, como str(...).split(" ")[0] de parse_schedule_row."""
+    return text.split(" ")[0]
 
-    # Create schedule entry
-    new_entry = {
-        "materia": data.get("materia", "Asignatura Manual"),
-        "codigo_materia": data.get("codigo", ""),
-        "ubicacion": data["sala"],
-        "carrera": "",
-        "nrc": data["nrc"],
-        "seccion": data["seccion"],
-        "n_curso": "",
-        "componente": "",
-        "fecha_ini": "",
-        "fecha_term": "",
-        "profesor": "Por Asignar",
-        "tiempo": "",
-        "modulo": int(data["modulo"]),
-        "dia_norm": data["dia"],
-        "type": "manual",
-    }
 
-    EXTRA_SCHEDULE.append(new_entry)
-    return jsonify({"success": True, "entry": new_entry})
+def _is_active_day(text):
+    """Celda de una columna de día marcada (ni vacía ni "nan"/"none")."""
+    return text.strip().lower() not in ("nan", "", "none")
 
 
-@rooms_bp.route("/delete_assignment", methods=["POST"])
-def delete_assignment():
-    data = request.json
-    required = ["nrc", "seccion", "dia_norm", "modulo", "ubicacion"]
-    if not all(k in data for k in required):
-        return jsonify({"error": "Faltan datos para identificar el bloque"}), 400
+def _nrc_column(df):
+    """NRC de cada fila, limpiado como en parse_schedule_row."""
+    return _text_column(df, "nrc", clean=_clean_nrc)
 
-    # Remove from EXTRA_SCHEDULE if present
-    global EXTRA_SCHEDULE
-    EXTRA_SCHEDULE = [
-        s
-        for s in EXTRA_SCHEDULE
-        if not (
-            s["nrc"] == data["nrc"]
-            and s["seccion"] == data["seccion"]
-            and s["dia_norm"] == data["dia_norm"]
-            and s["modulo"] == data["modulo"]
-            and s["ubicacion"] == data["ubicacion"]
-        )
-    ]
 
-    # Add to DELETED_ENTRIES to prevent it from reappearing from file
-    DELETED_ENTRIES.append(
-        {
-            "nrc": data["nrc"],
-            "seccion": data["seccion"],
-            "dia_norm": data["dia_norm"],
-            "modulo": data["modulo"],
-            "ubicacion": data["ubicacion"],
-        }
+def _seccion_column(df):
+    """Sección de cada fila, limpiada como en parse_schedule_row."""
+    return _text_column(df, "seccion", clean=_clean_seccion)
+
+
+def _safe_int(value):
+    """Replica la conversión de vacantes de parse_schedule_row (0 si falla)."""
+    try:
+        return int(value)
+    except Exception:
+        return 0
+
+
+def _day_flags(df):
+    """
+    Matriz booleana (filas × 6 días) que indica qué días tiene cada clase.
+
+    Un día cuenta como activo si su celda no está vacía ni es "nan"/"none".
+    """
+    flags = np.zeros((len(df), len(SCHEDULE_DAYS)), dtype=bool)
+    for pos, day in enumerate(SCHEDULE_DAYS):
+        if day in df.columns:
+            active = _clean_values(df[day], _is_active_day)
+            flags[:, pos] = active.to_numpy(dtype=bool)
+    return flags
+
+
+def expand_schedule_frame(df):
+    """
+    Expande un DataFrame normalizado a un bloque por clase/día/módulo.
+
+    Produce exactamente las mismas entradas (y en el mismo orden) que
+    concatenar parse_schedule_row() para cada fila, pero limpiando los
+    campos como Series completas y resolviendo los módulos una sola vez
+    por cada par (inicio, fin) distinto. tests/test_schedule_parity.py
+    compara ambas rutas.
+
+    Args:
+        df (DataFrame): DataFrame con columnas normalizadas
+
+    Returns:
+        DataFrame: Una fila por bloque, con las columnas de SCHEDULE_FIELDS.
+            El índice de cada bloque es la etiqueta de su fila en df.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=SCHEDULE_FIELDS)
+
+    inicio = _text_column(df, "inicio", clean=_strip_decimal)
+    fin = _text_column(df, "fin", clean=_strip_decimal)
+
+    # Tabla de módulos: un código por par (inicio, fin) y una fila de
+    # módulos (rellenada con 0) por código
+    pair_codes, pairs = pd.factorize(pd.MultiIndex.from_arrays([inicio, fin]))
+    pair_modules = [get_affected_modules(s, e) for s, e in pairs]
+    width = max((len(m) for m in pair_modules), default=0)
+    if width == 0:
+        return pd.DataFrame(columns=SCHEDULE_FIELDS)
+    module_table = np.zeros((len(pair_modules), width), dtype=np.int64)
+    module_count = np.zeros(len(pair_modules), dtype=np.int64)
+    for code, mods in enumerate(pair_modules):
+        module_table[code, : len(mods)] = mods
+        module_count[code] = len(mods)
+
+    # "Derretir" las columnas de días: pares (fila, día) en orden fila -> día
+    row_pos, day_pos = np.nonzero(_day_flags(df))
+    counts = module_count[pair_codes[row_pos]]
+    row_pos = np.repeat(row_pos, counts)
+    day_pos = np.repeat(day_pos, counts)
+    offsets = np.arange(len(row_pos)) - np.repeat(np.cumsum(counts) - counts, counts)
+    modulos = module_table[pair_codes[row_pos], offsets]
+
+    nrc = _nrc_column(df)
+    seccion = _seccion_column(df)
+    componente = _text_column(df, "componente")
+    profesor = (_text_column(df, "prof_nombre") + " " + _text_column(df, "prof_apellido")).str.strip()
+    profesor = profesor.mask(profesor == "", "Por Asignar")
+    tiempo = inicio + " - " + fin
+    if "vacantes" in df.columns:
+        vacantes = df["vacantes"].map(_safe_int)
+    else:
+        vacantes = pd.Series(0, index=df.index)
+
+    def fecha(column):
+        return _text_column(df, column, clean=_date_part)
+
+    columns = {
+        "materia": _text_column(df, "nombre_asignatura", "Sin Nombre"),
+        "codigo_materia": _text_column(df, "codigo_materia"),
+        "ubicacion": _text_column(df, "ubicacion", "Sin Sala"),
+        "carrera": _text_column(df, "carrera"),
+        "nrc": nrc,
+        "seccion": seccion,
+        "n_curso": _text_column(df, "n_curso"),
+        "componente": componente,
+        "fecha_ini": fecha("fecha_ini"),
+        "fecha_term": fecha("fecha_term"),
+        "profesor": profesor,
+        "tiempo": tiempo,
+        "horario_texto": tiempo,
+        "tipo": componente,
+    }
+    expanded = pd.DataFrame(
+        {name: series.to_numpy(dtype=object)[row_pos] for name, series in columns.items()}
     )
+    expanded["modulo"] = modulos
+    expanded["dia_norm"] = np.array(SCHEDULE_DAYS, dtype=object)[day_pos]
+    expanded["cupo_disp"] = vacantes.to_numpy()[row_pos]
+    expanded.index = df.index[row_pos]
+    return expanded[SCHEDULE_FIELDS]
 
-    return jsonify({"success": True})
 
+def schedule_records(expanded):
+    """
+    Convierte el DataFrame expandido en la lista de entradas (dicts) que
+    consume el frontend, con tipos nativos de Python.
+    """
+    values = [expanded[name].tolist() for name in SCHEDULE_FIELDS]
+    return [dict(zip(SCHEDULE_FIELDS, row)) for row in zip(*values)]
 
-@rooms_bp.route("/unassigned_nrcs", methods=["GET"])
-def get_unassigned_nrcs():
-    """Retorna los NRCs del Excel que no tienen sala asignada (ubicacion vacía o inválida)"""
-    try:
-        # Need to reload the Excel to get all NRCs including unassigned ones
-        filepath = os.path.join(current_app.config["UPLOAD_FOLDER"], "latest.xlsx")
-        if not os.path.exists(filepath):
-            # Try to find any excel file
-            upload_folder = current_app.config["UPLOAD_FOLDER"]
-            files = [f for f in os.listdir(upload_folder) if f.endswith(('.xlsx', '.xls'))]
-            if not files:
-                return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
-            filepath = os.path.join(upload_folder, files[0])
-        
-        df = pd.read_excel(filepath)
-        df = normalize_columns(df)
-        
-        # Filter rows without valid ubicacion
-        unassigned = df[
-            (df['ubicacion'].isna()) |
-            (df['ubicacion'].astype(str).str.strip() == '') |
-            (df['ubicacion'].astype(str).str.strip().str.lower() == 'nan')
-        ]
-        
-        # Extract relevant info
-        result = []
-        for _, row in unassigned.iterrows():
-            nrc = str(row.get("nrc", "")).strip().replace(".0", "")
-            if nrc.lower() == "nan" or nrc == "":
-                continue
-                
-            seccion = str(row.get("seccion", "")).strip()
-            nombre_asignatura = str(row.get("nombre_asignatura", "Sin Nombre")).strip()
-            codigo_materia = str(row.get("codigo_materia", "")).strip()
-            n_curso = str(row.get("n_curso", "")).strip()
-            componente = str(row.get("componente", "")).strip()
-            carrera = str(row.get("carrera", "")).strip()
-            
-            result.append({
-                "nrc": nrc,
-                "seccion": seccion,
-                "materia": nombre_asignatura,
-                "codigo_materia": codigo_materia,
-                "n_curso": n_curso,
-                "componente": componente,
-                "carrera": carrera
-            })
-        
-        return jsonify({"success": True, "data": result})
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
 
+def register_unknown_rooms(rooms, new_rooms=None):
+    """
+    Registra en ROOM_DATABASE las salas del Excel que no existen (en orden de aparición).
 
-@rooms_bp.route("/rooms_without_teacher", methods=["GET"])
-def get_rooms_without_teacher():
-    """Retorna las asignaturas que tienen 'SIN DOCENTE' en la columna prof_nombre"""
-    try:
-        filepath = os.path.join(current_app.config["UPLOAD_FOLDER"], "latest.xlsx")
-        if not os.path.exists(filepath):
-            upload_folder = current_app.config["UPLOAD_FOLDER"]
-            files = [f for f in os.listdir(upload_folder) if f.endswith(('.xlsx', '.xls'))]
-            if not files:
-                return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
-            filepath = os.path.join(upload_folder, files[0])
-        
-        df = pd.read_excel(filepath)
-        df = normalize_columns(df)
-        
-        # Filter rows where prof_nombre contains "SIN DOCENTE"
-        no_teacher = df[
-            df['prof_nombre'].astype(str).str.strip().str.upper() == 'SIN DOCENTE'
-        ]
+    Args:
+        rooms (iterable): Códigos de sala
+        new_rooms (dict | None): Si se entrega, las salas nuevas se acumulan
+            aquí sin tocar ROOM_DATABASE, para registrarlas después dentro de
+            un bloque de escritura (el procesamiento corre fuera del lock)
+    """
+    for sala_excel in rooms:
+        if sala_excel in ROOM_DATABASE:
+            continue
+        if new_rooms is not None:
+            new_rooms.setdefault(sala_excel, {"cap": 0, "cat": "Desconocida"})
+        else:
+            ROOM_DATABASE[sala_excel] = {"cap": 0, "cat": "Desconocida"}
+            UNSAVED_ROOMS.add(sala_excel)
+            room_database_changed()
+
+
+def ingest_schedule_frame(df, occupancy, shadowed=None, progress=ignore_progress, new_rooms=None):
+    """
+    Incorpora un DataFrame normalizado (archivo completo o un bloque) al índice.
 
-        # Group by all fields except carrera to eliminate duplicates
-        grouped_data = {}
-
-        for _, row in no_teacher.iterrows():
-            nrc = str(row.get("nrc", "")).strip().replace(".0", "")
-            if nrc.lower() == "nan" or nrc == "":
-                nrc = "?"
-
-            seccion = str(row.get("seccion", "")).strip()
-            nombre_asignatura = str(row.get("nombre_asignatura", "Sin Nombre")).strip()
-            codigo_materia = str(row.get("codigo_materia", "")).strip()
-            n_curso = str(row.get("n_curso", "")).strip()
-            componente = str(row.get("componente", "")).strip()
-            carrera = str(row.get("carrera", "")).strip()
-            ubicacion = str(row.get("ubicacion", "Sin Sala")).strip()
-
-            # Parse schedule info
-            inicio = str(row.get("inicio", "")).strip().replace(".0", "")
-            fin = str(row.get("fin", "")).strip().replace(".0", "")
-
-            # Get days
-            days = []
-            for day in ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado"]:
-                if day in row.index:
-                    val = str(row[day]).strip().lower()
-                    if val not in ("nan", "", "none"):
-                        days.append(day.capitalize())
-
-            dias_str = ", ".join(days)
-            horario = f"{inicio} - {fin}"
-
-            # Create unique key for grouping (all fields except carrera)
-            key = (nrc, seccion, codigo_materia, n_curso, nombre_asignatura,
-                   componente, ubicacion, horario, dias_str)
-
-            if key not in grouped_data:
-                grouped_data[key] = {
-                    "nrc": nrc,
-                    "seccion": seccion,
-                    "materia": nombre_asignatura,
-                    "codigo_materia": codigo_materia,
-                    "n_curso": n_curso,
-                    "componente": componente,
-                    "carreras": set(),  # Use set to avoid duplicates
-                    "ubicacion": ubicacion,
-                    "horario": horario,
-                    "dias": dias_str
-                }
+    Registra las salas desconocidas y agrega al índice las clases cuyo bloque
+    sala/día/módulo aún no está ocupado (gana la primera en aparecer).
+
+    Args:
+        df (DataFrame): Filas con columnas normalizadas y sala no vacía
+        occupancy (dict): Índice (sala, dia_norm, modulo) -> entrada, se modifica
+        shadowed (list | None): Si se entrega, recibe las entradas que perdieron
+            su bloque frente a una anterior
+        progress (callable): Recibe el nombre de cada etapa al comenzar
+        new_rooms (dict | None): Ver register_unknown_rooms
+    """
+    register_unknown_rooms(_text_column(df, "ubicacion").unique(), new_rooms)
+    progress("expand")
+    expanded = expand_schedule_frame(df)
+    progress("dedupe")
+    claim_slots(expanded, occupancy, shadowed)
 
-            # Add carrera to the set (skip empty or nan values)
-            if carrera and carrera.lower() not in ("nan", "", "none"):
-                grouped_data[key]["carreras"].add(carrera)
 
-        # Convert sets to sorted comma-separated strings
-        result = []
-        for item in grouped_data.values():
-            carreras_list = sorted(list(item["carreras"]))
-            item["carrera"] = ", ".join(carreras_list) if carreras_list else "-"
-            del item["carreras"]  # Remove the set field
-            result.append(item)
+def claim_slots(expanded, occupancy, shadowed=None):
+    """
+    Agrega al índice los bloques expandidos cuyo bloque sala/día/módulo aún
+    no está ocupado (gana el primero en aparecer).
 
-        # Sort by NRC and section for consistent ordering
-        result.sort(key=lambda x: (x["nrc"], x["seccion"]))
+    Args:
+        expanded (DataFrame): Resultado de expand_schedule_frame
+        occupancy (dict): Índice (sala, dia_norm, modulo) -> entrada, se modifica
+        shadowed (list | None): Si se entrega, recibe los bloques que perdieron
+            frente a uno anterior
+    """
+    if shadowed is None:
+        expanded = expanded.drop_duplicates(subset=["ubicacion", "dia_norm", "modulo"])
+    for entry in schedule_records(expanded):
+        key = occupancy_key(entry)
+        if key not in occupancy:
+            occupancy[key] = entry
+        elif shadowed is not None:
+            shadowed.append(entry)
+
+
+def process_schedule(file_path, streaming=None, fingerprints=None, shadowed=None,
+                     progress=ignore_progress, new_rooms=None, reports=None, row_order=None):
+    """
+    Procesa el Excel de horarios y calcula la ocupación de cada sala.
 
-        return jsonify({"success": True, "data": result})
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+    Args:
+        file_path (str): Ruta del archivo Excel
+        streaming (bool | None): Leer el archivo por bloques con memoria acotada.
+            None decide según el tamaño del archivo (ver excel_stream.should_stream).
+        fingerprints (dict | None): Si se entrega, se llena con la huella de
+            las filas por (nrc, seccion) (ver fingerprint_rows)
+        shadowed (list | None): Si se entrega, recibe las entradas que chocaron
+            con un bloque ya ocupado (ver apply_schedule_delta)
+        progress (callable): Recibe el nombre de cada etapa de UPLOAD_STAGES al
+            comenzarla (ver jobs.submit_job)
+        new_rooms (dict | None): Si se entrega, recibe las salas nuevas del
+            Excel en vez de registrarlas en ROOM_DATABASE
+        reports (dict | None): Si se entrega, recibe los hechos de los
+            reportes (ver compute_reports), calculados sobre los mismos bloques
+        row_order (list | None): Si se entrega, recibe el hash de cada fila
+            ingerida, en orden (ver fingerprint_rows)
+
+    Returns:
+        tuple: (datos, None) si todo salió bien, o (None, mensaje_error)
+    """
+    try:
+        if streaming is None:
+            streaming = should_stream(file_path)
+
+        progress("read")
+        # Los reportes ven el archivo tal como viene (también filas repetidas),
+        # en ambos modos; solo la ingesta descarta las filas repetidas
+        if streaming:
+            chunks = iter_workbook_chunks(file_path, normalize_columns)
+        else:
+            chunks = iter([load_normalized_workbook(file_path)])
+
+        occupancy = {}
+        report_parts = []
+        seen_rows = set()
+        for df in chunks:
+            progress("normalize")
+            if "nombre_asignatura" not in df.columns or "ubicacion" not in df.columns:
+                return None, "Faltan columnas NOMBRE o SALA."
+            if reports is not None:
+                report_parts.append(collect_reports(df, report_columns))
+            df = drop_seen_rows(df, seen_rows) if streaming else df.drop_duplicates()
+            df = df.dropna(subset=["ubicacion"])
+            ingest_schedule_frame(df, occupancy, shadowed, progress, new_rooms)
+            if fingerprints is not None:
+                fingerprint_rows(df, fingerprints, order=row_order)
+
+        if reports is not None:
+            reports.update(merge_reports(report_parts))
+        progress("stats")
+        return build_schedule_data(occupancy, new_rooms or ()), None
+    except Exception as e:
+        return None, str(e)
+
+
+def build_schedule_data(occupancy, new_rooms=()):
+    """
+    Arma el resultado de process_schedule a partir del índice de ocupación.
+
+    Args:
+        occupancy (dict): Índice (sala, dia_norm, modulo) -> entrada
+        new_rooms (dict): Salas del Excel aún no registradas
+
+    Returns:
+        dict: {"stats", "schedule", "total_rooms", "total_courses"}
+    """
+    expanded_schedule = list(occupancy.values())
+    room_usage_counter = count_room_usage(occupancy, new_rooms)
+
+    room_stats = []
+
+    for sala, count in room_usage_counter.items():
+        room_stats.append(room_stat(sala, count))
+
+    room_stats.sort(key=lambda x: x["sala"])
+
+    return {
+        "stats": room_stats,
+        "schedule": expanded_schedule,
+        "total_rooms": len(room_stats),
+        "total_courses": len(expanded_schedule),
+    }
+
+
+# ===================================
+# INGESTA PARALELA (VARIAS HOJAS O ARCHIVOS)
+# ===================================
+# Cada hoja se lee, normaliza y expande en un proceso aparte; el proceso
+# principal solo combina los resultados parciales en orden (hoja por hoja,
+# archivo por archivo), igual que si todas las filas vinieran en una sola
+# hoja. Se usa "spawn" porque el servidor ya tiene hilos corriendo.
+INGEST_MAX_WORKERS = os.cpu_count() or 1
+_ingest_pool = None
+_ingest_pool_lock = threading.Lock()
+
+
+def get_ingest_pool():
+    """Retorna el pool de procesos para la ingesta (se crea al primer uso)."""
+    global _ingest_pool
+    with _ingest_pool_lock:
+        if _ingest_pool is None:
+            _ingest_pool = ProcessPoolExecutor(
+                max_workers=INGEST_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _ingest_pool
+
+
+def list_schedule_sources(file_paths, all_sheets=False):
+    """
+    Hojas a procesar de uno o más archivos Excel.
+
+    Args:
+        file_paths (list): Rutas de los archivos, en el orden en que se subieron
+        all_sheets (bool): Procesar todas las hojas de cada archivo (si no,
+            solo la primera)
+
+    Returns:
+        list: Pares (ruta, hoja) en orden
+    """
+    sources = []
+    for path in file_paths:
+        if all_sheets:
+            with pd.ExcelFile(path) as book:
+                sources.extend((path, name) for name in book.sheet_names)
+        else:
+            sources.append((path, 0))
+    return sources
+
+
+def parse_schedule_sheet(file_path, sheet):
+    """
+    Lee, normaliza y expande una hoja. Se ejecuta en un proceso del pool.
+
+    Args:
+        file_path (str): Ruta del archivo Excel
+        sheet (int | str): Posición o nombre de la hoja
+
+    Returns:
+        dict | None: Resultado parcial, o None si la hoja no tiene las
+            columnas NOMBRE y SALA:
+            - rooms: salas de la hoja en orden de aparición
+            - row_hashes: hash de cada fila (para descartar filas repetidas
+              entre hojas y calcular las huellas del modo delta)
+            - groups: (nrc, seccion) de cada fila
+            - expanded: bloques expandidos; su índice es la posición de la fila
+            - reports: parciales de los reportes (ver collect_reports)
+    """
+    df = normalize_columns(pd.read_excel(file_path, sheet_name=sheet))
+    if "nombre_asignatura" not in df.columns or "ubicacion" not in df.columns:
+        return None
+    partial_reports = collect_reports(df, report_columns)
+    df = df.drop_duplicates().dropna(subset=["ubicacion"]).reset_index(drop=True)
+    return {
+        "reports": partial_reports,
+        "rooms": _text_column(df, "ubicacion").unique().tolist(),
+        "row_hashes": row_hashes(df),
+        "groups": _group_keys(df),
+        "expanded": expand_schedule_frame(df),
+    }
+
+
+def process_schedule_sources(sources, fingerprints=None, shadowed=None, progress=ignore_progress,
+                             new_rooms=None, reports=None, row_order=None):
+    """
+    Procesa varias hojas (de uno o más archivos) como un solo horario.
+
+    Las hojas se procesan en paralelo con parse_schedule_sheet y se combinan
+    en orden: las filas repetidas en hojas posteriores se descartan y, si dos
+    clases piden el mismo bloque, gana la que aparece primero.
+
+    Args:
+        sources (list): Pares (ruta, hoja) de list_schedule_sources
+        fingerprints (dict | None): Ver process_schedule
+        shadowed (list | None): Ver process_schedule
+        progress (callable): Ver process_schedule
+        new_rooms (dict | None): Ver process_schedule
+        reports (dict | None): Ver process_schedule
+        row_order (list | None): Ver process_schedule
+
+    Returns:
+        tuple: (datos, None) si todo salió bien, o (None, mensaje_error)
+    """
+    try:
+        progress("read")
+        if len(sources) == 1:
+            parts = [parse_schedule_sheet(*sources[0])]
+        else:
+            pool = get_ingest_pool()
+            futures = [pool.submit(parse_schedule_sheet, path, sheet) for path, sheet in sources]
+            parts = [future.result() for future in futures]
+        parts = [part for part in parts if part is not None]
+        if not parts:
+            return None, "Faltan columnas NOMBRE o SALA."
+
+        if reports is not None:
+            reports.update(merge_reports([part["reports"] for part in parts]))
+
+        progress("dedupe")
+        occupancy = {}
+        seen_rows = set()
+        for part in parts:
+            register_unknown_rooms(part["rooms"], new_rooms)
+            keep = np.ones(len(part["row_hashes"]), dtype=bool)
+            for pos, (row_hash, group) in enumerate(zip(part["row_hashes"], part["groups"])):
+                if row_hash in seen_rows:
+                    keep[pos] = False
+                    continue
+                seen_rows.add(row_hash)
+                if fingerprints is not None:
+                    fingerprints[group] = fingerprints.get(group, 0) ^ row_hash
+                if row_order is not None:
+                    row_order.append(row_hash)
+            expanded = part["expanded"]
+            claim_slots(expanded[keep[expanded.index.to_numpy()]], occupancy, shadowed)
+
+        progress("stats")
+        return build_schedule_data(occupancy, new_rooms or ()), None
+    except Exception as e:
+        return None, str(e)
+
+
+# ===================================
+# INGESTA INCREMENTAL (DELTA)
+# ===================================
+
+def _group_keys(df):
+    """Grupo (nrc, seccion) de cada fila, con los mismos valores que sus bloques."""
+    return list(zip(_nrc_column(df), _seccion_column(df)))
+
+
+def row_hashes(df):
+    """
+    Hash de cada fila sobre el texto de sus celdas.
+
+    El texto es str(valor), el mismo formato de las entradas del horario
+    (ver _clean_values), y la lectura por bloques entrega los mismos tipos
+    que pd.read_excel: una fila tiene el mismo hash se haya leído el archivo
+    completo, por bloques o por hojas.
+
+    Returns:
+        list: Un entero por fila
+    """
+    text = pd.DataFrame({pos: _clean_values(df.iloc[:, pos], str) for pos in range(df.shape[1])})
+    return pd.util.hash_pandas_object(text, index=False).tolist()
+
+
+def fingerprint_rows(df, fingerprints, groups=None, order=None):
+    """
+    Acumula la huella de las filas de un DataFrame por grupo (nrc, seccion).
+
+    La huella de un grupo es el XOR de los hashes de sus filas, por lo que no
+    depende del orden de las filas ni de cómo se repartieron en bloques. Las
+    filas llegan sin duplicados, así que dos filas nunca se anulan entre sí.
+    El orden se guarda aparte, en order (ver _moved_groups).
+
+    Args:
+        df (DataFrame): Filas normalizadas (archivo completo o un bloque)
+        fingerprints (dict): (nrc, seccion) -> huella, se modifica
+        groups (list | None): Resultado de _group_keys(df), si ya se calculó
+        order (list | None): Si se entrega, recibe el hash de cada fila en orden
+    """
+    if df.empty:
+        return
+    if groups is None:
+        groups = _group_keys(df)
+    hashes = row_hashes(df)
+    for group, row_hash in zip(groups, hashes):
+        fingerprints[group] = fingerprints.get(group, 0) ^ row_hash
+    if order is not None:
+        order.extend(hashes)
+
+
+def _moved_groups(order, groups, reprocess):
+    """
+    Grupos sin cambios cuyas filas cambiaron de lugar respecto del Excel anterior.
+
+    Mover una fila no cambia la huella de su grupo, pero sí puede cambiar qué
+    clase gana un bloque en disputa. Entre las filas de los grupos que no se
+    reprocesan, las de la subsecuencia creciente más larga de sus posiciones
+    en ROW_ORDER conservan su orden relativo entre sí; todo par de filas que
+    se invirtió incluye al menos una fila fuera de ella, y basta con
+    reprocesar los grupos de esas filas.
+
+    Args:
+        order (list): Hash de cada fila del Excel nuevo, en orden
+        groups (list): (nrc, seccion) de cada fila del Excel nuevo
+        reprocess (set): Grupos que ya se reprocesan (nuevos o modificados)
+
+    Returns:
+        set: Grupos (nrc, seccion) que se deben reprocesar por orden
+    """
+    stable = [(row_hash, group) for row_hash, group in zip(order, groups) if group not in reprocess]
+    stable_rows = {row_hash for row_hash, _ in stable}
+    previous = {}
+    for row_hash in ROW_ORDER:
+        if row_hash in stable_rows:
+            previous.setdefault(row_hash, len(previous))
+    if len(previous) != len(stable):
+        return {group for _, group in stable}
+
+    # Subsecuencia creciente más larga de las posiciones anteriores (O(n log n))
+    tails, tail_at, parent = [], [], [None] * len(stable)
+    for pos, (row_hash, _) in enumerate(stable):
+        old = previous[row_hash]
+        k = bisect.bisect_left(tails, old)
+        if k:
+            parent[pos] = tail_at[k - 1]
+        if k == len(tails):
+            tails.append(old)
+            tail_at.append(pos)
+        else:
+            tails[k] = old
+            tail_at[k] = pos
+    kept = set()
+    pos = tail_at[-1] if tail_at else None
+    while pos is not None:
+        kept.add(pos)
+        pos = parent[pos]
+    return {group for pos, (_, group) in enumerate(stable) if pos not in kept}
+
+
+def _expand_with_labels(df):
+    """Expande df y retorna pares (etiqueta de la fila de origen, entrada)."""
+    expanded = expand_schedule_frame(df)
+    return list(zip(expanded.index.tolist(), schedule_records(expanded)))
+
+
+def apply_schedule_delta(file_path):
+    """
+    Aplica sobre el horario cargado solo las diferencias de un Excel revisado.
+
+    Compara la huella de cada grupo (nrc, seccion) con la del Excel anterior:
+    los grupos nuevos o modificados se vuelven a expandir, los eliminados o
+    modificados se retiran, y solo se recalculan los bloques y las
+    estadísticas de las salas afectadas. Los choques en un mismo bloque se
+    resuelven como en process_schedule: gana la fila que aparece primero en
+    el Excel nuevo. Por eso los grupos sin cambios cuyas filas cambiaron de
+    lugar también se reprocesan (ver _moved_groups).
+
+    Args:
+        file_path (str): Ruta del Excel revisado
+
+    Returns:
+        tuple: (cambios, None) si todo salió bien, o (None, mensaje_error).
+            cambios = {
+                "summary": {"added": n, "changed": n, "removed": n, "moved": n},
+                "upserted": [entradas nuevas o reemplazadas de la vista combinada],
+                "released": [{"ubicacion", "dia_norm", "modulo"} de bloques liberados],
+                "stats": [filas de estadísticas de las salas afectadas],
+            }
+    """
+    try:
+        df = load_normalized_workbook(file_path).drop_duplicates()
+        if "nombre_asignatura" not in df.columns or "ubicacion" not in df.columns:
+            return None, "Faltan columnas NOMBRE o SALA."
+        df = df.dropna(subset=["ubicacion"])
+
+        groups = _group_keys(df)
+        fingerprints, order = {}, []
+        fingerprint_rows(df, fingerprints, groups, order)
+        added = fingerprints.keys() - ROW_FINGERPRINTS.keys()
+        removed = ROW_FINGERPRINTS.keys() - fingerprints.keys()
+        changed = {
+            group
+            for group in fingerprints.keys() & ROW_FINGERPRINTS.keys()
+            if fingerprints[group] != ROW_FINGERPRINTS[group]
+        }
+
+        moved = _moved_groups(order, groups, added | changed)
+        reprocess = added | changed | moved
+
+        # Expandir solo las filas de los grupos nuevos o modificados
+        fresh_rows = df[[g in reprocess for g in groups]]
+        register_unknown_rooms(_text_column(fresh_rows, "ubicacion").unique())
+        fresh = _expand_with_labels(fresh_rows)
+
+        # Bloques afectados: los que tenían los grupos retirados, modificados o
+        # movidos y los que piden sus filas nuevas
+        touched = set()
+        for group in removed | changed | moved:
+            touched.update(FILE_GROUPS.pop(group, ()))
+        for _, entry in fresh:
+            slot = occupancy_key(entry)
+            touched.add(slot)
+            FILE_GROUPS.setdefault((entry["nrc"], entry["seccion"]), []).append(slot)
+
+        # Los grupos sin cambios que disputan esos bloques se vuelven a
+        # expandir solo para ordenar a todos según su fila en el Excel nuevo
+        neighbours = {
+            (e["nrc"], e["seccion"]) for slot in touched for e in FILE_SLOTS.get(slot, ())
+        } - reprocess - removed
+        contenders = fresh
+        if neighbours:
+            contenders = fresh + _expand_with_labels(df[[g in neighbours for g in groups]])
+        by_slot = {}
+        for _, entry in sorted(contenders, key=lambda c: c[0]):
+            slot = occupancy_key(entry)
+            if slot in touched:
+                by_slot.setdefault(slot, []).append(entry)
+
+        usage_delta = {}
+        for slot in touched:
+            had_entry = slot in FILE_SLOTS
+            entries = by_slot.get(slot)
+            if entries:
+                FILE_SLOTS[slot] = entries
+            else:
+                FILE_SLOTS.pop(slot, None)
+            if had_entry != bool(entries):
+                usage_delta[slot[0]] = usage_delta.get(slot[0], 0) + (1 if entries else -1)
+
+        ROW_FINGERPRINTS.clear()
+        ROW_FINGERPRINTS.update(fingerprints)
+        ROW_ORDER[:] = order
+        CURRENT_DATA["schedule"] = [entries[0] for entries in FILE_SLOTS.values()]
+        CURRENT_DATA["total_courses"] = len(CURRENT_DATA["schedule"])
+
+        # Parchar las estadísticas de las salas afectadas (y las salas nuevas)
+        stats_by_room = {stat["sala"]: stat for stat in CURRENT_DATA["stats"]}
+        changed_stats = []
+        for sala in ROOM_DATABASE:
+            if sala not in stats_by_room:
+                usage_delta.setdefault(sala, 0)
+        for sala, delta in usage_delta.items():
+            previous = stats_by_room.get(sala)
+            count = (previous["ocupados"] if previous else 0) + delta
+            if previous is not None and delta == 0:
+                continue
+            stat = room_stat(sala, count)
+            if previous is None:
+                CURRENT_DATA["stats"].append(stat)
+            else:
+                previous.update(stat)
+                stat = previous
+            changed_stats.append(stat)
+        if len(CURRENT_DATA["stats"]) != len(stats_by_room):
+            CURRENT_DATA["stats"].sort(key=lambda x: x["sala"])
+        CURRENT_DATA["total_rooms"] = len(CURRENT_DATA["stats"])
+        VIEW_CHANGES["summary"] = True
+
+        # Actualizar la vista combinada bloque a bloque
+        for slot in touched:
+            resolve_slot(slot)
+
+        return {
+            "summary": {
+                "added": len(added),
+                "changed": len(changed),
+                "removed": len(removed),
+                "moved": len(moved),
+            },
+            "upserted": [OCCUPANCY_INDEX[slot] for slot in touched if slot in OCCUPANCY_INDEX],
+            "released": [
+                {"ubicacion": slot[0], "dia_norm": slot[1], "modulo": slot[2]}
+                for slot in touched
+                if slot not in OCCUPANCY_INDEX
+            ],
+            "stats": sorted(changed_stats, key=lambda x: x["sala"]),
+        }, None
+    except Exception as e:
+        return None, str(e)
+
+
+# ===================================
+# REPORTES MATERIALIZADOS
+# ===================================
+# Los reportes se calculan durante la ingesta sobre los mismos DataFrames
+# que se expanden (ver reports.py) y quedan en REPORT_FACTS. Reciben las
+# filas tal como vienen del Excel: también las que no tienen sala.
+
+def report_columns(df):
+    """
+    Caché de columnas limpias de un DataFrame, compartida por los reportes.
+
+    Returns:
+        callable: column(nombre, default="", clean=str.strip) -> Serie,
+        equivalente a _text_column pero calculada una sola vez por DataFrame.
+        clean forma parte de la llave de la caché: debe ser una función del
+        módulo (una lambda nueva en cada llamada nunca reutiliza la columna).
+    """
+    cache = {}
+
+    def column(name, default="", clean=str.strip):
+        key = (name, default, clean)
+        if key not in cache:
+            cache[key] = _text_column(df, name, default, clean)
+        return cache[key]
+
+    return column
+
+
+def _with_room(df):
+    """Máscara de las filas con sala (las que se expanden al horario)."""
+    if "ubicacion" not in df.columns:
+        return pd.Series(False, index=df.index)
+    return df["ubicacion"].notna()
+
+
+def _without_room(df, columns):
+    """Máscara (ndarray) de las filas sin sala asignada (ubicacion vacía o inválida)."""
+    if "ubicacion" not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    ubicacion = columns("ubicacion")
+    return (df["ubicacion"].isna() | (ubicacion == "") | (ubicacion.str.lower() == "nan")).to_numpy()
+
+
+def collect_unassigned_nrcs(df, columns):
+    """NRCs sin sala asignada (ubicacion vacía o inválida), en orden del Excel."""
+    unassigned = _without_room(df, columns)
+    if not unassigned.any():
+        return []
+    nrc = columns("nrc", clean=_strip_decimal)[unassigned]
+    rows = pd.DataFrame({
+        "nrc": nrc,
+        "seccion": columns("seccion")[unassigned],
+        "materia": columns("nombre_asignatura", "Sin Nombre")[unassigned],
+        "codigo_materia": columns("codigo_materia")[unassigned],
+        "n_curso": columns("n_curso")[unassigned],
+        "componente": columns("componente")[unassigned],
+        "carrera": columns("carrera")[unassigned],
+    })
+    return rows[(nrc.str.lower() != "nan") & (nrc != "")].to_dict("records")
+
+
+def collect_unassigned_blocks(df, columns):
+    """
+    Clases sin sala con sus vacantes y los bloques que ocuparían (la demanda
+    que resuelve /auto_assign). NRC y sección se limpian como en el horario.
+
+    Returns:
+        list: [nrc, seccion, materia, codigo_materia, componente, carrera,
+        vacantes, bloques] por fila, con bloques = [[dia, modulo], ...]
+    """
+    unassigned = _without_room(df, columns)
+    if not unassigned.any():
+        return []
+    rows = df[unassigned]
+    day_masks = _day_flags(rows) @ (1 << np.arange(len(SCHEDULE_DAYS)))
+    vacantes = rows["vacantes"].map(_safe_int) if "vacantes" in rows.columns else pd.Series(0, index=rows.index)
+    fields = zip(
+        columns("nrc", clean=_clean_nrc)[unassigned],
+        columns("seccion", clean=_clean_seccion)[unassigned],
+        columns("nombre_asignatura", "Sin Nombre")[unassigned],
+        columns("codigo_materia")[unassigned],
+        columns("componente")[unassigned],
+        columns("carrera")[unassigned],
+        vacantes,
+        columns("inicio", clean=_strip_decimal)[unassigned],
+        columns("fin", clean=_strip_decimal)[unassigned],
+        day_masks,
+    )
+    result = []
+    for nrc, seccion, materia, codigo, componente, carrera, cupo, inicio, fin, day_mask in fields:
+        if nrc == "?":
+            continue
+        modulos = get_affected_modules(inicio, fin)
+        bloques = [
+            [day, modulo]
+            for pos, day in enumerate(SCHEDULE_DAYS) if day_mask >> pos & 1
+            for modulo in modulos
+        ]
+        result.append([nrc, seccion, materia, codigo, componente, carrera, int(cupo), bloques])
+    return result
+
+
+def merge_unassigned_blocks(partials):
+    """
+    Une las filas sin sala por grupo, componente y bloques (el Excel repite
+    la clase una vez por carrera): vacantes máximas y carreras sin repetir.
+    """
+    merged = {}
+    for partial in partials:
+        for nrc, seccion, materia, codigo, componente, carrera, vacantes, bloques in partial:
+            key = (nrc, seccion, componente, tuple(map(tuple, bloques)))
+            row = merged.get(key)
+            if row is None:
+                row = merged[key] = {
+                    "nrc": nrc,
+                    "seccion": seccion,
+                    "materia": materia,
+                    "codigo_materia": codigo,
+                    "componente": componente,
+                    "carreras": [],
+                    "vacantes": vacantes,
+                    "bloques": bloques,
+                }
+            row["vacantes"] = max(row["vacantes"], vacantes)
+            if carrera and carrera.lower() not in ("nan", "none") and carrera not in row["carreras"]:
+                row["carreras"].append(carrera)
+    return list(merged.values())
+
+
+# Campos que agrupan el reporte sin docente (todos salvo la carrera)
+NO_TEACHER_FIELDS = [
+    "nrc", "seccion", "materia", "codigo_materia", "n_curso", "componente",
+    "ubicacion", "horario", "dias",
+]
+# Texto de la columna "dias" para cada combinación de días (bit = posición en SCHEDULE_DAYS)
+DAY_LABELS = np.array([
+    ", ".join(day.capitalize() for pos, day in enumerate(SCHEDULE_DAYS) if mask >> pos & 1)
+    for mask in range(1 << len(SCHEDULE_DAYS))
+], dtype=object)
+
+
+def collect_rooms_without_teacher(df, columns):
+    """
+    Asignaturas con 'SIN DOCENTE' en prof_nombre, agrupadas por todos los
+    campos salvo la carrera.
+
+    Returns:
+        dict: "groups" (valores de NO_TEACHER_FIELDS de cada grupo, en orden
+        de aparición) y "carreras" (pares grupo + carrera válida, sin repetir)
+    """
+    if "prof_nombre" not in df.columns:
+        return {"groups": [], "carreras": []}
+    picked = (columns("prof_nombre").str.upper() == "SIN DOCENTE").to_numpy()
+    if not picked.any():
+        return {"groups": [], "carreras": []}
+
+    # Días de cada fila: una máscara de bits por fila y un texto por máscara
+    day_masks = _day_flags(df[picked]) @ (1 << np.arange(len(SCHEDULE_DAYS)))
+    inicio = columns("inicio", clean=_strip_decimal)[picked]
+    fin = columns("fin", clean=_strip_decimal)[picked]
+    rows = pd.DataFrame({
+        "nrc": columns("nrc", clean=_clean_nrc)[picked],
+        "seccion": columns("seccion")[picked],
+        "materia": columns("nombre_asignatura", "Sin Nombre")[picked],
+        "codigo_materia": columns("codigo_materia")[picked],
+        "n_curso": columns("n_curso")[picked],
+        "componente": columns("componente")[picked],
+        "ubicacion": columns("ubicacion", "Sin Sala")[picked],
+        "horario": inicio + " - " + fin,
+        "dias": DAY_LABELS[day_masks],
+        "carrera": columns("carrera")[picked],
+    })
+
+    carrera = rows["carrera"]
+    valid = (carrera != "") & ~carrera.str.lower().isin(("nan", "none"))
+    return {
+        "groups": rows[NO_TEACHER_FIELDS].drop_duplicates().values.tolist(),
+        "carreras": rows[valid].drop_duplicates().values.tolist(),
+    }
+
+
+def merge_rooms_without_teacher(partials):
+    """
+    Une los grupos de varios DataFrames y arma las filas del reporte: las
+    carreras de cada grupo se ordenan y se unen con ", " ("-" si no hay).
+    """
+    groups = pd.DataFrame(
+        [g for partial in partials for g in partial["groups"]], columns=NO_TEACHER_FIELDS, dtype=object
+    ).drop_duplicates()
+    carreras = pd.DataFrame(
+        [c for partial in partials for c in partial["carreras"]],
+        columns=NO_TEACHER_FIELDS + ["carrera"], dtype=object,
+    ).drop_duplicates()
+
+    joined = (
+        carreras.sort_values("carrera", kind="stable")
+        .groupby(NO_TEACHER_FIELDS, sort=False)["carrera"]
+        .agg(", ".join)
+    )
+    result = groups.join(joined, on=NO_TEACHER_FIELDS)
+    result["carrera"] = result["carrera"].fillna("-")
+
+    # Sort by NRC and section for consistent ordering
+    result = result.sort_values(["nrc", "seccion"], kind="stable")
+    return result.to_dict("records")
+
+
+def collect_room_demand(df, columns):
+    """
+    Clases con sala del Excel: (sala, nrc, seccion, asignatura, vacantes),
+    una por grupo y sala (la primera fila que aparece).
+    """
+    rows = df[_with_room(df)]
+    if rows.empty:
+        return []
+    vacantes = rows["vacantes"].map(_safe_int) if "vacantes" in rows.columns else pd.Series(0, index=rows.index)
+    demand = pd.DataFrame({
+        "sala": columns("ubicacion", "Sin Sala")[rows.index],
+        "nrc": _nrc_column(rows),
+        "seccion": _seccion_column(rows),
+        "materia": columns("nombre_asignatura", "Sin Nombre")[rows.index],
+        "vacantes": vacantes,
+    }).drop_duplicates(subset=["sala", "nrc", "seccion"])
+    return demand.values.tolist()
+
+
+def merge_room_demand(partials):
+    """Une las clases de varios DataFrames (sin repetir grupo y sala)."""
+    seen = set()
+    merged = []
+    for partial in partials:
+        for sala, nrc, seccion, materia, vacantes in partial:
+            if (sala, nrc, seccion) not in seen:
+                seen.add((sala, nrc, seccion))
+                merged.append([sala, nrc, seccion, materia, int(vacantes)])
+    return merged
+
+
+def finish_rooms_over_capacity(demand, rooms):
+    """Clases cuyas vacantes superan la capacidad de su sala, de mayor a menor exceso."""
+    result = []
+    for sala, nrc, seccion, materia, vacantes in demand:
+        cap = rooms.get(sala, {}).get("cap", 0)
+        if cap > 0 and vacantes > cap:
+            result.append({
+                "sala": sala,
+                "nrc": nrc,
+                "seccion": seccion,
+                "materia": materia,
+                "vacantes": vacantes,
+                "capacidad": cap,
+                "exceso": vacantes - cap,
+            })
+    result.sort(key=lambda x: (-x["exceso"], x["sala"], x["nrc"], x["seccion"]))
+    return result
+
+
+def finish_unknown_rooms(demand, rooms):
+    """Salas del Excel que no estaban en la base y se registraron como "Desconocida"."""
+    by_room = {}
+    for sala, nrc, seccion, _, _ in demand:
+        details = rooms.get(sala)
+        if details is not None and details["cat"] != "Desconocida":
+            continue
+        room = by_room.setdefault(sala, {"sala": sala, "clases": 0, "nrcs": set(), "registrada": details is not None})
+        room["clases"] += 1
+        room["nrcs"].add(nrc)
+    result = []
+    for room in by_room.values():
+        result.append(dict(room, nrcs=sorted(room["nrcs"])))
+    result.sort(key=lambda x: x["sala"])
+    return result
+
+
+register_report(
+    "unassigned_nrcs", collect_unassigned_nrcs,
+    description="NRCs sin sala asignada",
+)
+register_report(
+    "unassigned_blocks", collect_unassigned_blocks, merge=merge_unassigned_blocks,
+    description="Clases sin sala con sus bloques y vacantes (demanda de /auto_assign)",
+)
+register_report(
+    "rooms_without_teacher", collect_rooms_without_teacher, merge=merge_rooms_without_teacher,
+    description="Asignaturas con 'SIN DOCENTE'",
+)
+register_report(
+    "rooms_over_capacity", collect_room_demand, merge=merge_room_demand,
+    finish=finish_rooms_over_capacity, uses_rooms=True,
+    description="Clases con más vacantes que la capacidad de su sala",
+)
+register_report(
+    "unknown_rooms", finish=finish_unknown_rooms, uses_rooms=True, facts_from="rooms_over_capacity",
+    description="Salas del Excel registradas automáticamente como 'Desconocida'",
+)
+
+
+def compute_reports(frames):
+    """
+    Calcula los hechos de todos los reportes sobre DataFrames normalizados.
+
+    Args:
+        frames (iterable): DataFrames en orden (sin descartar filas)
+
+    Returns:
+        dict: {nombre: hechos} (ver reports.merge_reports)
+    """
+    return merge_reports([collect_reports(df, report_columns) for df in frames])
+
+
+# ===================================
+# VISTA COMBINADA Y PERSISTENCIA
+# ===================================
+
+def refresh_merged_view(shadowed=()):
+    """
+    Combina el horario del Excel con las asignaciones manuales y eliminaciones.
+
+    Reconstruye FILE_SLOTS y OCCUPANCY_INDEX (y sus índices derivados) para
+    que reflejen la vista combinada: archivo - eliminadas + asignaciones
+    manuales. Solo se usa al cargar un Excel o restaurar el estado guardado; las
+    asignaciones y eliminaciones posteriores actualizan la vista bloque a
+    bloque con resolve_slot.
+
+    Args:
+        shadowed (list): Entradas del Excel que chocaron con un bloque ya
+            ocupado (ver process_schedule)
+    """
+    FILE_SLOTS.clear()
+    FILE_GROUPS.clear()
+    for s in CURRENT_DATA["schedule"]:
+        slot = occupancy_key(s)
+        FILE_SLOTS.setdefault(slot, []).append(s)
+        FILE_GROUPS.setdefault((s["nrc"], s["seccion"]), []).append(slot)
+    for s in shadowed:
+        slot = occupancy_key(s)
+        FILE_SLOTS.setdefault(slot, []).append(s)
+        FILE_GROUPS.setdefault((s["nrc"], s["seccion"]), []).append(slot)
+    schedule = [s for s in CURRENT_DATA["schedule"] if overlay_key(s) not in DELETED_ENTRIES]
+    schedule.extend(EXTRA_SCHEDULE.values())
+    rebuild_occupancy(schedule)
+
+
+def _index_keys_copy(touched):
+    """
+    Función copy de shared_copy para un índice secundario: el conjunto de
+    llaves de cada valor también se publica con shared_copy.
+
+    Args:
+        touched (dict | None): Valor -> llaves que entraron o salieron de su
+            conjunto. None copia los conjuntos completos.
+    """
+    def copy(value, keys, published):
+        return shared_copy(published, keys, None if touched is None else touched[value])
+    return copy
+
+
+def build_rooms_view():
+    """
+    Vista inmutable del estado de salas para los lectores (ver state.read_view).
+
+    Parte de la vista anterior y copia solo lo que anotaron los escritores en
+    VIEW_CHANGES (ver state.shared_copy): las partes de "occupancy" y
+    "bitmaps" con bloques o salas modificados y, en "indexes", los valores
+    y llaves de esos bloques; "order" solo saca o inserta esos bloques.
+    ROOM_DATABASE y el resumen se copian solo si cambiaron. Las entradas del
+    horario se comparten porque nunca se modifican.
+
+    Returns:
+        dict: "current_data" (resumen del último Excel sin el horario, o
+        None), "occupancy", "order" (ver schedule_order), "bitmaps",
+        "indexes", "room_database", "tensor" y "reports" (hechos de los
+        reportes, o None)
+    """
+    global VIEW_CHANGES, ROOMS_VIEW
+    previous, changes = ROOMS_VIEW, VIEW_CHANGES
+    VIEW_CHANGES = {"all": False, "slots": {}, "rooms": False, "summary": False}
+    full = previous is None or changes["all"]
+
+    if full or changes["summary"]:
+        summary = None
+        if CURRENT_DATA is not None:
+            summary = {k: v for k, v in CURRENT_DATA.items() if k != "schedule"}
+            summary["stats"] = [dict(stat) for stat in CURRENT_DATA["stats"]]
+    else:
+        summary = previous["current_data"]
+
+    if full or changes["rooms"]:
+        room_database = {sala: dict(details) for sala, details in ROOM_DATABASE.items()}
+    else:
+        room_database = previous["room_database"]
+
+    if full:
+        occupancy = shared_copy(None, OCCUPANCY_INDEX, ordered=True)
+        order = schedule_order(live=OCCUPANCY_INDEX)
+        bitmaps = shared_copy(None, ROOM_BITMAPS)
+        indexes = {
+            field: shared_copy(None, index, copy=_index_keys_copy(None))
+            for field, index in SCHEDULE_INDEXES.items()
+        }
+    else:
+        slots = changes["slots"]
+        occupancy = shared_copy(previous["occupancy"], OCCUPANCY_INDEX, slots, ordered=True)
+        order = schedule_order(previous, OCCUPANCY_INDEX, slots)
+        bitmaps = shared_copy(previous["bitmaps"], ROOM_BITMAPS, {key[0] for key in slots})
+        indexes = {}
+        for field, index in SCHEDULE_INDEXES.items():
+            # Valor del campo -> llaves que entraron o salieron de su conjunto
+            touched = {}
+            for key in slots:
+                for entry in (previous["occupancy"].get(key), OCCUPANCY_INDEX.get(key)):
+                    if entry is not None:
+                        touched.setdefault(entry.get(field), set()).add(key)
+            indexes[field] = shared_copy(
+                previous["indexes"][field], index, touched, copy=_index_keys_copy(touched)
+            )
+
+    tensor = occupancy_tensor()
+    ROOMS_VIEW = {
+        "current_data": summary,
+        "occupancy": occupancy,
+        "order": order,
+        "bitmaps": bitmaps,
+        "indexes": indexes,
+        "room_database": room_database,
+        "tensor": {k: tensor[k] for k in ("rooms", "tensor", "cap", "cat")},
+        "reports": REPORT_FACTS,
+    }
+    return ROOMS_VIEW
+
+
+def current_view(view, include_schedule=True, columnar=False):
+    """
+    Datos del último Excel procesado con el horario combinado.
+
+    Args:
+        view (dict): Vista publicada (read_view("rooms"))
+        include_schedule (bool): Incluir la lista completa de bloques. El
+            frontend la omite y consulta /schedule solo por lo que muestra.
+        columnar (bool): Enviar el horario en formato columnar (ver wire_format)
+
+    Returns:
+        dict: Mismo formato que process_schedule
+    """
+    data = dict(view["current_data"])
+    if include_schedule:
+        schedule = list(view["occupancy"].values())
+        data["schedule"] = encode_columnar(schedule) if columnar else schedule
+    return data
+
+
+def save_schedule_state():
+    """Guarda en la base el horario del último Excel, sus huellas, el orden de sus filas y las salas nuevas."""
+    global SCHEDULE_GENERATION
+    data = {k: v for k, v in CURRENT_DATA.items() if k != "schedule"}
+    SCHEDULE_GENERATION = storage.save_schedule(
+        data,
+        CURRENT_DATA["schedule"],
+        [e for entries in FILE_SLOTS.values() for e in entries[1:]],
+        ROW_FINGERPRINTS,
+        {sala: details for sala, details in ROOM_DATABASE.items() if sala in UNSAVED_ROOMS},
+        REPORT_FACTS,
+        ROW_ORDER,
+        MULTI_SOURCE,
+    )
+    UNSAVED_ROOMS.clear()
+
+
+def restore_rooms_state():
+    """
+    Restaura el estado guardado en la base (salas, asignaciones manuales,
+    eliminaciones y último Excel procesado).
+
+    La primera vez guarda la base de salas inicial de ROOM_DATABASE.
+
+    Returns:
+        bool: True si había un Excel procesado que restaurar
+    """
+    global CURRENT_DATA, SCHEDULE_GENERATION, REPORT_FACTS, MULTI_SOURCE
+    try:
+        rooms = storage.load_rooms()
+        if rooms is None:
+            storage.save_rooms(ROOM_DATABASE)
+        else:
+            ROOM_DATABASE.clear()
+            ROOM_DATABASE.update(rooms)
+            UNSAVED_ROOMS.clear()
+            room_database_changed()
+
+        extra, deleted = storage.load_overlays()
+        DELETED_ENTRIES.clear()
+        DELETED_ENTRIES.update((overlay_key(d), d) for d in deleted)
+        EXTRA_SCHEDULE.clear()
+        EXTRA_SLOTS.clear()
+        for entry in extra:
+            if overlay_key(entry) not in DELETED_ENTRIES:
+                add_extra_entry(entry)
+
+        saved = storage.load_schedule()
+        SCHEDULE_GENERATION = storage.load_state("schedule_generation")
+        REPORT_FACTS = storage.load_state("reports")
+        ROW_ORDER[:] = storage.load_state("row_order") or []
+        MULTI_SOURCE = storage.load_state("multi_source", False)
+    except Exception as e:
+        current_app.logger.error("No se pudo restaurar el estado de salas: %s", e)
+        return False
+    if saved is None:
+        return False
+
+    summary, schedule, shadowed, fingerprints = saved
+    ROW_FINGERPRINTS.clear()
+    ROW_FINGERPRINTS.update(fingerprints)
+    CURRENT_DATA = dict(summary, schedule=schedule)
+    refresh_merged_view(shadowed)
+    return True
+
+
+def sync_rooms_state():
+    """
+    Pone la memoria al día con los cambios que otro proceso guardó en la base
+    (modo multiproceso, ver state.py).
+
+    Si cambió el horario del Excel se restaura todo; si no, se recargan las
+    salas y se aplican bloque a bloque solo las asignaciones manuales y
+    eliminaciones que difieren, como lo harían assign_subject y
+    delete_assignment.
+    """
+    global REPORT_FACTS
+    if storage.load_state("schedule_generation") != SCHEDULE_GENERATION:
+        restore_rooms_state()
+        return
+    if not facts_complete(REPORT_FACTS):
+        # Hechos calculados después por report_rows en otro proceso
+        REPORT_FACTS = storage.load_state("reports")
+
+    rooms = storage.load_rooms()
+    if rooms is not None and rooms != ROOM_DATABASE:
+        ROOM_DATABASE.clear()
+        ROOM_DATABASE.update(rooms)
+        UNSAVED_ROOMS.clear()
+        room_database_changed()
+
+    extra, deleted = storage.load_overlays()
+    deleted = {overlay_key(d): d for d in deleted}
+    extra = {overlay_key(e): e for e in extra if overlay_key(e) not in deleted}
+    touched = set()
+    for key in [k for k in EXTRA_SCHEDULE if extra.get(k) != EXTRA_SCHEDULE[k]]:
+        touched.add(occupancy_key(EXTRA_SCHEDULE[key]))
+        remove_extra_entry(key)
+    for key in [k for k in DELETED_ENTRIES if k not in deleted]:
+        touched.add(occupancy_key(DELETED_ENTRIES.pop(key)))
+    for key, entry in deleted.items():
+        if key not in DELETED_ENTRIES:
+            DELETED_ENTRIES[key] = entry
+            touched.add(occupancy_key(entry))
+    for key, entry in extra.items():
+        if key not in EXTRA_SCHEDULE:
+            add_extra_entry(entry)
+            touched.add(occupancy_key(entry))
+    for slot in touched:
+        resolve_slot(slot)
+
+
+register_view("rooms", build_rooms_view, reload=sync_rooms_state)
+
+
+@rooms_bp.record_once
+def _restore_on_startup(setup_state):
+    """Carga el estado guardado al registrar el blueprint en la app."""
+    # Los procesos del pool de ingesta vuelven a importar la app (spawn), pero
+    # no necesitan el estado
+    if multiprocessing.parent_process() is not None:
+        return
+    with setup_state.app.app_context():
+        load_view("rooms", restore_rooms_state)
+
+
+@rooms_bp.route("/upload", methods=["POST"])
+def upload_file():
+    # Se aceptan varios archivos en el campo "file" (uno por sede)
+    files = [f for f in request.files.getlist("file") if f.filename != ""]
+    if not files:
+        return jsonify({"error": "No file"}), 400
+    try:
+        # FIX: Usar current_app para obtener la config de la app principal
+        # Cada carga en su propia carpeta: una carga con el mismo nombre de
+        # archivo no pisa el que un trabajo en curso todavía está leyendo
+        upload_folder = current_app.config["UPLOAD_FOLDER"]
+        upload_dir, filepaths = save_uploads(files, upload_folder)
+        filepath = filepaths[0]
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    latest_path = os.path.join(upload_folder, "latest.xlsx")
+
+    # Varios archivos o todas las hojas: procesamiento en paralelo por hoja
+    all_sheets = request.args.get("sheets") == "all"
+    multi_source = len(filepaths) > 1 or all_sheets
+    # El modo delta compara con las huellas del horario anterior: no aplica si
+    # este o el anterior vienen de varios archivos u hojas (se procesa completo)
+    delta = request.args.get("mode") == "delta" and not multi_source
+    include_schedule = request.args.get("include_schedule") != "0"
+    columnar = wants_columnar(request)
+
+    # latest.xlsx (para los reportes) refleja el horario que se acaba de
+    # aplicar; no existe si ese horario vino de varios archivos u hojas
+    def keep_latest():
+        if multi_source:
+            if os.path.exists(latest_path):
+                os.remove(latest_path)
+            return
+        shutil.copyfile(filepath, latest_path)
+        # Registrar el hash de latest.xlsx: los reportes reutilizarán el
+        # DataFrame que process_schedule deja en la caché
+        workbook_fingerprint(latest_path)
+
+    def cleanup():
+        for path in filepaths:
+            WORKBOOK_FINGERPRINTS.pop(path, None)
+        discard_uploads(upload_dir)
+
+    def compute(progress):
+        # Modo delta: aplicar solo los cambios respecto del Excel anterior.
+        # Aquí solo se lee el libro (queda en caché); el delta se aplica en commit.
+        if delta and CURRENT_DATA is not None and ROW_FINGERPRINTS and ROW_ORDER and not MULTI_SOURCE:
+            progress("read")
+            return "delta", compute_reports([load_normalized_workbook(filepath)])
+        # El procesamiento corre fuera del lock de escritura: las salas
+        # nuevas se registran en commit
+        fingerprints, shadowed, new_rooms, reports, row_order = {}, [], {}, {}, []
+        if multi_source:
+            data, error = process_schedule_sources(
+                list_schedule_sources(filepaths, all_sheets),
+                fingerprints=fingerprints, shadowed=shadowed, progress=progress,
+                new_rooms=new_rooms, reports=reports, row_order=row_order,
+            )
+        else:
+            data, error = process_schedule(
+                filepath, fingerprints=fingerprints, shadowed=shadowed, progress=progress,
+                new_rooms=new_rooms, reports=reports, row_order=row_order,
+            )
+        if error:
+            raise ValueError(error)
+        return "full", (data, fingerprints, shadowed, new_rooms, reports, row_order)
+
+    def commit(value):
+        global CURRENT_DATA, REPORT_FACTS, MULTI_SOURCE
+        mode, processed = value
+        if mode == "delta":
+            with writer("rooms"):
+                changes, error = apply_schedule_delta(filepath)
+                if error:
+                    raise ValueError(error)
+                REPORT_FACTS = processed
+                save_schedule_state()
+                keep_latest()
+            if columnar:
+                changes["upserted"] = encode_columnar(changes["upserted"])
+            summary = read_view("rooms")["current_data"]
+            return {
+                "mode": "delta",
+                "total_rooms": summary["total_rooms"],
+                "total_courses": summary["total_courses"],
+                "changes": changes,
+            }
+
+        data, fingerprints, shadowed, new_rooms, reports, row_order = processed
+        with writer("rooms"):
+            register_unknown_rooms(new_rooms)
+            CURRENT_DATA = data
+            REPORT_FACTS = reports
+            ROW_FINGERPRINTS.clear()
+            ROW_FINGERPRINTS.update(fingerprints)
+            ROW_ORDER[:] = row_order
+            MULTI_SOURCE = multi_source
+            refresh_merged_view(shadowed)
+            save_schedule_state()
+            keep_latest()
+
+        data = current_view(read_view("rooms"), include_schedule, columnar)
+        data["mode"] = "full"
+        return data
+
+    # Modo asíncrono: responder de inmediato con el ID del trabajo (ver /jobs/<id>)
+    if request.args.get("async") == "1":
+        job_id = submit_job("rooms", UPLOAD_STAGES, compute, commit, cleanup)
+        return jsonify({"success": True, "job_id": job_id}), 202
+
+    try:
+        return jsonify({"success": True, "data": run_now("rooms", compute, commit, cleanup)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@rooms_bp.route("/current_data", methods=["GET"])
+def get_current_data():
+    """
+    Retorna el último horario procesado (combinado con los cambios manuales).
+
+    Permite que el frontend recupere los datos al abrir la página, incluso
+    después de reiniciar la aplicación (ver storage).
+
+    Query params:
+        include_schedule: "0" para omitir la lista de bloques (usar /schedule)
+        format: "columnar" para el formato compacto (ver wire_format)
+    """
+    view = read_view("rooms")
+    if view["current_data"] is None:
+        return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
+    include_schedule = request.args.get("include_schedule") != "0"
+    data = current_view(view, include_schedule, wants_columnar(request))
+    return jsonify({"success": True, "data": data})
+
+
+@rooms_bp.route("/add_room", methods=["POST"])
+def add_room():
+    data = request.json
+    new_room = data.get("room_name")
+    capacity = data.get("capacity", 30)
+    category = data.get("category", "Sala")
+    if new_room:
+        clean_name = new_room.strip().upper()
+        with writer("rooms"):
+            ROOM_DATABASE[clean_name] = {"cap": int(capacity), "cat": category}
+            room_database_changed()
+            storage.save_room(clean_name, ROOM_DATABASE[clean_name])
+        return jsonify({"success": True})
+    return jsonify({"error": "Nombre inválido"}), 400
+
+
+@rooms_bp.route("/delete_room", methods=["POST"])
+def delete_room():
+    data = request.json
+    room_to_delete = data.get("room_name")
+    with writer("rooms"):
+        if room_to_delete and room_to_delete in ROOM_DATABASE:
+            del ROOM_DATABASE[room_to_delete]
+            room_database_changed()
+            storage.delete_room(room_to_delete)
+            return jsonify({"success": True})
+    return jsonify({"error": "Sala no encontrada"}), 404
+
+
+def manual_entry(data):
+    """
+    Entrada del horario para una asignación manual.
+
+    Args:
+        data (dict): "nrc", "seccion", "dia", "modulo" y "sala"; opcionales
+            "materia", "codigo", "carrera" y "componente"
+
+    Returns:
+        dict: Entrada con type "manual" y profesor "Por Asignar"
+    """
+    return {
+        "materia": data.get("materia", "Asignatura Manual"),
+        "codigo_materia": data.get("codigo", ""),
+        "ubicacion": data["sala"],
+        "carrera": data.get("carrera", ""),
+        "nrc": data["nrc"],
+        "seccion": data["seccion"],
+        "n_curso": "",
+        "componente": data.get("componente", ""),
+        "fecha_ini": "",
+        "fecha_term": "",
+        "profesor": "Por Asignar",
+        "tiempo": "",
+        "modulo": int(data["modulo"]),
+        "dia_norm": data["dia"],
+        "type": "manual",
+    }
+
+
+def apply_manual_entry(entry):
+    """
+    Agrega una asignación manual a la vista combinada (llamar dentro de
+    writer("rooms"), después de verificar que el bloque está libre).
+
+    Returns:
+        tuple: overlay_key de la entrada, para guardarla con storage
+    """
+    # Una asignación explícita anula una eliminación previa del mismo bloque
+    key = overlay_key(entry)
+    DELETED_ENTRIES.pop(key, None)
+    add_extra_entry(entry)
+    occupy_slot(entry)
+    conflicts.schedule_slot_changed(occupancy_key(entry), entry)
+    return key
+
+
+@rooms_bp.route("/assign_subject", methods=["POST"])
+def assign_subject():
+    data = request.json
+    # Validate required fields
+    required = ["nrc", "seccion", "dia", "modulo", "sala"]
+    if not all(k in data for k in required):
+        return jsonify({"error": "Faltan datos requeridos"}), 400
+
+    # Create schedule entry
+    new_entry = manual_entry(data)
+
+    # La verificación y la asignación van en el mismo bloque de escritura
+    # para que dos solicitudes simultáneas no tomen la misma sala
+    slot = (data["sala"], data["dia"], int(data["modulo"]))
+    with writer("rooms"):
+        # Rechazar el bloque si la sala ya está ocupada
+        if slot in OCCUPANCY_INDEX:
+            return jsonify({
+                "error": f"La sala {data['sala']} ya está ocupada el {data['dia']} en el módulo {data['modulo']}."
+            }), 409
+
+        key = apply_manual_entry(new_entry)
+        storage.save_overlay("extra", key, new_entry)
+    return jsonify({"success": True, "entry": new_entry})
+
+
+def apply_deletion(data):
+    """
+    Elimina un bloque de la vista combinada (llamar dentro de writer("rooms")).
+
+    Quita la asignación manual de la llave, si existe, y registra la
+    eliminación para que el bloque no vuelva a aparecer desde el Excel.
+
+    Args:
+        data (dict): "nrc", "seccion", "dia_norm", "modulo" y "ubicacion"
+
+    Returns:
+        tuple: overlay_key del bloque (la eliminación queda en DELETED_ENTRIES)
+    """
+    key = overlay_key(data)
+    # Remove from EXTRA_SCHEDULE if present
+    remove_extra_entry(key)
+    # Add to DELETED_ENTRIES to prevent it from reappearing from file
+    DELETED_ENTRIES[key] = {
+        "nrc": data["nrc"],
+        "seccion": data["seccion"],
+        "dia_norm": data["dia_norm"],
+        "modulo": data["modulo"],
+        "ubicacion": data["ubicacion"],
+    }
+    resolve_slot(occupancy_key(data))
+    return key
+
+
+@rooms_bp.route("/delete_assignment", methods=["POST"])
+def delete_assignment():
+    data = request.json
+    required = ["nrc", "seccion", "dia_norm", "modulo", "ubicacion"]
+    if not all(k in data for k in required):
+        return jsonify({"error": "Faltan datos para identificar el bloque"}), 400
+
+    with writer("rooms"):
+        key = apply_deletion(data)
+        storage.save_overlay("deleted", key, DELETED_ENTRIES[key])
+
+    return jsonify({"success": True})
+
+
+@rooms_bp.route("/schedule", methods=["GET"])
+def query_schedule():
+    """
+    Consulta paginada del horario combinado usando los índices secundarios.
+
+    Query params:
+        ubicacion, dia_norm, modulo, carrera, nrc, profesor: Filtros por igualdad.
+            Se pueden repetir (o separar por coma) para aceptar varios valores.
+        fields: Campos a incluir en cada entrada, separados por coma (por defecto todos)
+        limit: Máximo de entradas por página (por defecto 500, máximo 5000)
+        cursor: Valor "next_cursor" de la página anterior
+
+    Returns:
+        JSON: {
+            "success": true,
+            "data": [entradas ordenadas por sala/día/módulo],
+            "total": entradas que cumplen los filtros,
+            "next_cursor": cursor de la página siguiente o null
+        }
+    """
+    view = read_view("rooms")
+    if view["current_data"] is None:
+        return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
+
+    try:
+        limit = min(max(int(request.args.get("limit", 500)), 1), 5000)
+        after = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+
+        # Intersectar los índices, partiendo por el conjunto más pequeño
+        matches = []
+        for field in INDEXED_FIELDS:
+            values = [v for raw in request.args.getlist(field) for v in raw.split(",") if v != ""]
+            if not values:
+                continue
+            if field == "modulo":
+                values = [int(v) for v in values]
+            keys = set()
+            for value in values:
+                keys.update(view["indexes"][field].get(value, ()))
+            matches.append(keys)
+    except ValueError as e:
+        return jsonify({"success": False, "error": f"Consulta inválida: {e}"}), 400
+
+    if matches:
+        matches.sort(key=len)
+        candidates = matches[0].intersection(*matches[1:])
+        total = len(candidates)
+    else:
+        candidates = None
+        total = len(view["order"])
+
+    # Hasta limit + 1 llaves para saber si hay otra página
+    page = schedule_page(view["order"], candidates, after, limit + 1)
+    more = len(page) > limit
+    page = page[:limit]
+
+    fields = [f for f in request.args.get("fields", "").split(",") if f]
+    if fields:
+        data = [{f: view["occupancy"][k].get(f) for f in fields} for k in page]
+    else:
+        data = [view["occupancy"][k] for k in page]
+
+    next_cursor = encode_cursor(page[-1]) if more else None
+    return jsonify({"success": True, "data": data, "total": total, "next_cursor": next_cursor})
+
+
+@rooms_bp.route("/find_rooms", methods=["GET"])
+def find_rooms():
+    """
+    Busca salas libres usando los mapas de bits de ocupación.
+
+    Query params:
+        slots: Bloques a consultar, "dia:modulo" separados por coma
+               (ej: "lunes:1,lunes:2,miercoles:3")
+        mode: "all" (libre en todos los bloques, por defecto) o
+              "any" (libre en al menos uno)
+        cat: Categoría de sala ("all" o vacío para todas)
+        min_cap: Capacidad mínima requerida (por defecto 0)
+
+    Returns:
+        JSON: Salas disponibles ordenadas por ajuste de capacidad (la que
+        menos asientos desperdicia primero), cada una con sus bloques libres
+    """
+    view = read_view("rooms")
+    if view["current_data"] is None:
+        return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
+
+    mode = request.args.get("mode", "all")
+    category = request.args.get("cat", "all") or "all"
+    try:
+        min_cap = int(request.args.get("min_cap", 0) or 0)
+        slots = []
+        for raw in request.args.get("slots", "").split(","):
+            if raw.strip():
+                dia, modulo = raw.strip().split(":")
+                slots.append((dia, int(modulo), slot_bit(dia, modulo)))
+    except ValueError as e:
+        return jsonify({"success": False, "error": f"Consulta inválida: {e}"}), 400
+    if not slots or mode not in ("all", "any"):
+        return jsonify({"success": False, "error": "Consulta inválida"}), 400
+
+    query_mask = 0
+    for _, _, bit in slots:
+        query_mask |= bit
+
+    results = []
+    for sala, details in view["room_database"].items():
+        if category != "all" and details["cat"] != category:
+            continue
+        if details["cap"] < min_cap:
+            continue
+        bitmap = view["bitmaps"].get(sala, 0)
+        busy = bitmap & query_mask
+        if mode == "all" and busy:
+            continue
+        if mode == "any" and busy == query_mask:
+            continue
+        results.append({
+            "sala": sala,
+            "categoria": details["cat"],
+            "capacidad_max": details["cap"],
+            "ocupados": bin(bitmap).count("1"),
+            "free_slots": [
+                {"dia": dia, "modulo": modulo}
+                for dia, modulo, bit in slots
+                if not bitmap & bit
+            ],
+        })
+
+    results.sort(key=lambda r: (r["capacidad_max"] - min_cap, r["sala"]))
+    return jsonify({"success": True, "data": results})
+
+
+def _tensor_selection(state):
+    """
+    Filas del tensor de ocupación que pide la consulta actual.
+
+    Query params:
+        cat: Categoría de sala ("all" o vacío para todas)
+        building: Edificio (prefijo del código, ej: "A", "PS")
+
+    Returns:
+        ndarray: Máscara bool sobre state["rooms"]
+    """
+    category = request.args.get("cat", "all") or "all"
+    building = (request.args.get("building", "") or "").strip().upper()
+    mask = np.ones(len(state["rooms"]), dtype=bool)
+    if category != "all":
+        mask &= np.array([c == category for c in state["cat"]], dtype=bool)
+    if building:
+        mask &= np.array([building_of(sala) == building for sala in state["rooms"]], dtype=bool)
+    return mask
+
+
+@rooms_bp.route("/occupancy/heatmap", methods=["GET"])
+def occupancy_heatmap():
+    """
+    Mapa de calor de ocupación del campus por día y módulo.
+
+    Query params:
+        cat, building: Filtros de salas (ver _tensor_selection)
+
+    Returns:
+        JSON: {"days", "modules", "salas", "ocupadas", "porcentaje",
+        "horas_asiento"} con matrices [día][módulo]
+    """
+    view = read_view("rooms")
+    if view["current_data"] is None:
+        return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
+    state = view["tensor"]
+    mask = _tensor_selection(state)
+    data = heatmap(state["tensor"][mask], state["cap"][mask])
+    data.update(days=SCHEDULE_DAYS, modules=list(range(1, MODULES_PER_DAY + 1)))
+    return jsonify({"success": True, "data": data})
+
+
+@rooms_bp.route("/occupancy/utilization", methods=["GET"])
+def occupancy_utilization():
+    """
+    Uso de las salas agregado por categoría o por edificio.
+
+    Query params:
+        by: "category" (por defecto) o "building" (prefijo del código de sala)
+        cat, building: Filtros de salas (ver _tensor_selection)
+
+    Returns:
+        JSON: Un registro por grupo con salas, bloques ocupados, porcentaje
+        de uso y horas-asiento (ocupadas, disponibles y porcentaje)
+    """
+    view = read_view("rooms")
+    if view["current_data"] is None:
+        return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
+    by = request.args.get("by", "category")
+    if by not in ("category", "building"):
+        return jsonify({"success": False, "error": "Agrupación inválida"}), 400
+    state = view["tensor"]
+    mask = _tensor_selection(state)
+    rooms = [sala for sala, keep in zip(state["rooms"], mask) if keep]
+    if by == "category":
+        labels = [cat for cat, keep in zip(state["cat"], mask) if keep]
+    else:
+        labels = [building_of(sala) for sala in rooms]
+    data = utilization_by(state["tensor"][mask], state["cap"][mask], labels)
+    return jsonify({"success": True, "data": data})
+
+
+@rooms_bp.route("/occupancy/percentiles", methods=["GET"])
+def occupancy_percentiles():
+    """
+    Percentiles de bloques ocupados por sala y ranking de salas.
+
+    Query params:
+        q: Percentiles separados por coma (por defecto "25,50,75,90")
+        cat, building: Filtros de salas (ver _tensor_selection)
+
+    Returns:
+        JSON: {"quantiles": {"p25": bloques, ...}, "rooms": [{"sala",
+        "ocupados", "percentil"}]} con las salas de mayor a menor ocupación
+    """
+    view = read_view("rooms")
+    if view["current_data"] is None:
+        return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
+    try:
+        quantiles = [float(q) for q in request.args.get("q", "25,50,75,90").split(",") if q.strip()]
+    except ValueError:
+        return jsonify({"success": False, "error": "Percentiles inválidos"}), 400
+    if any(not 0 <= q <= 100 for q in quantiles):
+        return jsonify({"success": False, "error": "Los percentiles deben estar entre 0 y 100"}), 400
+
+    state = view["tensor"]
+    mask = _tensor_selection(state)
+    summary, ranks, counts = percentile_ranking(state["tensor"][mask], quantiles)
+    rooms = [sala for sala, keep in zip(state["rooms"], mask) if keep]
+    ranking = [
+        {"sala": sala, "ocupados": int(count), "percentil": round(float(rank), 1)}
+        for sala, count, rank in zip(rooms, counts, ranks)
+    ]
+    ranking.sort(key=lambda r: (-r["ocupados"], r["sala"]))
+    return jsonify({"success": True, "data": {"quantiles": summary, "rooms": ranking}})
+
+
+def report_rows(name):
+    """
+    Filas de un reporte desde los hechos materializados en la ingesta.
+
+    Si el estado guardado es anterior al motor de reportes o a alguno de
+    sus reportes (ver facts_complete), calcula los hechos una vez desde el
+    último Excel y los guarda.
+
+    Args:
+        name (str): Nombre del reporte (ver reports.REPORTS)
+
+    Returns:
+        list | None: Filas del reporte, o None si no hay Excel cargado
+    """
+    global REPORT_FACTS
+    view = read_view("rooms")
+    if not facts_complete(view["reports"]):
+        filepath = find_latest_workbook()
+        if not filepath:
+            return None
+        facts = compute_reports([load_normalized_workbook(filepath)])
+        with writer("rooms"):
+            if not facts_complete(REPORT_FACTS):
+                REPORT_FACTS = facts
+                storage.save_state("reports", facts)
+        view = read_view("rooms")
+
+    reports, room_database = view["reports"], view["room_database"]
+    with _report_rows_lock:
+        memo = REPORT_ROWS_MEMO
+        if memo["reports"] is not reports or memo["room_database"] is not room_database:
+            memo.update(reports=reports, room_database=room_database, rows={})
+        rows = memo["rows"]
+    if name not in rows:
+        rows[name] = finish_report(name, reports, room_database)
+    return rows[name]
+
+
+@rooms_bp.route("/unassigned_nrcs", methods=["GET"])
+def get_unassigned_nrcs():
+    """Retorna los NRCs del Excel que no tienen sala asignada (ubicacion vacía o inválida)"""
+    return get_report("unassigned_nrcs")
+
+
+@rooms_bp.route("/rooms_without_teacher", methods=["GET"])
+def get_rooms_without_teacher():
+    """Retorna las asignaturas que tienen 'SIN DOCENTE' en la columna prof_nombre"""
+    return get_report("rooms_without_teacher")
+
+
+@rooms_bp.route("/reports", methods=["GET"])
+def list_reports():
+    """Reportes disponibles (nombre y descripción)."""
+    return jsonify({
+        "success": True,
+        "data": [{"name": name, "description": r["description"]} for name, r in REPORTS.items()],
+    })
+
+
+@rooms_bp.route("/reports/<name>", methods=["GET"])
+def get_report(name):
+    """
+    Filas de un reporte calculado durante la carga del Excel.
+
+    Reportes: unassigned_nrcs, rooms_without_teacher, rooms_over_capacity y
+    unknown_rooms (ver GET /reports).
+    """
+    if name not in REPORTS:
+        return jsonify({"success": False, "error": "Reporte no encontrado"}), 404
+    try:
+        rows = report_rows(name)
+        if rows is None:
+            return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
+        return jsonify({"success": True, "data": rows})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# ===================================
+# EXPORTACIÓN (CSV / XLSX)
+# ===================================
+# Las exportaciones recorren la vista publicada mientras se envían (ver
+# exports.py): no arman un DataFrame ni el archivo completo en memoria.
+
+# Columnas del horario exportado (las asignaciones manuales agregan "type")
+EXPORT_SCHEDULE_FIELDS = SCHEDULE_FIELDS + ["type"]
+EXPORT_STATS_FIELDS = ["sala", "categoria", "capacidad_max", "ocupados", "porcentaje", "status_text"]
+
+
+def _export_format():
+    """Formato pedido con ?format= ("csv" por defecto), o None si no es válido."""
+    fmt = (request.args.get("format") or "csv").lower()
+    return fmt if fmt in EXPORT_FORMATS else None
+
+
+@rooms_bp.route("/export/schedule", methods=["GET"])
+def export_schedule():
+    """
+    Horario combinado (Excel + asignaciones manuales - eliminaciones), un
+    bloque por fila ordenado por sala, día y módulo.
+
+    Query params:
+        format: "csv" (por defecto) o "xlsx"
+    """
+    fmt = _export_format()
+    if fmt is None:
+        return jsonify({"success": False, "error": "Formato inválido (csv o xlsx)"}), 400
+    view = read_view("rooms")
+    if view["current_data"] is None:
+        return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
+    occupancy = view["occupancy"]
+    rows = (occupancy[key] for key in sorted(occupancy, key=schedule_sort_key))
+    return export_response(EXPORT_SCHEDULE_FIELDS, rows, "horario", fmt)
+
+
+@rooms_bp.route("/export/stats", methods=["GET"])
+def export_stats():
+    """
+    Estadísticas de ocupación por sala (las del monitor de ocupación).
+
+    Query params:
+        format: "csv" (por defecto) o "xlsx"
+    """
+    fmt = _export_format()
+    if fmt is None:
+        return jsonify({"success": False, "error": "Formato inválido (csv o xlsx)"}), 400
+    view = read_view("rooms")
+    if view["current_data"] is None:
+        return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
+    return export_response(EXPORT_STATS_FIELDS, view["current_data"]["stats"], "ocupacion", fmt)
+
+
+@rooms_bp.route("/export/reports/<name>", methods=["GET"])
+def export_report(name):
+    """
+    Filas de un reporte (ver GET /reports) como archivo.
+
+    Query params:
+        format: "csv" (por defecto) o "xlsx"
+    """
+    fmt = _export_format()
+    if fmt is None:
+        return jsonify({"success": False, "error": "Formato inválido (csv o xlsx)"}), 400
+    if name not in REPORTS:
+        return jsonify({"success": False, "error": "Reporte no encontrado"}), 404
+    rows = report_rows(name)
+    if rows is None:
+        return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
+    return export_response(row_columns(rows), rows, name, fmt)
+
+
+# ===================================
+# OPERACIONES EN LOTE
+# ===================================
+# /schedule/batch aplica varias asignaciones, eliminaciones y traslados como
+# una sola transacción: se validan todas contra OCCUPANCY_INDEX simulando la
+# vista combinada y, si ninguna falla, se aplican con las mismas funciones
+# que /assign_subject y /delete_assignment y se guardan juntas.
+
+BLOCK_FIELDS = ("nrc", "seccion", "dia_norm", "modulo", "ubicacion")
+
+
+def parse_batch_operation(op):
+    """
+    Normaliza una operación de /schedule/batch.
+
+    Args:
+        op (dict): {"op": "assign", nrc, seccion, dia, modulo, sala, ...}
+            (los campos de /assign_subject), {"op": "delete", nrc, seccion,
+            dia_norm, modulo, ubicacion} (los de /delete_assignment) o
+            {"op": "move", <campos de delete>, "to": {sala, dia, modulo}}
+            (en "to" se puede omitir lo que no cambia)
+
+    Returns:
+        dict: "op" y "entry" (assign), "block" (delete) o "block" y
+        "target" (move, bloque de destino)
+
+    Raises:
+        KeyError, TypeError, ValueError: Si la operación es inválida
+    """
+    kind = op.get("op")
+    if kind == "assign":
+        entry = manual_entry(op)
+        slot_bit(entry["dia_norm"], entry["modulo"])
+        return {"op": kind, "entry": entry}
+    if kind not in ("delete", "move"):
+        raise ValueError(f"Operación desconocida: {kind}")
+    block = {field: op[field] for field in BLOCK_FIELDS}
+    block["modulo"] = int(block["modulo"])
+    if kind == "delete":
+        return {"op": kind, "block": block}
+    to = op["to"]
+    target = (
+        to.get("sala", block["ubicacion"]),
+        to.get("dia", block["dia_norm"]),
+        int(to.get("modulo", block["modulo"])),
+    )
+    slot_bit(target[1], target[2])
+    if target == occupancy_key(block):
+        raise ValueError("El destino es el mismo bloque")
+    return {"op": kind, "block": block, "target": target}
+
+
+def plan_batch(operations):
+    """
+    Valida operaciones en orden sin modificar el estado (llamar dentro de
+    writer("rooms")).
+
+    Simula la vista combinada como lo harían resolve_slot y las funciones
+    apply_*: cada operación ve el resultado de las anteriores del lote.
+
+    Args:
+        operations (list): Operaciones de parse_batch_operation
+
+    Returns:
+        tuple: (pasos, errores, antes, después). pasos son ("assign",
+        entrada) o ("delete", bloque) en orden (un traslado son dos pasos);
+        errores tiene {"index", "op", "error"} por operación rechazada;
+        antes y después guardan la entrada que ocupa cada bloque tocado
+        (None si está libre) antes y después del lote
+    """
+    simulated = {}  # bloque -> entrada (o None) después de las operaciones
+    added = {}  # bloque -> llaves agregadas por el lote, en orden
+    batch_entries = {}  # llave -> entrada agregada por el lote
+    removed = set()  # llaves de EXTRA_SCHEDULE quitadas por el lote
+    deleted, undeleted = set(), set()  # cambios del lote en DELETED_ENTRIES
+    before = {}
+    steps, errors = [], []
+
+    def occupant(slot):
+        return simulated[slot] if slot in simulated else OCCUPANCY_INDEX.get(slot)
+
+    def resolve(slot):
+        # Misma prioridad que resolve_slot
+        batch_keys = list(added.get(slot, ()))
+        keys = [k for k in EXTRA_SLOTS.get(slot, ()) if k not in removed and k not in batch_keys]
+        keys += batch_keys
+        if keys:
+            return batch_entries.get(keys[-1]) or EXTRA_SCHEDULE[keys[-1]]
+        entries = FILE_SLOTS.get(slot)
+        if entries:
+            key = overlay_key(entries[0])
+            if key not in deleted and (key not in DELETED_ENTRIES or key in undeleted):
+                return entries[0]
+        return None
+
+    def assign(entry):
+        slot = occupancy_key(entry)
+        before.setdefault(slot, occupant(slot))
+        key = overlay_key(entry)
+        removed.discard(key)
+        deleted.discard(key)
+        undeleted.add(key)
+        slot_keys = added.setdefault(slot, {})
+        slot_keys.pop(key, None)
+        slot_keys[key] = None
+        batch_entries[key] = entry
+        simulated[slot] = entry
+        steps.append(("assign", entry))
+
+    def delete(block):
+        slot = occupancy_key(block)
+        before.setdefault(slot, occupant(slot))
+        key = overlay_key(block)
+        removed.add(key)
+        added.get(slot, {}).pop(key, None)
+        batch_entries.pop(key, None)
+        deleted.add(key)
+        undeleted.discard(key)
+        simulated[slot] = resolve(slot)
+        steps.append(("delete", block))
+
+    for index, op in enumerate(operations):
+        if op["op"] == "assign":
+            entry = op["entry"]
+            current = occupant(occupancy_key(entry))
+            if current is not None:
+                errors.append({
+                    "index": index, "op": "assign",
+                    "error": f"La sala {entry['ubicacion']} ya está ocupada el {entry['dia_norm']} "
+                             f"en el módulo {entry['modulo']} (NRC {current['nrc']}).",
+                })
+                continue
+            assign(entry)
+            continue
+
+        block = op["block"]
+        current = occupant(occupancy_key(block))
+        if current is None or (str(current["nrc"]), str(current["seccion"])) != (
+            str(block["nrc"]), str(block["seccion"])
+        ):
+            errors.append({
+                "index": index, "op": op["op"],
+                "error": f"El NRC {block['nrc']}-{block['seccion']} no ocupa la sala "
+                         f"{block['ubicacion']} el {block['dia_norm']} en el módulo {block['modulo']}.",
+            })
+            continue
+        if op["op"] == "move":
+            sala, dia, modulo = op["target"]
+            if occupant(op["target"]) is not None:
+                errors.append({
+                    "index": index, "op": "move",
+                    "error": f"La sala {sala} ya está ocupada el {dia} en el módulo {modulo}.",
+                })
+                continue
+            delete(block)
+            # El bloque trasladado conserva los datos de la clase
+            assign(dict(current, ubicacion=sala, dia_norm=dia, modulo=modulo, type="manual"))
+        else:
+            delete(block)
+    return steps, errors, before, simulated
+
+
+def apply_batch(steps):
+    """
+    Aplica los pasos de plan_batch y los guarda en una sola transacción
+    (llamar dentro de writer("rooms"), en el mismo bloque que plan_batch).
+    """
+    saved = []
+    for kind, data in steps:
+        if kind == "assign":
+            saved.append(("extra", apply_manual_entry(data), data))
+        else:
+            key = apply_deletion(data)
+            saved.append(("deleted", key, DELETED_ENTRIES[key]))
+    storage.save_overlays(saved)
+
+
+def batch_delta(before, after):
+    """
+    Bloques cuyo ocupante cambió.
+
+    Args:
+        before (dict): Ocupante de cada bloque tocado antes del lote
+        after (callable): after(bloque) -> ocupante después del lote
+
+    Returns:
+        list: {"sala", "dia", "modulo", "entry"} (entry None si el bloque
+        quedó libre), ordenados por sala, día y módulo
+    """
+    delta = []
+    for slot in sorted(before, key=schedule_sort_key):
+        entry = after(slot)
+        if entry is not before[slot]:
+            delta.append({"sala": slot[0], "dia": slot[1], "modulo": slot[2], "entry": entry})
+    return delta
+
+
+@rooms_bp.route("/schedule/batch", methods=["POST"])
+def schedule_batch():
+    """
+    Aplica varias asignaciones, eliminaciones y traslados (todas o ninguna).
+
+    Body JSON:
+        operations: Lista de operaciones (ver parse_batch_operation). Se
+            validan en orden: cada una ve el resultado de las anteriores
+        dry_run: true para solo validar y calcular el resultado
+
+    Returns:
+        JSON: {"success": true, "data": {"applied", "delta"}} con los
+        bloques que cambiaron (ver batch_delta), o error 409 con "errors"
+        ({"index", "op", "error"}) si alguna operación no se puede aplicar;
+        en ese caso no se modifica nada
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get("operations")
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"success": False, "error": "No hay operaciones que aplicar"}), 400
+    try:
+        parsed = [parse_batch_operation(op) for op in operations]
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": f"Operación inválida: {e}"}), 400
+
+    with writer("rooms"):
+        steps, errors, before, after = plan_batch(parsed)
+        if errors:
+            return jsonify({
+                "success": False,
+                "error": "Algunas operaciones no se pueden aplicar; no se modificó nada.",
+                "errors": errors,
+            }), 409
+        if data.get("dry_run"):
+            delta = batch_delta(before, after.get)
+        else:
+            apply_batch(steps)
+            delta = batch_delta(before, OCCUPANCY_INDEX.get)
+
+    return jsonify({"success": True, "data": {"applied": len(operations), "delta": delta}})
+
+
+# ===================================
+# ASIGNACIÓN AUTOMÁTICA DE SALAS
+# ===================================
+# /auto_assign propone salas para las clases sin sala (reporte
+# unassigned_blocks) con el solver de room_solver.py y /auto_assign/commit
+# aplica la propuesta revisada como asignaciones manuales.
+
+# Categorías de sala que acepta cada componente (se pueden reemplazar por
+# solicitud con "categories")
+AUTO_ASSIGN_CATEGORIES = {
+    "TEO": ["Sala"],
+    "LAB": ["Laboratorio", "Lab. Comp"],
+}
+AUTO_ASSIGN_DEFAULT_CATEGORIES = ["Sala"]  # Componentes sin categorías configuradas
+AUTO_ASSIGN_TIME_BUDGET = 2.0  # Segundos por defecto para el solver
+AUTO_ASSIGN_MAX_TIME_BUDGET = 30.0
+
+
+def _manual_blocks(view, nrc, seccion):
+    """Bloques (dia, modulo) del grupo que ya tienen una asignación manual."""
+    blocks = set()
+    for key in view["indexes"]["nrc"].get(nrc, ()):
+        entry = view["occupancy"][key]
+        if entry.get("type") == "manual" and str(entry["seccion"]) == seccion:
+            blocks.add((key[1], key[2]))
+    return blocks
+
+
+def plan_auto_assign(view, demand, categories, nrcs=None, time_budget=AUTO_ASSIGN_TIME_BUDGET):
+    """
+    Propone una sala para cada clase sin sala.
+
+    Los bloques que ya se asignaron a mano no se vuelven a pedir. Cada clase
+    acepta las salas de las categorías de su componente con capacidad para
+    sus vacantes, libres en todos sus bloques (ver room_solver).
+
+    Args:
+        view (dict): Vista publicada (read_view("rooms"))
+        demand (list): Filas del reporte unassigned_blocks
+        categories (dict): Categorías aceptadas por componente
+        nrcs (set | None): Limitar la propuesta a estos NRC
+        time_budget (float): Segundos máximos del solver
+
+    Returns:
+        dict: "assignments" (clases con sala propuesta), "unplaced" (clases
+        sin sala posible, con el motivo) y "stats"
+    """
+    started = time.monotonic()
+    index = build_candidate_index(view["room_database"])
+    classes, masks, candidates, unplaced = [], [], [], []
+    for row in demand:
+        if nrcs is not None and row["nrc"] not in nrcs:
+            continue
+        if not row["bloques"]:
+            unplaced.append(dict(row, motivo="Sin horario (días o módulos)"))
+            continue
+        done = _manual_blocks(view, row["nrc"], row["seccion"])
+        bloques = [(dia, modulo) for dia, modulo in row["bloques"] if (dia, modulo) not in done]
+        if not bloques:
+            continue
+        accepted = categories.get(row["componente"], AUTO_ASSIGN_DEFAULT_CATEGORIES)
+        rooms = candidate_rooms(index, accepted, row["vacantes"])
+        if not rooms:
+            unplaced.append(dict(
+                row,
+                motivo=f"Sin salas {' / '.join(accepted)} con capacidad para {row['vacantes']}",
+            ))
+            continue
+        mask = 0
+        for dia, modulo in bloques:
+            mask |= slot_bit(dia, modulo)
+        classes.append(dict(row, bloques=[{"dia": dia, "modulo": modulo} for dia, modulo in bloques]))
+        masks.append(mask)
+        candidates.append(rooms)
+
+    considered = len(classes) + len(unplaced)
+    salas, stats = assign_rooms(masks, candidates, view["bitmaps"], time_budget)
+
+    assignments = []
+    for row, sala in zip(classes, salas):
+        if sala is None:
+            unplaced.append(dict(row, motivo="Sin sala libre en esos bloques"))
+            continue
+        details = view["room_database"][sala]
+        assignments.append(dict(
+            row, sala=sala, categoria=details["cat"], capacidad=details["cap"],
+            desperdicio=details["cap"] - row["vacantes"],
+        ))
+    assignments.sort(key=lambda a: (a["sala"], a["nrc"], a["seccion"]))
+    return {
+        "assignments": assignments,
+        "unplaced": unplaced,
+        "stats": {
+            "clases": considered,
+            "asignadas": stats["placed"],
+            "sin_sala": len(unplaced),
+            "bloques": sum(len(a["bloques"]) for a in assignments),
+            "aumentos": stats["augmented"],
+            "completo": stats["complete"],
+            "segundos": round(time.monotonic() - started, 3),
+        },
+    }
+
+
+@rooms_bp.route("/auto_assign", methods=["POST"])
+def auto_assign():
+    """
+    Propone salas para las clases sin sala (no modifica el horario).
+
+    Body JSON (opcional):
+        nrcs: Lista de NRC a considerar (por defecto todos los sin sala)
+        categories: {componente: [categorías]} para reemplazar
+            AUTO_ASSIGN_CATEGORIES
+        time_budget: Segundos máximos del solver (por defecto 2, máximo 30)
+
+    Returns:
+        JSON: {"success": true, "data": {"assignments", "unplaced", "stats"}}.
+        Cada asignación trae nrc, seccion, materia, componente, carreras,
+        vacantes, bloques [{dia, modulo}], sala, categoria, capacidad y
+        desperdicio; se aplica tal cual con POST /auto_assign/commit
+    """
+    options = request.get_json(silent=True) or {}
+    try:
+        time_budget = float(options.get("time_budget", AUTO_ASSIGN_TIME_BUDGET))
+        time_budget = min(max(time_budget, 0.0), AUTO_ASSIGN_MAX_TIME_BUDGET)
+        categories = dict(AUTO_ASSIGN_CATEGORIES)
+        for componente, accepted in (options.get("categories") or {}).items():
+            if isinstance(accepted, str):
+                accepted = [accepted]
+            categories[componente] = [str(c) for c in accepted]
+        nrcs = {str(n).strip() for n in options["nrcs"]} if options.get("nrcs") else None
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({"success": False, "error": f"Opciones inválidas: {e}"}), 400
+
+    try:
+        demand = report_rows("unassigned_blocks")
+        if demand is None:
+            return jsonify({"success": False, "error": "No hay archivo Excel cargado"}), 404
+        data = plan_auto_assign(read_view("rooms"), demand, categories, nrcs, time_budget)
+        return jsonify({"success": True, "data": data})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@rooms_bp.route("/auto_assign/commit", methods=["POST"])
+def commit_auto_assign():
+    """
+    Aplica una propuesta de /auto_assign (todas las asignaciones o ninguna).
+
+    Body JSON:
+        assignments: Asignaciones de la propuesta (se pueden quitar las que
+            no se quieran aplicar). Cada una necesita nrc, seccion, sala y
+            bloques [{dia, modulo}]
+
+    Returns:
+        JSON: {"success": true, "data": {"asignadas", "bloques", "entries"}}
+        o error 409 con "conflicts" si algún bloque se ocupó después de la
+        propuesta (en ese caso no se aplica nada)
+    """
+    data = request.get_json(silent=True) or {}
+    assignments = data.get("assignments")
+    if not isinstance(assignments, list) or not assignments:
+        return jsonify({"success": False, "error": "No hay asignaciones que aplicar"}), 400
+    try:
+        entries = []
+        for item in assignments:
+            for block in item["bloques"]:
+                slot_bit(block["dia"], block["modulo"])
+                entries.append(manual_entry({
+                    "nrc": str(item["nrc"]),
+                    "seccion": str(item["seccion"]),
+                    "sala": item["sala"],
+                    "dia": block["dia"],
+                    "modulo": block["modulo"],
+                    "materia": item.get("materia", "Asignatura Manual"),
+                    "codigo": item.get("codigo_materia", ""),
+                    "carrera": ", ".join(item.get("carreras", [])),
+                    "componente": item.get("componente", ""),
+                }))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": f"Asignación inválida: {e}"}), 400
+
+    # Verificar y aplicar en el mismo bloque de escritura, como /schedule/batch
+    with writer("rooms"):
+        steps, errors, _, _ = plan_batch([{"op": "assign", "entry": entry} for entry in entries])
+        if errors:
+            clashes = []
+            for error in errors:
+                entry = entries[error["index"]]
+                clashes.append({
+                    "nrc": entry["nrc"],
+                    "seccion": entry["seccion"],
+                    "sala": entry["ubicacion"],
+                    "dia": entry["dia_norm"],
+                    "modulo": entry["modulo"],
+                })
+            return jsonify({
+                "success": False,
+                "error": "Algunos bloques ya están ocupados; vuelva a calcular la propuesta.",
+                "conflicts": clashes,
+            }), 409
+        apply_batch(steps)
+
+    return jsonify({
+        "success": True,
+        "data": {"asignadas": len(assignments), "bloques": len(entries), "entries": entries},
+    })
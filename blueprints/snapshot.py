@@ -0,0 +1,62 @@
+"""
+Instantáneas Binarias del Estado en Memoria
+===========================================
+
+Serializa el horario procesado del último Excel (entradas, choques y
+huellas del modo delta) para que un reinicio lo recupere sin decodificar
+el horario fila por fila ni volver a procesar el Excel.
+
+storage.save_schedule guarda la instantánea en la base junto con las
+tablas del horario y en la misma transacción, así que nunca queda a medio
+escribir. storage.load_schedule la usa solo si corresponde al horario
+guardado (misma "schedule_generation"); si no, lee las tablas.
+
+Formato:
+- Cabecera: SNAPSHOT_MAGIC + versión (uint16, little-endian)
+- Cuerpo: diccionario serializado con pickle
+
+Las instantáneas de otra versión o dañadas se ignoran.
+"""
+
+import pickle
+import struct
+
+SNAPSHOT_MAGIC = b"YONSNAP"
+SNAPSHOT_VERSION = 2  # 1: archivo rooms_state.snapshot en uploads/ (ya no se usa)
+_HEADER = struct.Struct("<H")
+
+
+def encode_snapshot(state):
+    """
+    Serializa el estado con su cabecera.
+
+    Args:
+        state (dict): Estado a guardar (solo tipos básicos de Python)
+
+    Returns:
+        bytes: Instantánea
+    """
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    return SNAPSHOT_MAGIC + _HEADER.pack(SNAPSHOT_VERSION) + payload
+
+
+def decode_snapshot(data):
+    """
+    Lee una instantánea armada con encode_snapshot.
+
+    Args:
+        data (bytes): Instantánea
+
+    Returns:
+        dict | None: Estado guardado, o None si es de otra versión o está dañada
+    """
+    header_size = len(SNAPSHOT_MAGIC) + _HEADER.size
+    if len(data) < header_size or not data.startswith(SNAPSHOT_MAGIC):
+        return None
+    (version,) = _HEADER.unpack_from(data, len(SNAPSHOT_MAGIC))
+    if version != SNAPSHOT_VERSION:
+        return None
+    try:
+        return pickle.loads(memoryview(data)[header_size:])
+    except Exception:
+        return None
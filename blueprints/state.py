@@ -0,0 +1,285 @@
+"""
+Estado Compartido con Versiones (Copy-on-Write)
+===============================================
+
+Permite atender solicitudes en paralelo (servidor con varios hilos) sin que
+una lectura vea el estado a medio modificar.
+
+- Escritores: toda modificación del estado de salas o carreras se hace
+  dentro de `with writer("rooms")` (o "careers"). Los escritores se
+  serializan con un único WRITE_LOCK y, al terminar, publican una versión
+  nueva del estado.
+- Lectores: read_view(nombre) retorna una vista inmutable (copias de los
+  diccionarios y conjuntos) de la última versión publicada. No toma ningún
+  lock mientras la vista esté al día; la primera lectura después de una
+  escritura la arma tomando WRITE_LOCK un momento (copy-on-write diferido:
+  varias escrituras seguidas sin lecturas no copian nada).
+- Las colecciones grandes se publican con shared_copy: la vista nueva copia
+  solo las partes con llaves modificadas y comparte el resto con la anterior.
+
+Las vistas nunca se modifican después de publicarse: una solicitud puede
+seguir usando la suya aunque mientras tanto se publique otra versión.
+
+Modo multiproceso (enable_shared_state, variable YONAPP_SHARED_STATE=1):
+varios procesos del servidor (ej: gunicorn -w 4 detrás de un balanceador)
+comparten la base SQLite de storage.py, que pasa a ser la fuente de verdad.
+
+- Cada escritor toma además un lock entre procesos (storage.process_lock),
+  pone su memoria al día antes de modificarla y, al terminar, incrementa la
+  versión compartida del estado en la base.
+- Los lectores detectan cambios de otros procesos con PRAGMA data_version
+  (una consulta sin E/S mientras nadie escriba). Si la versión compartida
+  cambió, recargan el estado desde la base dentro de una transacción de
+  lectura (foto consistente en modo WAL) y publican una vista nueva.
+"""
+
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
+
+from blueprints import storage
+
+WRITE_LOCK = threading.RLock()  # Serializa a todos los escritores (también los commit de /jobs)
+
+# nombre -> {"build": función que arma la vista, "reload": función que recarga
+# el estado desde la base, "version": int, "published": (version, vista),
+# "synced": versión compartida que refleja la memoria}
+_VIEWS = {}
+
+SHARED_STATE = False  # Ver enable_shared_state
+_writer_depth = 0  # Escritores anidados del hilo que tiene WRITE_LOCK
+_local = threading.local()  # Último data_version visto por cada hilo
+
+
+def register_view(name, build, reload=None):
+    """
+    Registra un estado compartido.
+
+    Args:
+        name (str): Nombre del estado ("rooms", "careers"...)
+        build (callable): build() -> vista inmutable del estado actual. Se
+            llama con WRITE_LOCK tomado.
+        reload (callable): reload() pone la memoria al día con la base
+            (solo en modo multiproceso). Se llama con WRITE_LOCK tomado y
+            dentro de una transacción de lectura.
+    """
+    _VIEWS[name] = {"build": build, "reload": reload, "version": 0, "published": None, "synced": None}
+
+
+def enable_shared_state():
+    """Activa el modo multiproceso (llamar después de storage.init_storage)."""
+    global SHARED_STATE
+    SHARED_STATE = True
+
+
+def publish(name):
+    """Marca una versión nueva del estado (llamar con WRITE_LOCK tomado)."""
+    _VIEWS[name]["version"] += 1
+
+
+def _sync(force=False):
+    """
+    Recarga los estados que otro proceso modificó (solo en modo multiproceso).
+
+    Args:
+        force (bool): Consultar las versiones aunque data_version no haya
+            cambiado (los escritores, antes de modificar)
+    """
+    if not SHARED_STATE:
+        return
+    seen = storage.data_version()
+    if not force and getattr(_local, "data_version", None) == seen:
+        return
+    with WRITE_LOCK, storage.read_snapshot():
+        versions = storage.load_versions()
+        for name, view in _VIEWS.items():
+            shared = versions.get(name, 0)
+            if view["reload"] is not None and view["synced"] != shared:
+                view["reload"]()
+                view["synced"] = shared
+                publish(name)
+    _local.data_version = seen
+
+
+@contextmanager
+def writer(*names):
+    """
+    Bloque de escritura: toma WRITE_LOCK y publica los estados al salir.
+
+    En modo multiproceso también toma el lock entre procesos, recarga antes
+    los cambios de otros procesos e incrementa al salir las versiones
+    compartidas.
+
+    Ejemplo:
+        with writer("rooms"):
+            ROOM_DATABASE[sala] = {...}
+    """
+    global _writer_depth
+    with WRITE_LOCK:
+        outermost = _writer_depth == 0
+        _writer_depth += 1
+        try:
+            with storage.process_lock() if SHARED_STATE and outermost else nullcontext():
+                if SHARED_STATE and outermost:
+                    _sync(force=True)
+                try:
+                    yield
+                finally:
+                    for name in names:
+                        publish(name)
+                        if SHARED_STATE:
+                            _VIEWS[name]["synced"] = storage.bump_version(name)
+        finally:
+            _writer_depth -= 1
+
+
+def load_view(name, load):
+    """
+    Carga el estado inicial (al registrar el blueprint) y lo publica.
+
+    A diferencia de writer no cambia la versión compartida: cada proceso
+    carga lo mismo desde la base y los demás no necesitan recargar.
+
+    Args:
+        name (str): Nombre del estado
+        load (callable): load() restaura el estado guardado
+    """
+    with WRITE_LOCK:
+        with storage.process_lock() if SHARED_STATE else nullcontext():
+            load()
+            if SHARED_STATE:
+                _VIEWS[name]["synced"] = storage.load_versions().get(name, 0)
+            publish(name)
+
+
+def read_view(name):
+    """
+    Vista inmutable de la última versión publicada de un estado.
+
+    Returns:
+        Lo que retorna el build registrado para ese estado
+    """
+    _sync()
+    view = _VIEWS[name]
+    published = view["published"]
+    if published is not None and published[0] == view["version"]:
+        return published[1]
+    with WRITE_LOCK:
+        published = view["published"]
+        if published is None or published[0] != view["version"]:
+            published = (view["version"], view["build"]())
+            view["published"] = published
+    return published[1]
+
+
+SHARDS = 64  # Máximo de partes de un SharedMapping
+SHARD_SIZE = 256  # Llaves por parte al copiar todo (ver shared_copy)
+
+
+class SharedMapping(Mapping):
+    """
+    Diccionario inmutable repartido en partes según el hash de la llave.
+
+    Lo arma shared_copy. Dos versiones seguidas comparten las partes que
+    ninguna escritura tocó. Si es ordenado, se recorre en el orden de
+    inserción del diccionario original; si no, en un orden cualquiera.
+    """
+
+    __slots__ = ("_shards", "_positions", "_next_position", "_len")
+
+    def __init__(self, shards, positions=None, next_position=0):
+        self._shards = shards
+        self._positions = positions  # Por parte: llave -> posición de inserción
+        self._next_position = next_position
+        self._len = sum(map(len, shards))
+
+    def __getitem__(self, key):
+        return self._shards[hash(key) % len(self._shards)][key]
+
+    def get(self, key, default=None):
+        return self._shards[hash(key) % len(self._shards)].get(key, default)
+
+    def __contains__(self, key):
+        return key in self._shards[hash(key) % len(self._shards)]
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        if self._positions is None:
+            return (key for shard in self._shards for key in shard)
+        order = {}
+        for positions in self._positions:
+            order.update(positions)
+        return iter(sorted(order, key=order.__getitem__))
+
+
+def _full_copy(live, copy, ordered):
+    """Copia todo `live` en un SharedMapping nuevo (ver shared_copy)."""
+    parts = max(1, min(SHARDS, len(live) // SHARD_SIZE))
+    items = live.items() if isinstance(live, Mapping) else ((key, None) for key in live)
+    if parts == 1 and copy is None and not ordered:
+        return SharedMapping([dict(items)])
+    shards = [{} for _ in range(parts)]
+    positions = [{} for _ in range(parts)] if ordered else None
+    for position, (key, value) in enumerate(items):
+        part = hash(key) % parts
+        shards[part][key] = value if copy is None else copy(key, value, None)
+        if ordered:
+            positions[part][key] = position
+    return SharedMapping(shards, positions, len(live))
+
+
+def shared_copy(previous, live, changed=None, copy=None, ordered=False):
+    """
+    Copia inmutable de `live` que comparte con `previous` lo que no cambió.
+
+    Solo se copian las partes de `previous` que tienen llaves de `changed`,
+    así que publicar una escritura pequeña cuesta lo que esas partes y no
+    lo que la colección completa.
+
+    Args:
+        previous (SharedMapping | None): Copia publicada anterior de `live`
+        live (dict | set): Colección que modifican los escritores. Un
+            conjunto se copia como llave -> None.
+        changed (iterable | None): Llaves agregadas, modificadas o quitadas
+            desde `previous`. Si ordered, un dict llave -> True si la llave se
+            (re)insertó en `live` (pasa al final del orden). None copia todo.
+        copy (callable): copy(llave, valor, valor_publicado) -> valor de la
+            copia (valor_publicado es None si la llave es nueva o si se
+            copia todo). Por defecto los valores se comparten.
+        ordered (bool): Recorrer la copia en el orden de inserción de `live`
+
+    Returns:
+        SharedMapping
+    """
+    if previous is None or changed is None:
+        return _full_copy(live, copy, ordered)
+    shards = list(previous._shards)
+    positions = list(previous._positions) if ordered else None
+    next_position = previous._next_position
+    copied = set()
+    for key in changed:
+        part = hash(key) % len(shards)
+        if part not in copied:
+            copied.add(part)
+            shards[part] = dict(shards[part])
+            if ordered:
+                positions[part] = dict(positions[part])
+        if key in live:
+            value = live[key] if isinstance(live, Mapping) else None
+            if copy is not None:
+                value = copy(key, value, previous._shards[part].get(key))
+            shards[part][key] = value
+            if ordered and (changed[key] or key not in positions[part]):
+                positions[part][key] = next_position
+                next_position += 1
+        else:
+            shards[part].pop(key, None)
+            if ordered:
+                positions[part].pop(key, None)
+    result = SharedMapping(shards, positions, next_position)
+    if len(shards) < SHARDS and len(result) > 2 * len(shards) * SHARD_SIZE:
+        # Creció mucho desde la última copia completa: repartirla de nuevo
+        return _full_copy(result, None, ordered)
+    return result
@@ -0,0 +1,620 @@
+"""
+Almacenamiento Persistente en SQLite
+====================================
+
+Guarda en disco el estado que antes vivía solo en memoria: salas, horario
+expandido del último Excel, asignaciones manuales y eliminaciones, carreras
+con su planificación y el período de planificación. Al reiniciar, rooms.py
+y careers.py recuperan su estado desde aquí sin volver a procesar el Excel.
+
+Usa sqlite3 de la biblioteca estándar en modo WAL: los lectores no bloquean
+al escritor y cada escritura es una transacción. Cada hilo abre su propia
+conexión (ver get_connection). Las consultas son constantes del módulo, así
+que sqlite3 las prepara una vez por conexión y reutiliza la sentencia
+preparada.
+
+Las estructuras en memoria (OCCUPANCY_INDEX, ROOM_BITMAPS, CAREER_DATABASE...)
+siguen respondiendo las consultas; este módulo es su respaldo y se actualiza
+con escrituras puntuales (una sala, una asignación, el plan de una carrera)
+en vez de reescribir todo el estado en cada cambio.
+
+Tablas:
+- rooms: sala, capacidad y categoría
+- schedule: bloques del Excel ("file" los que ganaron su bloque, "shadowed"
+  los que chocaron)
+- snapshots: el mismo horario (con sus huellas) como instantánea binaria
+  (ver snapshot.py), para restaurarlo rápido al reiniciar
+- overlays: asignaciones manuales ("extra") y eliminaciones ("deleted")
+- row_fingerprints: huellas por grupo (nrc, seccion) para el modo delta
+- careers / planning_blocks: carreras y su planificación (un registro por
+  bloque; position es el id estable del bloque)
+- career_changes: registro de cambios de las carreras por versión (ver
+  careers.record_change)
+- state: valores sueltos en JSON (resumen y orden de las filas del último
+  Excel, período, versiones compartidas "version:<estado>" del modo
+  multiproceso...)
+
+En modo multiproceso (ver state.py) los escritores de todos los procesos se
+serializan con process_lock, un lock sobre un archivo SQLite aparte
+(DATABASE_PATH + LOCK_SUFFIX) que funciona igual en Windows y Linux.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+
+from blueprints.snapshot import decode_snapshot, encode_snapshot
+
+DATABASE_FILENAME = "yonapp.sqlite3"  # Dentro de UPLOAD_FOLDER, salvo DATABASE_PATH
+LOCK_SUFFIX = ".lock"  # Archivo del lock entre procesos
+LOCK_TIMEOUT = 300  # Segundos que un escritor espera el lock entre procesos
+
+DATABASE_PATH = None  # Se define en init_storage
+_local = threading.local()  # Conexión de cada hilo
+_lock_conn = None  # Conexión del lock entre procesos (se usa con state.WRITE_LOCK tomado)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    sala TEXT PRIMARY KEY,
+    cap INTEGER NOT NULL,
+    cat TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS schedule (
+    position INTEGER PRIMARY KEY,
+    layer TEXT NOT NULL,
+    ubicacion TEXT,
+    dia_norm TEXT,
+    modulo INTEGER,
+    nrc TEXT,
+    seccion TEXT,
+    entry TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    name TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS overlays (
+    kind TEXT NOT NULL,
+    nrc TEXT NOT NULL,
+    seccion TEXT NOT NULL,
+    dia_norm TEXT NOT NULL,
+    modulo INTEGER NOT NULL,
+    ubicacion TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    UNIQUE (nrc, seccion, dia_norm, modulo, ubicacion)
+);
+CREATE TABLE IF NOT EXISTS row_fingerprints (
+    nrc TEXT NOT NULL,
+    seccion TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (nrc, seccion)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS careers (
+    code TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    nombre TEXT NOT NULL,
+    semestres INTEGER NOT NULL,
+    mallas TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS planning_blocks (
+    career TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    malla TEXT,
+    semestre TEXT,
+    dia TEXT,
+    modulo INTEGER,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (career, position)
+);
+CREATE TABLE IF NOT EXISTS career_changes (
+    version INTEGER PRIMARY KEY,
+    change TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS state (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+-- Índices de versiones anteriores: ninguna consulta los usa (las lecturas
+-- las responde la memoria) y solo encarecían cada escritura
+DROP INDEX IF EXISTS schedule_slot;
+DROP INDEX IF EXISTS overlays_slot;
+DROP INDEX IF EXISTS planning_semester;
+"""
+
+# ===================================
+# CONSULTAS
+# ===================================
+SQL_SELECT_ROOMS = "SELECT sala, cap, cat FROM rooms ORDER BY rowid"
+SQL_UPSERT_ROOM = (
+    "INSERT INTO rooms (sala, cap, cat) VALUES (?, ?, ?) "
+    "ON CONFLICT (sala) DO UPDATE SET cap = excluded.cap, cat = excluded.cat"
+)
+SQL_DELETE_ROOM = "DELETE FROM rooms WHERE sala = ?"
+
+SQL_SELECT_SCHEDULE = "SELECT layer, entry FROM schedule ORDER BY position"
+SQL_INSERT_SCHEDULE = (
+    "INSERT INTO schedule (position, layer, ubicacion, dia_norm, modulo, nrc, seccion, entry) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+SQL_SELECT_SNAPSHOT = "SELECT data FROM snapshots WHERE name = ?"
+SQL_UPSERT_SNAPSHOT = (
+    "INSERT INTO snapshots (name, data) VALUES (?, ?) "
+    "ON CONFLICT (name) DO UPDATE SET data = excluded.data"
+)
+
+SQL_SELECT_OVERLAYS = "SELECT kind, entry FROM overlays ORDER BY rowid"
+SQL_INSERT_OVERLAY = (
+    "INSERT INTO overlays (kind, nrc, seccion, dia_norm, modulo, ubicacion, entry) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+SQL_DELETE_OVERLAY = (
+    "DELETE FROM overlays WHERE nrc = ? AND seccion = ? AND dia_norm = ? AND modulo = ? AND ubicacion = ?"
+)
+
+SQL_SELECT_FINGERPRINTS = "SELECT nrc, seccion, digest FROM row_fingerprints"
+SQL_INSERT_FINGERPRINT = "INSERT INTO row_fingerprints (nrc, seccion, digest) VALUES (?, ?, ?)"
+
+SQL_SELECT_CAREERS = "SELECT code, nombre, semestres, mallas FROM careers ORDER BY position"
+SQL_UPSERT_CAREER = (
+    "INSERT INTO careers (code, position, nombre, semestres, mallas) "
+    "VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM careers), ?, ?, ?) "
+    "ON CONFLICT (code) DO UPDATE SET nombre = excluded.nombre, "
+    "semestres = excluded.semestres, mallas = excluded.mallas"
+)
+SQL_DELETE_CAREER = "DELETE FROM careers WHERE code = ?"
+SQL_SELECT_PLANNING = "SELECT career, position, entry FROM planning_blocks ORDER BY career, position"
+SQL_DELETE_PLANNING = "DELETE FROM planning_blocks WHERE career = ?"
+SQL_INSERT_PLANNING = (
+    "INSERT OR REPLACE INTO planning_blocks (career, position, malla, semestre, dia, modulo, entry) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+SQL_DELETE_PLANNING_BLOCK = "DELETE FROM planning_blocks WHERE career = ? AND position = ?"
+SQL_SELECT_CAREER_CHANGES = "SELECT change FROM career_changes ORDER BY version DESC LIMIT ?"
+SQL_INSERT_CAREER_CHANGE = "INSERT OR REPLACE INTO career_changes (version, change) VALUES (?, ?)"
+SQL_PRUNE_CAREER_CHANGES = "DELETE FROM career_changes WHERE version <= ?"
+
+SQL_SELECT_STATE = "SELECT value FROM state WHERE name = ?"
+SQL_UPSERT_STATE = (
+    "INSERT INTO state (name, value) VALUES (?, ?) "
+    "ON CONFLICT (name) DO UPDATE SET value = excluded.value"
+)
+SQL_DELETE_STATE = "DELETE FROM state WHERE name = ?"
+SQL_SELECT_VERSIONS = "SELECT name, value FROM state WHERE name LIKE 'version:%'"
+SQL_BUMP_VERSION = (
+    "INSERT INTO state (name, value) VALUES (?, '1') "
+    "ON CONFLICT (name) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+)
+
+
+# ===================================
+# CONEXIÓN
+# ===================================
+
+def init_storage(app):
+    """
+    Define la ruta de la base de datos y crea el esquema si no existe.
+
+    Usa app.config["DATABASE_PATH"] o, en su defecto,
+    UPLOAD_FOLDER/DATABASE_FILENAME. Debe llamarse antes de registrar los
+    blueprints, que restauran su estado al registrarse.
+    """
+    global DATABASE_PATH
+    DATABASE_PATH = app.config.get("DATABASE_PATH") or os.path.join(
+        app.config["UPLOAD_FOLDER"], DATABASE_FILENAME
+    )
+    conn = get_connection()
+    conn.executescript(SCHEMA)
+
+
+def get_connection():
+    """
+    Conexión SQLite del hilo actual (la abre la primera vez).
+
+    Returns:
+        sqlite3.Connection: Conexión en modo WAL
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != DATABASE_PATH:
+        if DATABASE_PATH is None:
+            raise RuntimeError("El almacenamiento no está inicializado (ver init_storage)")
+        conn = sqlite3.connect(DATABASE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+        _local.path = DATABASE_PATH
+    return conn
+
+
+# ===================================
+# COORDINACIÓN ENTRE PROCESOS
+# ===================================
+
+@contextmanager
+def process_lock():
+    """
+    Lock de escritura compartido por todos los procesos que usan la base.
+
+    Mantiene abierta una transacción BEGIN IMMEDIATE sobre el archivo de
+    lock: SQLite deja a lo sumo una abierta a la vez y las demás esperan
+    hasta LOCK_TIMEOUT segundos. Llamar con state.WRITE_LOCK tomado.
+    """
+    global _lock_conn
+    if _lock_conn is None:
+        _lock_conn = sqlite3.connect(
+            DATABASE_PATH + LOCK_SUFFIX, timeout=LOCK_TIMEOUT,
+            isolation_level=None, check_same_thread=False,
+        )
+    _lock_conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    finally:
+        _lock_conn.execute("ROLLBACK")
+
+
+@contextmanager
+def read_snapshot():
+    """
+    Transacción de lectura en la conexión del hilo: en modo WAL todas las
+    consultas dentro del bloque ven la misma foto de la base.
+    """
+    conn = get_connection()
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.commit()
+
+
+def data_version():
+    """
+    PRAGMA data_version de la conexión del hilo: cambia cuando otra conexión
+    confirma una escritura. Permite detectar cambios sin leer las tablas.
+    """
+    return get_connection().execute("PRAGMA data_version").fetchone()[0]
+
+
+def load_versions():
+    """
+    Versiones compartidas de los estados.
+
+    Returns:
+        dict: {nombre: versión}
+    """
+    rows = get_connection().execute(SQL_SELECT_VERSIONS).fetchall()
+    return {name.split(":", 1)[1]: int(value) for name, value in rows}
+
+
+def bump_version(name):
+    """
+    Incrementa la versión compartida de un estado (avisa a los demás procesos).
+
+    Returns:
+        int: Versión nueva
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_BUMP_VERSION, (f"version:{name}",))
+        row = conn.execute(SQL_SELECT_STATE, (f"version:{name}",)).fetchone()
+    return int(row[0])
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+# ===================================
+# ESTADO GENERAL
+# ===================================
+
+def load_state(name, default=None):
+    """Valor JSON guardado con save_state, o default si no existe."""
+    row = get_connection().execute(SQL_SELECT_STATE, (name,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+
+def save_state(name, value):
+    """Guarda (o reemplaza) un valor JSON en la tabla state."""
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_UPSERT_STATE, (name, _dumps(value)))
+
+
+def delete_state(names):
+    """Elimina valores de la tabla state."""
+    conn = get_connection()
+    with conn:
+        conn.executemany(SQL_DELETE_STATE, [(name,) for name in names])
+
+
+# ===================================
+# SALAS Y HORARIO
+# ===================================
+
+def load_rooms():
+    """
+    Salas guardadas, en orden de creación.
+
+    Returns:
+        dict | None: {sala: {"cap", "cat"}}, o None si nunca se guardaron
+    """
+    if load_state("rooms_seeded") is None:
+        return None
+    rows = get_connection().execute(SQL_SELECT_ROOMS).fetchall()
+    return {sala: {"cap": cap, "cat": cat} for sala, cap, cat in rows}
+
+
+def save_rooms(rooms):
+    """Guarda todas las salas (y marca la tabla como inicializada)."""
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM rooms")
+        conn.executemany(SQL_UPSERT_ROOM, [(s, d["cap"], d["cat"]) for s, d in rooms.items()])
+        conn.execute(SQL_UPSERT_STATE, ("rooms_seeded", "true"))
+
+
+def save_room(sala, details):
+    """Crea o actualiza una sala."""
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_UPSERT_ROOM, (sala, details["cap"], details["cat"]))
+
+
+def delete_room(sala):
+    """Elimina una sala."""
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_DELETE_ROOM, (sala,))
+
+
+def _schedule_row(position, layer, entry):
+    return (
+        position, layer, entry.get("ubicacion"), entry.get("dia_norm"), entry.get("modulo"),
+        str(entry.get("nrc")), str(entry.get("seccion")), _dumps(entry),
+    )
+
+
+def save_schedule(summary, schedule, shadowed, fingerprints, rooms, reports=None, row_order=None,
+                  multi_source=False):
+    """
+    Reemplaza el horario del último Excel en una sola transacción.
+
+    Args:
+        summary (dict): Resumen del Excel (stats, total_rooms, total_courses)
+        schedule (list): Entradas que ganaron su bloque, en orden
+        shadowed (list): Entradas que chocaron con un bloque ya ocupado
+        fingerprints (dict): (nrc, seccion) -> huella (ver fingerprint_rows)
+        rooms (dict): Salas nuevas que registró el Excel (se agregan; las
+            demás salas no se tocan)
+        reports (dict | None): Hechos de los reportes del Excel (se leen
+            con load_state("reports"))
+        row_order (list | None): Hash de cada fila del Excel en orden (se lee
+            con load_state("row_order"))
+        multi_source (bool): El horario vino de varios archivos u hojas (se
+            lee con load_state("multi_source"))
+
+    Returns:
+        str: Identificador del horario guardado ("schedule_generation"); en
+        modo multiproceso indica a los demás procesos que deben recargarlo
+    """
+    generation = uuid.uuid4().hex
+    rows = [_schedule_row(pos, "file", e) for pos, e in enumerate(schedule)]
+    rows.extend(_schedule_row(len(rows) + pos, "shadowed", e) for pos, e in enumerate(shadowed))
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM schedule")
+        conn.executemany(SQL_INSERT_SCHEDULE, rows)
+        conn.execute("DELETE FROM row_fingerprints")
+        conn.executemany(
+            SQL_INSERT_FINGERPRINT,
+            [(nrc, seccion, str(digest)) for (nrc, seccion), digest in fingerprints.items()],
+        )
+        conn.executemany(SQL_UPSERT_ROOM, [(s, d["cap"], d["cat"]) for s, d in rooms.items()])
+        conn.execute(SQL_UPSERT_STATE, ("schedule_summary", _dumps(summary)))
+        conn.execute(SQL_UPSERT_STATE, ("schedule_generation", _dumps(generation)))
+        conn.execute(SQL_UPSERT_STATE, ("reports", _dumps(reports)))
+        conn.execute(SQL_UPSERT_STATE, ("row_order", _dumps(row_order)))
+        conn.execute(SQL_UPSERT_STATE, ("multi_source", _dumps(multi_source)))
+        conn.execute(SQL_UPSERT_SNAPSHOT, ("schedule", encode_snapshot({
+            "generation": generation,
+            "schedule": schedule,
+            "shadowed": shadowed,
+            "fingerprints": fingerprints,
+        })))
+    return generation
+
+
+def load_schedule():
+    """
+    Horario del último Excel guardado con save_schedule.
+
+    Usa la instantánea binaria si corresponde al horario guardado; si no
+    (base de una versión anterior o instantánea dañada), lee las tablas.
+
+    Returns:
+        tuple | None: (resumen, entradas, entradas en choque, huellas), o
+        None si nunca se cargó un Excel
+    """
+    summary = load_state("schedule_summary")
+    if summary is None:
+        return None
+    conn = get_connection()
+    row = conn.execute(SQL_SELECT_SNAPSHOT, ("schedule",)).fetchone()
+    snapshot = decode_snapshot(row[0]) if row else None
+    if snapshot is not None and snapshot["generation"] == load_state("schedule_generation"):
+        return summary, snapshot["schedule"], snapshot["shadowed"], snapshot["fingerprints"]
+    schedule, shadowed = [], []
+    for layer, entry in conn.execute(SQL_SELECT_SCHEDULE):
+        (schedule if layer == "file" else shadowed).append(json.loads(entry))
+    fingerprints = {
+        (nrc, seccion): int(digest)
+        for nrc, seccion, digest in conn.execute(SQL_SELECT_FINGERPRINTS)
+    }
+    return summary, schedule, shadowed, fingerprints
+
+
+def save_overlay(kind, key, entry):
+    """
+    Guarda una asignación manual ("extra") o una eliminación ("deleted").
+
+    Una llave tiene a lo sumo una de las dos: la nueva reemplaza a la
+    anterior, como en EXTRA_SCHEDULE y DELETED_ENTRIES.
+
+    Args:
+        kind (str): "extra" o "deleted"
+        key (tuple): overlay_key de la entrada
+        entry (dict): Entrada a guardar
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_DELETE_OVERLAY, key)
+        conn.execute(SQL_INSERT_OVERLAY, (kind, *key, _dumps(entry)))
+
+
+def save_overlays(items):
+    """
+    Guarda varias asignaciones manuales o eliminaciones en una sola
+    transacción (ver save_overlay).
+
+    Args:
+        items (list): Tuplas (kind, key, entry)
+    """
+    conn = get_connection()
+    with conn:
+        for kind, key, entry in items:
+            conn.execute(SQL_DELETE_OVERLAY, key)
+            conn.execute(SQL_INSERT_OVERLAY, (kind, *key, _dumps(entry)))
+
+
+def load_overlays():
+    """
+    Asignaciones manuales y eliminaciones, en el orden en que se guardaron.
+
+    Returns:
+        tuple: (asignaciones, eliminaciones), listas de entradas
+    """
+    extra, deleted = [], []
+    for kind, entry in get_connection().execute(SQL_SELECT_OVERLAYS):
+        (extra if kind == "extra" else deleted).append(json.loads(entry))
+    return extra, deleted
+
+
+# ===================================
+# CARRERAS Y PLANIFICACIÓN
+# ===================================
+
+def load_careers():
+    """
+    Carreras guardadas con su planificación.
+
+    Los bloques guardados antes de tener id reciben su posición como id.
+
+    Returns:
+        dict | None: Mismo formato que CAREER_DATABASE ("planificacion" es
+        {id: bloque}), o None si nunca se guardaron
+    """
+    if load_state("careers_seeded") is None:
+        return None
+    conn = get_connection()
+    careers = {
+        code: {"nombre": nombre, "semestres": semestres, "mallas": json.loads(mallas), "planificacion": {}}
+        for code, nombre, semestres, mallas in conn.execute(SQL_SELECT_CAREERS)
+    }
+    for code, position, entry in conn.execute(SQL_SELECT_PLANNING):
+        if code in careers:
+            block = json.loads(entry)
+            block.setdefault("id", position)
+            careers[code]["planificacion"][block["id"]] = block
+    return careers
+
+
+def _planning_row(code, block):
+    return (
+        code, block["id"], str(block.get("malla")), str(block.get("semestre")),
+        block.get("dia"), block.get("modulo"), _dumps(block),
+    )
+
+
+def _planning_rows(code, plan):
+    return [_planning_row(code, block) for block in plan.values()]
+
+
+def save_careers(careers):
+    """Guarda todas las carreras (y marca la tabla como inicializada)."""
+    conn = get_connection()
+    with conn:
+        conn.execute("DELETE FROM careers")
+        conn.execute("DELETE FROM planning_blocks")
+        for code, career in careers.items():
+            conn.execute(SQL_UPSERT_CAREER, (code, career["nombre"], career["semestres"], _dumps(career["mallas"])))
+            conn.executemany(SQL_INSERT_PLANNING, _planning_rows(code, career.get("planificacion", {})))
+        conn.execute(SQL_UPSERT_STATE, ("careers_seeded", "true"))
+
+
+def save_career(code, career):
+    """Crea o actualiza los datos de una carrera (la planificación se guarda por bloque)."""
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_UPSERT_CAREER, (code, career["nombre"], career["semestres"], _dumps(career["mallas"])))
+
+
+def save_planning_block(code, block, next_id=None):
+    """
+    Crea o reemplaza un bloque de la planificación (la posición en la tabla
+    es el id del bloque).
+
+    Args:
+        code (str): Código de la carrera
+        block (dict): Bloque con su "id"
+        next_id (int | None): Siguiente id de bloque, si cambió (se guarda
+            en la misma transacción)
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_INSERT_PLANNING, _planning_row(code, block))
+        if next_id is not None:
+            conn.execute(SQL_UPSERT_STATE, ("planning_next_id", _dumps(next_id)))
+
+
+def delete_planning_block(code, block_id):
+    """Elimina un bloque de la planificación por su id."""
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_DELETE_PLANNING_BLOCK, (code, block_id))
+
+
+def delete_career(code):
+    """Elimina una carrera y su planificación."""
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_DELETE_CAREER, (code,))
+        conn.execute(SQL_DELETE_PLANNING, (code,))
+
+
+def save_career_change(change, keep):
+    """
+    Agrega un cambio al registro de cambios de las carreras.
+
+    Args:
+        change (dict): Cambio con su "version"
+        keep (int): Cambios más recientes que se conservan
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute(SQL_INSERT_CAREER_CHANGE, (change["version"], _dumps(change)))
+        conn.execute(SQL_PRUNE_CAREER_CHANGES, (change["version"] - keep,))
+
+
+def load_career_changes(limit):
+    """
+    Últimos cambios del registro de las carreras.
+
+    Returns:
+        list: Hasta `limit` cambios, de la versión más antigua a la más nueva
+    """
+    rows = get_connection().execute(SQL_SELECT_CAREER_CHANGES, (limit,)).fetchall()
+    return [json.loads(change) for (change,) in reversed(rows)]
@@ -0,0 +1,72 @@
+"""
+Formato Compacto (Columnar) para Respuestas de Horarios
+========================================================
+
+Las listas de bloques que devuelven /upload y /groups/upload repiten las
+mismas llaves y casi los mismos textos (materia, carrera, profesor...) en
+cada expansión día × módulo. Este módulo las codifica opcionalmente como
+columnas con diccionario de valores:
+
+    {
+        "format": "columnar",
+        "length": 3,
+        "columns": {
+            "materia": {"values": ["Cálculo", "Física"], "codes": [0, 0, 1]},
+            "modulo": {"data": [1, 2, 1]}
+        }
+    }
+
+- Columnas de enteros: se envían tal cual en "data".
+- Resto de columnas: "values" contiene cada valor distinto una sola vez y
+  "codes" la posición de cada fila dentro de "values".
+- Si una entrada no tiene una llave (p. ej. asignaciones manuales), su valor
+  es null y el decodificador la omite.
+
+El cliente lo solicita con ?format=columnar o con el encabezado
+Accept: application/vnd.yonapp.columnar+json (ver decodeColumnar en main.js).
+"""
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.yonapp.columnar+json"
+
+
+def wants_columnar(req):
+    """
+    Indica si la solicitud pidió el formato columnar.
+
+    Args:
+        req: Objeto request de Flask
+
+    Returns:
+        bool: True si se pidió ?format=columnar o el Accept correspondiente
+    """
+    if req.args.get("format") == "columnar":
+        return True
+    return COLUMNAR_MEDIA_TYPE in req.headers.get("Accept", "")
+
+
+def encode_columnar(records):
+    """
+    Codifica una lista de diccionarios en columnas con diccionario de valores.
+
+    Args:
+        records (list): Entradas del horario (dicts)
+
+    Returns:
+        dict: Estructura columnar descrita en la documentación del módulo
+    """
+    fields = {}
+    for record in records:
+        for field in record:
+            fields.setdefault(field, None)
+
+    columns = {}
+    for field in fields:
+        values = [record.get(field) for record in records]
+        if all(type(v) is int for v in values):
+            columns[field] = {"data": values}
+            continue
+        lookup = {}
+        codes = [lookup.setdefault(v, len(lookup)) for v in values]
+        columns[field] = {"values": list(lookup), "codes": codes}
+
+    return {"format": "columnar", "length": len(records), "columns": columns}
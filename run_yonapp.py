@@ -53,4 +53,6 @@ if __name__ == "__main__":
     # host="127.0.0.1": Solo accesible desde este PC (localhost)
     # port=5000: Puerto estándar de Flask
     # debug=False: Modo producción (sin recarga automática ni mensajes de debug)
-    app.run(host="127.0.0.1", port=5000, debug=False)
+    # threaded=True: Atiende solicitudes en paralelo (el estado compartido se
+    # protege con blueprints/state.py)
+    app.run(host="127.0.0.1", port=5000, debug=False, threaded=True)
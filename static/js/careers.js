@@ -25,7 +25,7 @@
  * - careerPendingDelete: Código de carrera pendiente de eliminación
  * - currentPlanningPeriod: 1=Impares, 2=Pares
  * - currentEditBlock: Bloque siendo editado en modal
- * - blockIndexToDelete: Índice del bloque a eliminar
+ * - blockIdToDelete: Id del bloque a eliminar
  * 
  * Dependencias:
  * - main.js: switchTab(), showStatusModal()
@@ -37,6 +37,7 @@
 // VARIABLES GLOBALES DEL MÓDULO
 // ===================================
 let careerDatabase = {};  // Almacena todas las carreras y planificaciones
+let careerVersion = 0;  // Versión de careerDatabase (ver /get_careers?since=)
 let careerPendingDelete = null;  // Código de carrera a eliminar (para confirmación)
 let currentPlanningPeriod = 1;  // 1 = Semestres Impares (1,3,5,7,9), 2 = Pares (2,4,6,8,10)
 
@@ -66,6 +67,7 @@ async function loadCareers() {
         const json = await res.json();
         if(json.success) {
             careerDatabase = json.data;
+            careerVersion = json.version || 0;
             currentPlanningPeriod = json.period || 1;
             updatePeriodUI();
             renderCareerListTable();
@@ -74,6 +76,78 @@ async function loadCareers() {
     } catch(e) { console.error("Error cargando carreras", e); }
 }
 
+/**
+ * Trae solo los cambios posteriores a careerVersion (/get_careers?since=).
+ * Si el servidor ya no tiene esa versión en su registro, responde todo.
+ */
+async function syncCareers() {
+    const res = await fetch(`/get_careers?since=${careerVersion}`);
+    if(res.status === 304) return;
+    const json = await res.json();
+    if(json.success) {
+        currentPlanningPeriod = json.period || currentPlanningPeriod;
+        await applyCareerChanges(json);
+    }
+}
+
+/**
+ * Aplica a careerDatabase la respuesta de una modificación o de syncCareers.
+ *
+ * Las modificaciones responden solo sus cambios ({version, op, ...}). Si
+ * falta alguno anterior (otro usuario modificó entre medio) se piden con
+ * syncCareers antes de aplicarlos.
+ */
+async function applyCareerChanges(json) {
+    if(json.full) {
+        careerDatabase = json.data;
+        careerVersion = json.version;
+        return;
+    }
+    const changes = json.changes || [];
+    if(changes.length && changes[0].version > careerVersion + 1) {
+        await syncCareers();
+    }
+    changes.forEach(change => {
+        if(change.version <= careerVersion) return;
+        applyCareerChange(change);
+        careerVersion = change.version;
+    });
+}
+
+/**
+ * Aplica un cambio del registro de carreras (ver CHANGE_LOG en careers.py).
+ *
+ * @param {Object} change - Cambio con "op" y sus datos
+ */
+function applyCareerChange(change) {
+    const plan = careerDatabase[change.code] && careerDatabase[change.code].planificacion;
+    switch(change.op) {
+        case 'save_career':
+            careerDatabase[change.code] = {
+                ...change.career,
+                planificacion: plan || []
+            };
+            break;
+        case 'delete_career':
+            delete careerDatabase[change.code];
+            break;
+        case 'add_block':
+            plan.push(change.block);
+            break;
+        case 'edit_block': {
+            const index = plan.findIndex(block => block.id === change.block.id);
+            if(index !== -1) plan[index] = change.block;
+            break;
+        }
+        case 'delete_block':
+            careerDatabase[change.code].planificacion = plan.filter(block => block.id !== change.id);
+            break;
+        case 'period':
+            currentPlanningPeriod = change.period;
+            break;
+    }
+}
+
 // ===================================
 // CONFIGURACIÓN DE PERÍODO ACADÉMICO
 // ===================================
@@ -105,6 +179,7 @@ async function setPlanningPeriod(period) {
         });
         const json = await res.json();
         if(json.success) {
+            await applyCareerChanges(json);
             currentPlanningPeriod = json.period;
             updatePeriodUI();
             updateScheduleSelectors(); // Refrescar selectores
@@ -261,7 +336,7 @@ async function saveCareerConfig() {
         });
         const json = await res.json();
         if(json.success) {
-            careerDatabase = json.data; 
+            await applyCareerChanges(json);
             renderCareerListTable();     
             updateScheduleSelectors();   
             document.getElementById('modal-career-config').classList.add('hidden');
@@ -293,7 +368,7 @@ async function saveEditedCareer() {
         });
         const json = await res.json();
         if(json.success) {
-            careerDatabase = json.data; 
+            await applyCareerChanges(json);
             renderCareerListTable();     
             updateScheduleSelectors();   
             document.getElementById('modal-edit-career').classList.add('hidden');
@@ -336,7 +411,7 @@ async function confirmDeleteCareer() {
             body: JSON.stringify({ code: careerPendingDelete })
         });
         if(res.ok) {
-            delete careerDatabase[careerPendingDelete];
+            await applyCareerChanges(await res.json());
             renderCareerListTable();
             updateScheduleSelectors();
             document.getElementById('modal-delete-career').classList.add('hidden');
@@ -570,15 +645,13 @@ function updateScheduleFilters() {
  * - Clic en bloque: abre modal de edición
  * - Hover en bloque: muestra botón de eliminar
  * 
- * IMPORTANTE: Guarda originalIndex para permitir eliminación correcta
+ * IMPORTANTE: Los botones usan el id estable del bloque (block.id)
  */
 function renderCareerGrid() {
     const code = document.getElementById('schedule-career-selector').value;
     const malla = document.getElementById('schedule-malla-selector').value;
     const sem = document.getElementById('schedule-sem-selector').value;
     const codeLiteral = JSON.stringify(code);
-    const mallaLiteral = JSON.stringify(malla);
-    const semLiteral = JSON.stringify(sem);
     const tbody = document.getElementById('schedule-grid-body');
     const emptyState = document.getElementById('schedule-empty-state');
 
@@ -593,11 +666,9 @@ function renderCareerGrid() {
 
     const allBlocks = careerDatabase[code].planificacion || [];
     
-    // IMPORTANTE: Mapeamos los bloques pero guardamos su ÍNDICE ORIGINAL
-    // Esto es vital para saber cuál borrar después.
-    const activeBlocks = allBlocks
-        .map((block, index) => ({ ...block, originalIndex: index })) // Guardamos el índice real
-        .filter(b => b.malla === malla && b.semestre == sem);
+    // Cada bloque lleva su id estable (block.id), que es lo que se envía
+    // al servidor para editarlo o borrarlo.
+    const activeBlocks = allBlocks.filter(b => b.malla === malla && b.semestre == sem);
 
     const times = ["08:00 - 09:20", "09:30 - 10:50", "11:00 - 12:20", "12:30 - 13:50", "14:00 - 15:20", "15:30 - 16:50", "17:00 - 18:20", "18:30 - 19:50"];
     const days = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado"];
@@ -624,14 +695,10 @@ function renderCareerGrid() {
                     if(block.tipo === 'TAL') bgClass = "bg-green-50 border-green-200 text-green-700";
                     if(block.tipo === 'SIM') bgClass = "bg-purple-50 border-purple-200 text-purple-700";
 
-                    const nrcLiteral = JSON.stringify(block.nrc);
-                    const secLiteral = JSON.stringify(block.seccion);
-                    const dayLiteral = JSON.stringify(day);
-
                     return `
                         <div class="flex-1 ${bgClass} border border-l-4 p-1 text-[10px] flex flex-col justify-center items-center overflow-hidden hover:brightness-95 transition cursor-pointer text-center group relative"
-                             onclick='openEditBlockModal(${codeLiteral}, ${mallaLiteral}, ${semLiteral}, ${dayLiteral}, ${i+1}, ${nrcLiteral}, ${secLiteral})'>
-                            <button type="button" onclick='promptDeleteBlock(${block.originalIndex}, ${codeLiteral}); event.stopPropagation();' class="absolute top-0.5 right-0.5 hidden group-hover:flex items-center justify-center bg-white/80 text-red-600 rounded-full p-0.5 shadow-sm hover:bg-white">
+                             onclick='openEditBlockModal(${codeLiteral}, ${block.id})'>
+                            <button type="button" onclick='promptDeleteBlock(${block.id}, ${codeLiteral}); event.stopPropagation();' class="absolute top-0.5 right-0.5 hidden group-hover:flex items-center justify-center bg-white/80 text-red-600 rounded-full p-0.5 shadow-sm hover:bg-white">
                                 <i data-lucide="trash-2" class="w-2.5 h-2.5"></i>
                             </button>
                             <div class="font-bold truncate w-full text-[10px]">NRC ${block.nrc}</div>
@@ -838,7 +905,7 @@ async function submitNewBlock() {
                 alert(`Error en ${block.dia} M${block.modulo}: ${json.error}`);
                 return;
             }
-            careerDatabase = json.data;
+            await applyCareerChanges(json);
         }
         
         // Si todo fue exitoso
@@ -1001,41 +1068,27 @@ let currentEditBlock = null;  // Almacena datos del bloque siendo editado
  * Abre el modal de edición para un bloque existente.
  * 
  * @param {string} careerCode - Código de la carrera
- * @param {string} malla - Malla curricular
- * @param {number} semestre - Número de semestre
- * @param {string} dia - Día de la semana
- * @param {number} modulo - Número de módulo (1-8)
- * @param {string} nrc - NRC de la asignatura
- * @param {string} seccion - Sección del curso
+ * @param {number} blockId - Id del bloque
  * 
  * Busca:
- * - Bloque completo en careerDatabase para obtener todos sus datos
+ * - Bloque completo en careerDatabase (por id) para obtener todos sus datos
  * 
  * Precarga:
  * - Campos de información (disabled): código materia, n° curso, NRC, sección
  * - Campos editables: día, módulo, tipo
  */
-function openEditBlockModal(careerCode, malla, semestre, dia, modulo, nrc, seccion) {
+function openEditBlockModal(careerCode, blockId) {
     // Buscar el bloque en la base local para obtener todos sus datos
-    let tipo = 'TEO';
-    let codigoMateria = '';
-    let nCurso = '';
-    
     const career = careerDatabase[careerCode];
-    if (career && Array.isArray(career.planificacion)) {
-        const found = career.planificacion.find(b =>
-            b.malla === malla && String(b.semestre) === String(semestre) &&
-            b.dia === dia && Number(b.modulo) === Number(modulo) &&
-            String(b.nrc) === String(nrc) && b.seccion === seccion
-        );
-        if (found) {
-            tipo = found.tipo || 'TEO';
-            codigoMateria = found.codigo_materia || '';
-            nCurso = found.n_curso || '';
-        }
-    }
+    const found = career && (career.planificacion || []).find(b => b.id === blockId);
+    if (!found) return;
 
-    currentEditBlock = { careerCode, malla, semestre, dia, modulo, nrc, seccion, tipo };
+    const tipo = found.tipo || 'TEO';
+    const codigoMateria = found.codigo_materia || '';
+    const nCurso = found.n_curso || '';
+    const { dia, modulo, nrc, seccion } = found;
+
+    currentEditBlock = { careerCode, id: blockId, dia, modulo, nrc, seccion, tipo };
 
     // Llenar campos de información (disabled)
     document.getElementById('edit-subject-code').value = codigoMateria;
@@ -1076,7 +1129,7 @@ function openEditBlockModal(careerCode, malla, semestre, dia, modulo, nrc, secci
  * 
  * Flujo:
  * 1. Lee nuevos valores del formulario
- * 2. Envía POST a /edit_block con identificadores old/new
+ * 2. Envía POST a /move_block con el id del bloque y los valores nuevos
  * 3. Actualiza careerDatabase local
  * 4. Rerenderiza grilla y recarga asignaturas
  * 5. Cierra modal
@@ -1089,25 +1142,20 @@ async function saveEditedBlock() {
     const newType = document.getElementById('edit-block-type').value;
 
     try {
-        const res = await fetch('/edit_block', {
+        const res = await fetch('/move_block', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
                 career_code: currentEditBlock.careerCode,
-                malla: currentEditBlock.malla,
-                semestre: currentEditBlock.semestre,
-                old_dia: currentEditBlock.dia,
-                old_modulo: currentEditBlock.modulo,
-                nrc: currentEditBlock.nrc,
-                seccion: currentEditBlock.seccion,
-                new_dia: newDay,
-                new_modulo: newMod,
-                new_tipo: newType
+                block_id: currentEditBlock.id,
+                dia: newDay,
+                modulo: newMod,
+                tipo: newType
             })
         });
         const json = await res.json();
         if (json.success) {
-            careerDatabase = json.data;
+            await applyCareerChanges(json);
             renderCareerGrid();
             if (typeof loadSubjectsFromDatabase === 'function') {
                 loadSubjectsFromDatabase();
@@ -1124,27 +1172,11 @@ async function saveEditedBlock() {
 
 /**
  * Inicia el proceso de eliminación desde el modal de edición.
- * Delega a promptDeleteBlock usando el índice del bloque actual.
+ * Delega a promptDeleteBlock usando el id del bloque actual.
  */
 function deleteBlockFromModal() {
     if (!currentEditBlock) return;
-    const code = currentEditBlock.careerCode;
-    const plan = (careerDatabase[code] && careerDatabase[code].planificacion) || [];
-    const matchIndex = plan.findIndex(block =>
-        block.malla === currentEditBlock.malla &&
-        String(block.semestre) === String(currentEditBlock.semestre) &&
-        block.dia === currentEditBlock.dia &&
-        Number(block.modulo) === Number(currentEditBlock.modulo) &&
-        String(block.nrc) === String(currentEditBlock.nrc) &&
-        block.seccion === currentEditBlock.seccion
-    );
-
-    if (matchIndex === -1) {
-        alert('No se pudo identificar el bloque a eliminar.');
-        return;
-    }
-
-    promptDeleteBlock(matchIndex, code);
+    promptDeleteBlock(currentEditBlock.id, currentEditBlock.careerCode);
 }
 
 // ===================================
@@ -1385,21 +1417,21 @@ function updateSectionFromNrc() {
 // ELIMINACIÓN DE BLOQUES
 // ===================================
 
-let blockIndexToDelete = null;  // Índice del bloque a eliminar
+let blockIdToDelete = null;  // Id del bloque a eliminar
 let blockCareerForDeletion = null;  // Código de carrera del bloque
 
 /**
  * Abre el modal de confirmación para eliminar un bloque.
  * 
- * @param {number} index - Índice del bloque en el array de planificación
+ * @param {number} blockId - Id del bloque
  * @param {string} careerCode - Código de la carrera (opcional, se infiere del selector)
  * 
  * Seguridad:
  * - Requiere confirmación explícita del usuario
- * - Almacena temporalmente índice y código de carrera
+ * - Almacena temporalmente id del bloque y código de carrera
  */
-function promptDeleteBlock(index, careerCode = null) {
-    blockIndexToDelete = index;
+function promptDeleteBlock(blockId, careerCode = null) {
+    blockIdToDelete = blockId;
     const selector = document.getElementById('schedule-career-selector');
     blockCareerForDeletion = careerCode || (selector ? selector.value : null);
 
@@ -1414,7 +1446,7 @@ function promptDeleteBlock(index, careerCode = null) {
  * Ejecuta la eliminación del bloque pendiente.
  * 
  * Flujo:
- * 1. Envía POST a /delete_planning_block con índice del bloque
+ * 1. Envía POST a /delete_block con el id del bloque
  * 2. Actualiza careerDatabase local
  * 3. Rerenderiza grilla
  * 4. Recarga asignaturas (actualiza subjects.js)
@@ -1426,24 +1458,24 @@ function promptDeleteBlock(index, careerCode = null) {
 async function confirmPlanningBlockDelete() {
     const targetCareer = blockCareerForDeletion;
 
-    if (blockIndexToDelete === null || !targetCareer) {
+    if (blockIdToDelete === null || !targetCareer) {
         alert('Selecciona un bloque válido para eliminar.');
         return;
     }
 
     try {
-        const res = await fetch('/delete_planning_block', {
+        const res = await fetch('/delete_block', {
             method: 'POST',
             headers: {'Content-Type': 'application/json'},
             body: JSON.stringify({ 
                 career_code: targetCareer,
-                block_index: blockIndexToDelete
+                block_id: blockIdToDelete
             })
         });
         const json = await res.json();
 
         if(json.success) {
-            careerDatabase = json.data;
+            await applyCareerChanges(json);
             renderCareerGrid();
             if (typeof loadSubjectsFromDatabase === 'function') {
                 loadSubjectsFromDatabase();
@@ -1457,7 +1489,7 @@ async function confirmPlanningBlockDelete() {
             if(editModal) {
                 editModal.classList.add('hidden');
             }
-            blockIndexToDelete = null;
+            blockIdToDelete = null;
             blockCareerForDeletion = null;
             currentEditBlock = null;
         } else {
@@ -130,11 +130,7 @@ async function initGroupsView() {
     if (typeof toggleLoading === 'function') toggleLoading(true);
 
     try {
-        const resp = await fetch('/groups/upload', {
-            method: 'POST',
-            body: formData
-        });
-        const json = await resp.json();
+        const json = await uploadAsJob('/groups/upload?format=columnar', formData);
         if (typeof toggleLoading === 'function') toggleLoading(false);
         if (!json.success) {
             console.error('Error al procesar Excel de bloques:', json.error);
@@ -143,6 +139,7 @@ async function initGroupsView() {
         }
 
         globalGroupsData = json.data;
+        if (globalGroupsData) globalGroupsData.schedule_ni = decodeColumnar(globalGroupsData.schedule_ni);
         if (!globalGroupsData || !Array.isArray(globalGroupsData.schedule_ni)) {
             selector.innerHTML = '<option value="">-- No se encontraron datos NI --</option>';
             return;
@@ -523,42 +520,17 @@ function buildGroupsForCareer(blocks) {
  * @param {string} rangeStr - Rango horario en formato "HH:MM-HH:MM" o "HMM-HMM"
  * @returns {number|null} - Número de módulo o null si no se puede determinar
  * 
- * Mapeo:
- * - 08:00 → M1
- * - 09:30 → M2
- * - 11:00 → M3
- * - 12:30 → M4
- * - 14:00 → M5
- * - 15:30 → M6
- * - 17:00 → M7
- * - 18:30 → M8
+ * El módulo se obtiene de la hora de inicio con la grilla de /module_grid
+ * (M1 08:00, M2 09:30, M3 11:00, M4 12:30, M5 14:00, M6 15:30, M7 17:00, M8 18:30).
  */
 function getModuleFromTimeRange(rangeStr) {
     if (!rangeStr) return null;
     const parts = rangeStr.split('-');
     if (parts.length < 2) return null;
-    let start = parts[0].trim();
-
-    // Normalizar formato sin dos puntos: "800" -> "08:00"
-    if (!start.includes(':')) {
-        if (start.length === 3) {
-            start = '0' + start[0] + ':' + start.substring(1);
-        } else if (start.length === 4) {
-            start = start.substring(0, 2) + ':' + start.substring(2);
-        }
-    }
+    const start = parts[0].trim();
 
-    // Mapeo simple por hora de inicio
-    if (start === "08:00") return 1;
-    if (start === "09:30") return 2;
-    if (start === "11:00") return 3;
-    if (start === "12:30") return 4;
-    if (start === "14:00") return 5;
-    if (start === "15:30") return 6;
-    if (start === "17:00") return 7;
-    if (start === "18:30") return 8;
-
-    return null;
+    // Resolución por tabla con la grilla del servidor (ver moduleFromStartTime en main.js)
+    return moduleFromStartTime(start);
 }
 
 /**
@@ -595,11 +567,7 @@ function showGroupTimetable(groupIndex) {
         console.log('  -', b.materia, '|', b.dia_norm, '|', b.horario_texto, '| NRC:', b.nrc);
     });
 
-    // Definir módulos y días
-    const times = [
-        "08:00 - 09:20", "09:30 - 10:50", "11:00 - 12:20", "12:30 - 13:50",
-        "14:00 - 15:20", "15:30 - 16:50", "17:00 - 18:20", "18:30 - 19:50"
-    ];
+    // Definir días (los rótulos de los módulos vienen de la grilla del servidor)
     const days = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado"]; 
 
     // Limpiar grilla
@@ -614,7 +582,7 @@ function showGroupTimetable(groupIndex) {
         modTd.className = 'p-1 border-r border-slate-200 bg-slate-50 text-center w-20 h-12';
         modTd.innerHTML = `
             <span class="block font-bold text-[11px] text-blue-900">Módulo ${i}</span>
-            <span class="text-[9px] text-slate-500 whitespace-nowrap">${times[i-1]}</span>
+            <span class="text-[9px] text-slate-500 whitespace-nowrap">${moduleLabel(i)}</span>
         `;
         tr.appendChild(modTd);
 
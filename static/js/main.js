@@ -183,6 +183,50 @@ function toggleLoading(show) {
     if(!modal) return;
     if (show) modal.classList.remove('hidden');
     else modal.classList.add('hidden');
+    setLoadingMessage('Por favor espera un momento.');
+}
+
+function setLoadingMessage(text) {
+    const message = document.getElementById('loading-message');
+    if(message) message.innerText = text;
+}
+
+// --- CARGAS EN SEGUNDO PLANO (HELPERS) ---
+
+// Nombres visibles de las etapas que reportan los trabajos (/jobs/<id>)
+const JOB_STAGE_LABELS = {
+    'read': 'Leyendo archivo',
+    'normalize': 'Normalizando columnas',
+    'expand': 'Expandiendo horarios',
+    'dedupe': 'Eliminando duplicados',
+    'stats': 'Calculando ocupación'
+};
+
+/**
+ * Sube un archivo como trabajo en segundo plano (?async=1) y espera su
+ * resultado consultando /jobs/<id>. Mientras tanto muestra la etapa actual
+ * en el modal de carga.
+ * 
+ * @param {string} url - Endpoint de carga (con sus parámetros)
+ * @param {FormData} formData - Formulario con el archivo
+ * @returns {Promise<Object>} Respuesta con el mismo formato que la carga directa:
+ *          {success, data} o {success: false, error}
+ */
+async function uploadAsJob(url, formData) {
+    const separator = url.includes('?') ? '&' : '?';
+    const response = await fetch(url + separator + 'async=1', { method: 'POST', body: formData });
+    const started = await response.json();
+    if (!started.job_id) return { success: false, error: started.error || `Error del Servidor (${response.status})` };
+
+    while (true) {
+        await new Promise(r => setTimeout(r, 500));
+        const poll = await fetch('/jobs/' + started.job_id);
+        const { job } = await poll.json();
+        if (!job) return { success: false, error: 'Se perdió el seguimiento de la carga.' };
+        if (job.status === 'done') return { success: true, data: job.result };
+        if (job.status === 'error' || job.status === 'cancelled') return { success: false, error: job.error };
+        if (job.stage) setLoadingMessage(`${JOB_STAGE_LABELS[job.stage] || job.stage}... (${job.progress}%)`);
+    }
 }
 
 function showStatusModal(type, title, message) {
@@ -212,9 +256,80 @@ function closeStatusModal() {
     if(modal) modal.classList.add('hidden');
 }
 
+// --- FORMATO COLUMNAR (HELPERS) ---
+
+/**
+ * Decodifica una lista de bloques enviada en formato columnar
+ * (?format=columnar, ver blueprints/wire_format.py) a un array de objetos.
+ * Si recibe un array normal, lo retorna sin cambios.
+ * 
+ * @param {Object|Array} payload - Estructura columnar o lista de objetos
+ * @returns {Array} Lista de objetos, uno por bloque
+ */
+function decodeColumnar(payload) {
+    if (!payload || payload.format !== 'columnar') return payload;
+    const rows = Array.from({ length: payload.length }, () => ({}));
+    Object.entries(payload.columns).forEach(([field, column]) => {
+        for (let i = 0; i < payload.length; i++) {
+            const value = column.data ? column.data[i] : column.values[column.codes[i]];
+            if (value !== null) rows[i][field] = value;
+        }
+    });
+    return rows;
+}
+
+// --- GRILLA DE MÓDULOS (HELPERS) ---
+
+// Grilla de módulos del servidor (GET /module_grid, ver blueprints/module_grid.py)
+let moduleGrid = { modules: [], startLookup: [] };
+
+/**
+ * Descarga la grilla de módulos y precalcula, para cada minuto del día,
+ * el módulo en que comienza una clase que parte a esa hora.
+ */
+async function loadModuleGrid() {
+    try {
+        const response = await fetch('/module_grid');
+        const data = await response.json();
+        if (!data.success) return;
+        const startLookup = new Array(24 * 60).fill(null);
+        data.start_windows.forEach(w => {
+            for (let m = w.desde; m <= w.hasta; m++) startLookup[m] = w.modulo;
+        });
+        moduleGrid = { modules: data.modules, startLookup };
+    } catch (error) {
+        console.error('No se pudo cargar la grilla de módulos:', error);
+    }
+}
+
+/**
+ * Módulo en que comienza una clase según su hora de inicio
+ * ("800", "08:00", "8:00"...), con las mismas reglas que el servidor.
+ * 
+ * @param {string} timeStr - Hora de inicio
+ * @returns {number|null} Número de módulo o null si no coincide con ninguno
+ */
+function moduleFromStartTime(timeStr) {
+    const digits = String(timeStr || '').trim().replace(/:/g, '').substring(0, 4);
+    if (!/^\d+$/.test(digits)) return null;
+    const value = parseInt(digits, 10);
+    const hours = Math.floor(value / 100), minutes = value % 100;
+    if (hours >= 24 || minutes >= 60) return null;
+    return moduleGrid.startLookup[hours * 60 + minutes] || null;
+}
+
+/**
+ * Rótulo "HH:MM - HH:MM" de un módulo (1-8).
+ */
+function moduleLabel(modulo) {
+    const module = moduleGrid.modules[modulo - 1];
+    return module ? module.label : '';
+}
+
 // Inicialización Global
 document.addEventListener('DOMContentLoaded', () => {
     lucide.createIcons();
+    loadModuleGrid();
     const dateEl = document.getElementById('date-display');
     if(dateEl) dateEl.innerText = new Date().toLocaleDateString('es-ES', { weekday: 'long', day: 'numeric', month: 'long' });
     
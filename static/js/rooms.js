@@ -29,7 +29,7 @@
 // ===================================
 // VARIABLES GLOBALES DEL MÓDULO
 // ===================================
-let globalData = null;  // Datos completos del Excel procesado (stats + schedule)
+let globalData = null;  // Resumen del Excel procesado (stats y totales; el horario se consulta en /schedule)
 let sortDirection = 'asc';  // Dirección de ordenamiento de tabla
 let currentHighlight = null;  // {day: string, mod: number} para resaltar celda
 let roomPendingDelete = null;  // Código de sala a eliminar (para confirmación)
@@ -76,7 +76,8 @@ function previewFile() {
     const input = document.getElementById('excelFile');
     const display = document.getElementById('file-name-display');
     if(input && input.files.length > 0) {
-        display.innerText = input.files[0].name;
+        // Se pueden subir varios archivos (uno por sede); se procesan juntos
+        display.innerText = Array.from(input.files).map(f => f.name).join(', ');
         document.getElementById('upload-preview').classList.remove('hidden');
     }
 }
@@ -86,7 +87,8 @@ function previewFile() {
  * 
  * Flujo:
  * 1. Crea FormData con el archivo seleccionado
- * 2. Envía POST a /upload
+ * 2. Envía POST a /upload (en modo delta si ya hay un horario cargado) como
+ *    trabajo en segundo plano y consulta su avance en /jobs/<id>
  * 3. Procesa respuesta del servidor
  * 4. Actualiza UI con datos procesados
  * 5. Genera visualizaciones (gráficos, tablas)
@@ -99,32 +101,29 @@ function previewFile() {
 async function uploadFileToBackend() {
     const input = document.getElementById('excelFile');
     const formData = new FormData();
-    formData.append('file', input.files[0]);
+    Array.from(input.files).forEach(f => formData.append('file', f));
 
     toggleLoading(true); // Llama a main.js
 
     try {
-        const response = await fetch('/upload', { method: 'POST', body: formData });
-        
-        if (!response.ok) {
-            const errorText = await response.text();
-            throw new Error(`Error del Servidor (${response.status})`);
-        }
-
-        const result = await response.json();
+        // Si ya hay un horario cargado, el servidor solo aplica las diferencias
+        const url = globalData ? '/upload?mode=delta&include_schedule=0' : '/upload?include_schedule=0';
+        // Se procesa en segundo plano; el modal muestra la etapa en curso
+        const result = await uploadAsJob(url, formData);
         toggleLoading(false);
 
         if (result.success) {
-            globalData = result.data;
-            
             try {
-                updateDashboard(globalData);
-                sortDirection = 'asc';
-                if(document.getElementById('filter-category')) document.getElementById('filter-category').value = 'all';
-                applyFiltersAndSort(); 
-                populateRoomSelector(globalData.stats);
+                let message = 'El archivo se procesó correctamente.';
+                if (result.data.mode === 'delta') {
+                    applyRoomsDelta(result.data);
+                    const s = result.data.changes.summary;
+                    message = `Horario actualizado: ${s.added} NRC nuevos, ${s.changed} modificados y ${s.removed} eliminados.`;
+                } else {
+                    applyRoomsData(result.data);
+                }
                 
-                showStatusModal('success', '¡Carga Exitosa!', 'El archivo se procesó correctamente.');
+                showStatusModal('success', '¡Carga Exitosa!', message);
                 switchTab('occupancy');
                 setTimeout(renderOccupancyChart, 100);
 
@@ -145,6 +144,64 @@ async function uploadFileToBackend() {
     }
 }
 
+/**
+ * Carga en la UI un conjunto de datos procesados (stats + schedule).
+ * 
+ * @param {Object} data - Datos con el formato de la respuesta de /upload
+ */
+function applyRoomsData(data) {
+    globalData = data;
+    updateDashboard(globalData);
+    sortDirection = 'asc';
+    if(document.getElementById('filter-category')) document.getElementById('filter-category').value = 'all';
+    applyFiltersAndSort(); 
+    populateRoomSelector(globalData.stats);
+}
+
+/**
+ * Aplica el conjunto de cambios de una carga en modo delta (/upload?mode=delta)
+ * sin recargar todos los datos: reemplaza las estadísticas de las salas
+ * afectadas y vuelve a dibujar el horario visible si cambió.
+ * 
+ * @param {Object} data - {total_rooms, total_courses, changes: {stats, upserted, released}}
+ */
+function applyRoomsDelta(data) {
+    const changes = data.changes;
+    const statsByRoom = new Map(globalData.stats.map(s => [s.sala, s]));
+    changes.stats.forEach(stat => statsByRoom.set(stat.sala, stat));
+    globalData.stats = [...statsByRoom.values()].sort((a, b) => (a.sala < b.sala ? -1 : a.sala > b.sala ? 1 : 0));
+    globalData.total_rooms = data.total_rooms;
+    globalData.total_courses = data.total_courses;
+
+    updateDashboard(globalData);
+    applyFiltersAndSort();
+    const selector = document.getElementById('room-selector');
+    const selected = selector ? selector.value : '';
+    populateRoomSelector(globalData.stats);
+    if (selector) selector.value = selected;
+
+    // Redibujar el horario abierto solo si alguno de sus bloques cambió
+    const upserted = decodeColumnar(changes.upserted);
+    const touched = upserted.concat(changes.released).some(b => b.ubicacion === selected);
+    if (selected && touched) renderTimetable(selected);
+}
+
+/**
+ * Recupera el último horario procesado por el servidor (si existe).
+ * Tras un reinicio, el servidor lo restaura desde su base de datos, por lo que
+ * no es necesario volver a subir el Excel.
+ */
+async function restoreRoomsData() {
+    try {
+        const response = await fetch('/current_data?include_schedule=0');
+        if (!response.ok) return;
+        const result = await response.json();
+        if (result.success) applyRoomsData(result.data);
+    } catch (error) {
+        console.error("No se pudo recuperar el último horario:", error);
+    }
+}
+
 // ===================================
 // GESTIÓN DE SALAS (CRUD)
 // ===================================
@@ -299,7 +356,12 @@ function updateOccupancyTable(stats) {
 
 let currentFinderResults = []; // Variable global para guardar los resultados actuales
 
-function searchRooms() {
+/**
+ * Busca salas disponibles consultando /find_rooms.
+ * El servidor responde desde mapas de bits de ocupación por sala, por lo
+ * que no es necesario recorrer el horario completo en el navegador.
+ */
+async function searchRooms() {
     if (!globalData) {
         showStatusModal('error', 'Sin Datos', 'Primero debes subir un archivo Excel.');
         return;
@@ -310,16 +372,30 @@ function searchRooms() {
     const allDays = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado"];
     const daysToCheck = (selectedDay === 'any') ? allDays : [selectedDay];
 
-    let availableRooms = globalData.stats.filter(room => {
-        if (cat !== 'all' && room.categoria !== cat) return false;
-        return daysToCheck.some(day => !globalData.schedule.find(c => c.ubicacion === room.sala && c.dia_norm === day && c.modulo === mod));
+    const params = new URLSearchParams({
+        slots: daysToCheck.map(day => `${day}:${mod}`).join(','),
+        mode: selectedDay === 'any' ? 'any' : 'all',
+        cat: cat
     });
 
-    // Guardar resultados y resetear ordenamiento
-    currentFinderResults = availableRooms.map(room => ({
-        ...room,
-        dayToHighlight: selectedDay === 'any' ? allDays.find(day => !globalData.schedule.find(c => c.ubicacion === room.sala && c.dia_norm === day && c.modulo === mod)) : selectedDay
-    }));
+    try {
+        const response = await fetch(`/find_rooms?${params}`);
+        const result = await response.json();
+        if (!result.success) {
+            showStatusModal('error', 'Error', result.error || 'No se pudo buscar salas.');
+            return;
+        }
+
+        // Guardar resultados y resetear ordenamiento
+        currentFinderResults = result.data.map(room => ({
+            ...room,
+            dayToHighlight: selectedDay === 'any' ? room.free_slots[0].dia : selectedDay
+        }));
+    } catch (error) {
+        console.error("Error buscando salas:", error);
+        showStatusModal('error', 'Error', 'Fallo de conexión.');
+        return;
+    }
     
     document.getElementById('finder-sort').value = 'none';
     renderFinderResults();
@@ -384,8 +460,41 @@ function viewRoomSchedule(roomName, highlightDay, highlightMod) {
 }
 
 // --- RENDERIZADO DE HORARIO ---
-function renderTimetable(salaName) {
+
+/**
+ * Obtiene desde /schedule todos los bloques que cumplen los filtros,
+ * recorriendo las páginas con el cursor que entrega el servidor.
+ * 
+ * @param {Object} filters - Filtros por campo (ej: {ubicacion: 'A102'})
+ * @returns {Promise<Array>} Bloques del horario
+ */
+async function fetchSchedule(filters) {
+    const entries = [];
+    let cursor = null;
+    do {
+        const params = new URLSearchParams(filters);
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`/schedule?${params}`);
+        const result = await response.json();
+        if (!result.success) throw new Error(result.error || 'No se pudo obtener el horario.');
+        entries.push(...result.data);
+        cursor = result.next_cursor;
+    } while (cursor);
+    return entries;
+}
+
+async function renderTimetable(salaName) {
     if (!salaName || !globalData) return;
+
+    let classes;
+    try {
+        classes = await fetchSchedule({ ubicacion: salaName });
+    } catch (error) {
+        console.error("Error obteniendo horario:", error);
+        showStatusModal('error', 'Error', 'No se pudo obtener el horario de la sala.');
+        return;
+    }
+
     const days = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado"];
     for (let i = 1; i <= 8; i++) {
         days.forEach(day => {
@@ -403,7 +512,6 @@ function renderTimetable(salaName) {
             hlCell.innerHTML = `<div class="h-full w-full flex items-center justify-center"><span class="text-green-700 font-bold text-xs bg-green-100 px-2 py-1 rounded-full border border-green-200 shadow-sm animate-pulse">DISPONIBLE</span></div>`;
         }
     }
-    const classes = globalData.schedule.filter(c => c.ubicacion === salaName);
     classes.forEach(cls => {
         const cellId = `cell-${cls.dia_norm}-${cls.modulo}`;
         const cell = document.getElementById(cellId);
@@ -574,20 +682,6 @@ async function submitAssignment() {
         return;
     }
 
-    // Check for conflicts
-    if (globalData && globalData.schedule) {
-        const conflict = globalData.schedule.find(s => 
-            s.ubicacion === selector.value &&
-            s.dia_norm === day &&
-            s.modulo == module // Loose equality for string/number comparison
-        );
-
-        if (conflict) {
-            showStatusModal('error', 'Conflicto de Horario', `La sala ${selector.value} ya está ocupada el ${day} en el módulo ${module}.`);
-            return;
-        }
-    }
-
     const payload = {
         sala: selector.value,
         nrc: nrc,
@@ -606,14 +700,12 @@ async function submitAssignment() {
         const result = await response.json();
 
         if (result.success) {
-            // Actualizar globalData localmente
-            if (globalData && globalData.schedule) {
-                globalData.schedule.push(result.entry);
-            }
-            
             closeAssignModal();
             renderTimetable(selector.value);
             showStatusModal('success', 'Asignada', 'La asignatura se ha añadido correctamente.');
+        } else if (response.status === 409) {
+            // El servidor valida los choques contra su índice de ocupación
+            showStatusModal('error', 'Conflicto de Horario', result.error);
         } else {
             showStatusModal('error', 'Error', result.error || 'No se pudo asignar.');
         }
@@ -664,16 +756,6 @@ async function confirmRoomBlockDelete() {
         const result = await response.json();
 
         if (result.success) {
-            if (globalData && globalData.schedule) {
-                globalData.schedule = globalData.schedule.filter(item => 
-                    !(item.nrc === payload.nrc && 
-                      item.seccion === payload.seccion && 
-                      item.dia_norm === payload.dia_norm && 
-                      item.modulo === payload.modulo &&
-                      item.ubicacion === payload.ubicacion)
-                );
-            }
-            
             closeBlockDeleteModal();
             closeDetailsPanel();
             renderTimetable(payload.ubicacion);
@@ -687,8 +769,10 @@ async function confirmRoomBlockDelete() {
     }
 }
 
-// --- VALIDACIÓN DE INPUTS ---
+// --- INICIALIZACIÓN Y VALIDACIÓN DE INPUTS ---
 document.addEventListener('DOMContentLoaded', () => {
+    restoreRoomsData();
+
     const nrcInput = document.getElementById('assign-nrc');
     const sectionInput = document.getElementById('assign-section');
 
@@ -0,0 +1,103 @@
+"""
+Configuración común de las pruebas.
+
+Las pruebas importan los blueprints desde la raíz del repositorio y arman
+los libros Excel de prueba con openpyxl en un directorio temporal.
+"""
+
+import datetime
+import os
+import sys
+
+import openpyxl
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def make_workbook(tmp_path):
+    """Escribe un .xlsx con un encabezado y filas, y retorna su ruta."""
+    def make(header, rows, name="horario.xlsx"):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(header)
+        for row in rows:
+            ws.append(row)
+        path = tmp_path / name
+        wb.save(path)
+        return str(path)
+    return make
+
+
+# Horario de prueba con los casos que separan a las dos rutas de ingesta:
+# NRC y N_CURSO vacíos (columnas float: "101.0"), fechas vacías (NaT), horas
+# como número y como texto, módulos dobles, un NRC repetido en dos salas,
+# choques por el mismo bloque y celdas de día "NA" o vacías.
+SCHEDULE_HEADER = [
+    "NRC", "SECCION", "NOMBRE", "MATERIA", "N_CURSO", "COMPONENTE", "SALA",
+    "HR_INICIO", "HR_FIN", "CARRERA_RESERVA", "NOMBRE_", "APELLIDO", "CUPO_DISP",
+    "FECHA_INI", "FECHA_TERM", "LUNES", "MARTES", "MIERCOLES", "JUEVES", "VIERNES", "SABADO",
+]
+_START = datetime.datetime(2024, 3, 4)
+_END = datetime.datetime(2024, 7, 4)
+SCHEDULE_ROWS = [
+    [2000, "A", "Fisica", "FIS", 101, "LAB", "R380", 1100, 1220, "ENFE", "SIN DOCENTE", None, 30,
+     _START, _END, "X", None, None, None, "X", None],
+    [None, "B", "Quimica", "QUI", 101, "LAB", "R6", 1830, 1950, "ICIF", "Juan", "Perez", 80,
+     _START, None, None, "X", None, "X", None, None],
+    [1002, None, "Calculo", "MAT", None, "TEO", "R380", 800, 1040, "ENFE", None, None, None,
+     None, _END, None, None, None, "X", None, None],
+    [1003, "A", "Algebra", "MAT", 102, "TEO", "R380", 800, 920, "ICIF", "Ana", "Soto", 45,
+     _START, _END, None, None, None, "X", None, "NA"],
+    [1004, "C", "Historia", "HIS", 201, "TEO", "R6", "08:00", "10:40", "DERE", "Luis", None, "x",
+     _START, _END, "x", "", None, None, None, "X"],
+    [1004, "C", "Historia", "HIS", 201, "TEO", "R7", 1100, 1220, "DERE", "Luis", None, 20,
+     _START, _END, None, None, "X", None, None, None],
+    [1005, "A", "Sin horario", "HIS", 202, "TEO", "R7", None, None, "DERE", None, None, 10,
+     _START, _END, "X", None, None, None, None, None],
+    [1006, "D", "Redes", "INF", 301, "LAB", None, 1100, 1220, "INFO", "Eva", "Rojas", 15,
+     _START, _END, None, "X", None, None, None, None],
+    [2000, "A", "Fisica", "FIS", 101, "LAB", "R380", 1100, 1220, "ICIF", "sin docente ", None, 30,
+     _START, _END, "X", None, None, None, "X", None],
+    [1007, "E", "Etica", "FIL", None, "TEO", "nan", 1400, 1520, None, "SIN DOCENTE", None, 25,
+     None, None, None, None, "X", None, None, None],
+]
+
+
+@pytest.fixture
+def schedule_workbook(make_workbook):
+    """Ruta del horario de prueba (SCHEDULE_ROWS)."""
+    return make_workbook(SCHEDULE_HEADER, SCHEDULE_ROWS)
+
+
+@pytest.fixture(scope="session")
+def flask_app(tmp_path_factory):
+    """
+    La aplicación, con su carpeta de cargas y su base en un directorio temporal.
+
+    app.py usa rutas relativas ("uploads"), así que las pruebas corren
+    dentro de ese directorio.
+    """
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("app"))
+    from app import app
+    yield app
+    os.chdir(previous)
+
+
+@pytest.fixture
+def client(flask_app):
+    return flask_app.test_client()
+
+
+def upload(client, path, query=""):
+    """Sube un Excel a /upload y retorna la respuesta."""
+    with open(path, "rb") as fh:
+        return client.post(
+            "/upload" + query,
+            data={"file": (fh, os.path.basename(path))},
+            content_type="multipart/form-data",
+        )
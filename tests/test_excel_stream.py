@@ -0,0 +1,46 @@
+"""La lectura por bloques entrega los mismos DataFrames que pd.read_excel."""
+
+import datetime
+
+import pandas as pd
+import pytest
+
+from blueprints.excel_stream import iter_workbook_chunks
+
+HEADER = ["NRC", "N_CURSO", "CODIGO", "FECHA", "ACTIVO", "MEZCLA", "VACIA", "LUNES"]
+ROWS = [
+    [1001, 101, "101", datetime.datetime(2024, 3, 4), True, 1, None, "X"],
+    [1002, None, "ABC", None, False, "x", None, None],
+    [1003, 102, "102", datetime.datetime(2024, 3, 5, 8, 30), True, 2.5, None, "NA"],
+    [1001, 101, "101", datetime.datetime(2024, 3, 4), True, 1, None, "X"],
+    [None, None, None, None, None, None, None, None],
+    [1004, 103.0, "", datetime.datetime(2024, 3, 6), None, datetime.time(8, 30), None, ""],
+    [None, None, None, None, None, None, None, None],
+]
+
+
+def _streamed(path, **kwargs):
+    chunks = list(iter_workbook_chunks(path, lambda df: df, **kwargs))
+    return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5000])
+def test_chunks_match_read_excel(make_workbook, chunk_size):
+    path = make_workbook(HEADER, ROWS)
+    pd.testing.assert_frame_equal(_streamed(path, chunk_size=chunk_size), pd.read_excel(path))
+
+
+def test_unique_rows_match_drop_duplicates(make_workbook):
+    path = make_workbook(HEADER, ROWS)
+    pd.testing.assert_frame_equal(
+        _streamed(path, chunk_size=2, unique_rows=True),
+        pd.read_excel(path).drop_duplicates(),
+    )
+
+
+def test_empty_sheet_yields_one_empty_chunk(make_workbook):
+    path = make_workbook(HEADER, [])
+    chunks = list(iter_workbook_chunks(path, lambda df: df))
+    assert len(chunks) == 1
+    assert chunks[0].empty
+    assert list(chunks[0].columns) == HEADER
@@ -0,0 +1,85 @@
+"""La grilla de module_grid resuelve igual que la cadena if/elif original de rooms.py."""
+
+from blueprints.module_grid import module_for_start, resolve_modules
+from blueprints.rooms import get_affected_modules
+
+
+def _reference(start_str, end_str):
+    # get_affected_modules antes de module_grid
+    try:
+        s_raw = str(start_str).strip().replace(".0", "")
+        e_raw = str(end_str).strip().replace(".0", "")
+        start_val = int(s_raw.replace(":", "")[:4])
+        end_val = int(e_raw.replace(":", "")[:4])
+
+        if start_val == 800 and (1035 <= end_val <= 1045):
+            return [1, 2]
+        if start_val == 930 and (1205 <= end_val <= 1215):
+            return [2, 3]
+        if start_val == 1100 and (1335 <= end_val <= 1345):
+            return [3, 4]
+        if start_val == 1400 and (1635 <= end_val <= 1645):
+            return [5, 6]
+        if start_val == 1700 and (1935 <= end_val <= 1945):
+            return [7, 8]
+
+        affected = []
+        if 800 <= start_val <= 925:
+            affected.append(1)
+        elif 930 <= start_val <= 1055:
+            affected.append(2)
+        elif 1100 <= start_val <= 1225:
+            affected.append(3)
+        elif 1230 <= start_val <= 1355:
+            affected.append(4)
+        elif 1400 <= start_val <= 1525:
+            affected.append(5)
+        elif 1530 <= start_val <= 1655:
+            affected.append(6)
+        elif 1700 <= start_val <= 1825:
+            affected.append(7)
+        elif 1830 <= start_val <= 2000:
+            affected.append(8)
+        return affected
+    except Exception:
+        return []
+
+
+def _hhmm(minutes):
+    return f"{minutes // 60}{minutes % 60:02d}"
+
+
+def _formats(minutes):
+    # Como llegan del Excel: 800, 0800, 08:00, 800.0
+    hhmm = _hhmm(minutes)
+    return (hhmm, hhmm.zfill(4), f"{hhmm.zfill(4)[:2]}:{hhmm[-2:]}", f"{hhmm}.0")
+
+
+def test_every_start_time_matches():
+    for start in range(24 * 60):
+        for end in (start, start + 80, start + 160):
+            end_raw = _hhmm(end % (24 * 60))
+            expected = _reference(_hhmm(start), end_raw)
+            for start_raw in _formats(start):
+                assert list(resolve_modules(start_raw, end_raw)) == expected, (start_raw, end_raw)
+                assert get_affected_modules(start_raw, end_raw) == expected
+
+
+def test_every_end_time_of_a_double_start_matches():
+    for start in ("800", "930", "1100", "1400", "1700", "1230", "1530", "1830"):
+        for end in range(24 * 60):
+            for end_raw in _formats(end):
+                assert list(resolve_modules(start, end_raw)) == _reference(start, end_raw), (start, end_raw)
+
+
+def test_module_for_start_uses_the_same_windows():
+    for start in range(24 * 60):
+        single = _reference(_hhmm(start), _hhmm(start))
+        for start_raw in _formats(start):
+            assert module_for_start(start_raw) == (single[0] if single else 0), start_raw
+
+
+def test_invalid_values():
+    for raw in ("", "nan", "None", "abc", "-800", "2400", "8:00:00"):
+        assert get_affected_modules(raw, "1040") == _reference(raw, "1040") == []
+        assert module_for_start(raw) == 0
@@ -0,0 +1,107 @@
+"""
+/unassigned_nrcs y /rooms_without_teacher responden byte a byte lo mismo que
+la versión que releía el Excel fila a fila (copiada aquí como referencia).
+"""
+
+import pandas as pd
+from flask import jsonify
+
+from blueprints.rooms import normalize_columns
+from conftest import upload
+
+DAYS = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado"]
+
+
+def _text(row, column, default=""):
+    return str(row.get(column, default)).strip()
+
+
+def _nrc(row):
+    return _text(row, "nrc").replace(".0", "")
+
+
+def reference_unassigned(df):
+    sala = df["ubicacion"].astype(str).str.strip()
+    unassigned = df[df["ubicacion"].isna() | (sala == "") | (sala.str.lower() == "nan")]
+    result = []
+    for _, row in unassigned.iterrows():
+        nrc = _nrc(row)
+        if nrc.lower() == "nan" or nrc == "":
+            continue
+        result.append({
+            "nrc": nrc,
+            "seccion": _text(row, "seccion"),
+            "materia": _text(row, "nombre_asignatura", "Sin Nombre"),
+            "codigo_materia": _text(row, "codigo_materia"),
+            "n_curso": _text(row, "n_curso"),
+            "componente": _text(row, "componente"),
+            "carrera": _text(row, "carrera"),
+        })
+    return result
+
+
+def reference_without_teacher(df):
+    no_teacher = df[df["prof_nombre"].astype(str).str.strip().str.upper() == "SIN DOCENTE"]
+    grouped = {}
+    for _, row in no_teacher.iterrows():
+        nrc = _nrc(row)
+        if nrc.lower() == "nan" or nrc == "":
+            nrc = "?"
+        inicio = _text(row, "inicio").replace(".0", "")
+        fin = _text(row, "fin").replace(".0", "")
+        dias = ", ".join(
+            day.capitalize()
+            for day in DAYS
+            if day in row.index and str(row[day]).strip().lower() not in ("nan", "", "none")
+        )
+        item = {
+            "nrc": nrc,
+            "seccion": _text(row, "seccion"),
+            "materia": _text(row, "nombre_asignatura", "Sin Nombre"),
+            "codigo_materia": _text(row, "codigo_materia"),
+            "n_curso": _text(row, "n_curso"),
+            "componente": _text(row, "componente"),
+            "carreras": set(),
+            "ubicacion": _text(row, "ubicacion", "Sin Sala"),
+            "horario": f"{inicio} - {fin}",
+            "dias": dias,
+        }
+        key = tuple(v for k, v in item.items() if k != "carreras")
+        item = grouped.setdefault(key, item)
+        carrera = _text(row, "carrera")
+        if carrera and carrera.lower() not in ("nan", "", "none"):
+            item["carreras"].add(carrera)
+    result = []
+    for item in grouped.values():
+        carreras = sorted(item.pop("carreras"))
+        item["carrera"] = ", ".join(carreras) if carreras else "-"
+        result.append(item)
+    result.sort(key=lambda x: (x["nrc"], x["seccion"]))
+    return result
+
+
+def _expected_body(flask_app, data):
+    with flask_app.app_context():
+        return jsonify({"success": True, "data": data}).get_data()
+
+
+def test_unassigned_nrcs_match_reference(flask_app, client, schedule_workbook):
+    assert upload(client, schedule_workbook).status_code == 200
+    df = normalize_columns(pd.read_excel(schedule_workbook))
+    expected = reference_unassigned(df)
+
+    response = client.get("/unassigned_nrcs")
+    assert response.status_code == 200
+    assert response.get_data() == _expected_body(flask_app, expected)
+    assert any(item["n_curso"].endswith(".0") for item in expected)
+
+
+def test_rooms_without_teacher_match_reference(flask_app, client, schedule_workbook):
+    assert upload(client, schedule_workbook).status_code == 200
+    df = normalize_columns(pd.read_excel(schedule_workbook))
+    expected = reference_without_teacher(df)
+
+    response = client.get("/rooms_without_teacher")
+    assert response.status_code == 200
+    assert response.get_data() == _expected_body(flask_app, expected)
+    assert any(", " in item["carrera"] for item in expected)
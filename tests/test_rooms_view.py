@@ -0,0 +1,98 @@
+"""La vista publicada que arma build_rooms_view por partes es igual a copiar todo."""
+
+import numpy as np
+
+from blueprints import rooms
+from blueprints.occupancy_tensor import bitmaps_to_tensor
+from blueprints.state import read_view
+from conftest import SCHEDULE_HEADER, SCHEDULE_ROWS, upload
+
+
+def _snapshot(view):
+    return {
+        "order": list(view["occupancy"]),
+        "schedule_order": [key for _, key in view["order"]],
+        "occupancy": dict(view["occupancy"]),
+        "bitmaps": dict(view["bitmaps"]),
+        "indexes": {
+            field: {value: set(keys) for value, keys in index.items()}
+            for field, index in view["indexes"].items()
+        },
+        "room_database": dict(view["room_database"]),
+        "tensor_rooms": list(view["tensor"]["rooms"]),
+        "tensor": view["tensor"]["tensor"].copy(),
+    }
+
+
+def _live():
+    tensor_rooms = sorted(set(rooms.ROOM_DATABASE) | set(rooms.ROOM_BITMAPS))
+    return {
+        "order": list(rooms.OCCUPANCY_INDEX),
+        "schedule_order": sorted(rooms.OCCUPANCY_INDEX, key=rooms.schedule_sort_key),
+        "occupancy": dict(rooms.OCCUPANCY_INDEX),
+        "bitmaps": dict(rooms.ROOM_BITMAPS),
+        "indexes": {
+            field: {value: set(keys) for value, keys in index.items()}
+            for field, index in rooms.SCHEDULE_INDEXES.items()
+        },
+        "room_database": dict(rooms.ROOM_DATABASE),
+        "tensor_rooms": tensor_rooms,
+        "tensor": bitmaps_to_tensor(
+            [rooms.ROOM_BITMAPS.get(sala, 0) for sala in tensor_rooms],
+            len(rooms.SCHEDULE_DAYS), rooms.MODULES_PER_DAY,
+        ),
+    }
+
+
+def _assert_same(actual, expected):
+    tensor, expected_tensor = actual.pop("tensor"), expected.pop("tensor")
+    assert actual == expected
+    assert np.array_equal(tensor, expected_tensor)
+
+
+def _assign(client, nrc, sala, dia, modulo):
+    response = client.post("/assign_subject", json={
+        "nrc": nrc, "seccion": "Z", "materia": "Prueba", "dia": dia, "modulo": modulo, "sala": sala,
+    })
+    assert response.status_code == 200
+    return response.get_json()["entry"]
+
+
+def _delete(client, entry):
+    response = client.post("/delete_assignment", json={
+        field: entry[field] for field in ("nrc", "seccion", "dia_norm", "modulo", "ubicacion")
+    })
+    assert response.status_code == 200
+
+
+def test_incremental_views_match_the_live_state(client, make_workbook, schedule_workbook):
+    assert upload(client, schedule_workbook).status_code == 200
+    first = read_view("rooms")
+    first_snapshot = _snapshot(first)
+    _assert_same(_snapshot(first), _live())
+
+    a = _assign(client, "9001", "R380", "martes", 2)
+    _assert_same(_snapshot(read_view("rooms")), _live())
+    b = _assign(client, "9002", "R6", "martes", 2)
+    _delete(client, a)
+    c = _assign(client, "9003", "R380", "martes", 2)  # Vuelve a insertarse al final
+    _assert_same(_snapshot(read_view("rooms")), _live())
+
+    # Sala nueva con bloques: el tensor se vuelve a armar
+    assert client.post("/add_room", json={"room_name": "T1", "capacity": 40}).status_code == 200
+    d = _assign(client, "9004", "T1", "lunes", 1)
+    _assert_same(_snapshot(read_view("rooms")), _live())
+    assert client.post("/delete_room", json={"room_name": "T1"}).status_code == 200
+    for entry in (b, c, d):
+        _delete(client, entry)
+    _assert_same(_snapshot(read_view("rooms")), _live())
+
+    # Delta que cambia la entrada de un bloque ya ocupado
+    rows = [list(row) for row in SCHEDULE_ROWS]
+    rows[3][2] = "Algebra II"
+    response = upload(client, make_workbook(SCHEDULE_HEADER, rows, "cambio.xlsx"), "?mode=delta")
+    assert response.get_json()["data"]["changes"]["summary"]["changed"] == 1
+    _assert_same(_snapshot(read_view("rooms")), _live())
+
+    # Las vistas ya publicadas no cambian
+    _assert_same(_snapshot(first), first_snapshot)
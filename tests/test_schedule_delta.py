@@ -0,0 +1,80 @@
+"""El modo delta de /upload deja el mismo horario que una carga completa."""
+
+import json
+import os
+
+import pytest
+
+from blueprints import excel_stream
+from conftest import SCHEDULE_HEADER, SCHEDULE_ROWS, upload
+
+
+def _schedule(client):
+    data = client.get("/current_data").get_json()["data"]
+    return sorted(json.dumps(entry, sort_keys=True) for entry in data["schedule"])
+
+
+def _delta(client, path):
+    response = upload(client, path, "?mode=delta&include_schedule=0")
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert data["mode"] == "delta"
+    return data["changes"]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_same_file_produces_an_empty_delta(client, monkeypatch, schedule_workbook, streaming):
+    # La huella no depende de si la carga completa leyó el archivo por bloques
+    if streaming:
+        monkeypatch.setattr(excel_stream, "STREAMING_MIN_BYTES", 0)
+    assert upload(client, schedule_workbook).status_code == 200
+    monkeypatch.setattr(excel_stream, "STREAMING_MIN_BYTES", 1 << 40)
+
+    changes = _delta(client, schedule_workbook)
+
+    assert changes["summary"] == {"added": 0, "changed": 0, "removed": 0, "moved": 0}
+    assert changes["upserted"] == [] and changes["released"] == []
+
+
+def test_moved_rows_rerank_clashes_like_a_full_upload(client, make_workbook, schedule_workbook):
+    assert upload(client, schedule_workbook).status_code == 200
+
+    # NRC 1003 pierde R380 jueves módulo 1 frente a NRC 1002; subirlo al
+    # principio no cambia la huella de ningún grupo pero sí el ganador
+    rows = [SCHEDULE_ROWS[3]] + SCHEDULE_ROWS[:3] + SCHEDULE_ROWS[4:]
+    rows[6] = rows[6][:5] + ["PRA"] + rows[6][6:]
+    revised = make_workbook(SCHEDULE_HEADER, rows, name="revisado.xlsx")
+
+    changes = _delta(client, revised)
+    after_delta = _schedule(client)
+    assert changes["summary"]["moved"] >= 1
+    assert changes["summary"]["changed"] == 1
+
+    assert upload(client, revised).status_code == 200
+    assert after_delta == _schedule(client)
+    winner = next(e for e in map(json.loads, after_delta)
+                  if (e["ubicacion"], e["dia_norm"], e["modulo"]) == ("R380", "jueves", 1))
+    assert winner["nrc"] == "1003"
+
+
+def test_delta_is_refused_after_a_multi_file_upload(client, flask_app, make_workbook):
+    # Dos sedes con el mismo nombre de archivo: cada una se guarda aparte
+    first = make_workbook(SCHEDULE_HEADER, SCHEDULE_ROWS[:5], name="a.xlsx")
+    second = make_workbook(SCHEDULE_HEADER, SCHEDULE_ROWS[5:], name="b.xlsx")
+    with open(first, "rb") as fa, open(second, "rb") as fb:
+        response = client.post(
+            "/upload",
+            data={"file": [(fa, "horario.xlsx"), (fb, "horario.xlsx")]},
+            content_type="multipart/form-data",
+        )
+    assert response.status_code == 200
+    both = _schedule(client)
+    upload_folder = flask_app.config["UPLOAD_FOLDER"]
+    assert not os.path.exists(os.path.join(upload_folder, "latest.xlsx"))
+    assert not [name for name in os.listdir(upload_folder) if name.startswith("upload_")]
+
+    # Un delta con una sola sede daría por eliminadas las clases de la otra
+    response = upload(client, first, "?mode=delta")
+    assert response.get_json()["data"]["mode"] == "full"
+    assert _schedule(client) != both
+    assert os.path.exists(os.path.join(upload_folder, "latest.xlsx"))
@@ -0,0 +1,43 @@
+"""expand_schedule_frame produce las mismas entradas que parse_schedule_row."""
+
+import pandas as pd
+
+from blueprints.rooms import (
+    expand_schedule_frame,
+    normalize_columns,
+    parse_schedule_row,
+    schedule_records,
+)
+
+
+def _reference(df):
+    return [entry for _, row in df.iterrows() for entry in parse_schedule_row(row)]
+
+
+def test_vectorized_matches_row_by_row(schedule_workbook):
+    df = normalize_columns(pd.read_excel(schedule_workbook))
+    expected = _reference(df)
+
+    assert schedule_records(expand_schedule_frame(df)) == expected
+
+    # El horario de prueba cubre los casos que separan a las dos rutas
+    assert any(e["n_curso"] == "101.0" for e in expected)
+    assert any(e["n_curso"] == "nan" for e in expected)
+    assert any(e["fecha_ini"] == "NaT" for e in expected)
+    assert any(e["nrc"] == "?" for e in expected)
+    assert any(e["seccion"] == "?" for e in expected)
+    assert {e["modulo"] for e in expected if e["nrc"] == "1002"} == {1, 2}
+
+
+def test_vectorized_matches_row_by_row_on_a_slice(schedule_workbook):
+    # Las filas de un bloque conservan su etiqueta y su orden
+    df = normalize_columns(pd.read_excel(schedule_workbook)).iloc[2:5]
+    expanded = expand_schedule_frame(df)
+
+    assert schedule_records(expanded) == _reference(df)
+    assert set(expanded.index) <= set(df.index)
+
+
+def test_empty_frame():
+    df = normalize_columns(pd.DataFrame(columns=["NRC", "SALA", "HR_INICIO", "HR_FIN", "LUNES"]))
+    assert schedule_records(expand_schedule_frame(df)) == []